@@ -0,0 +1,158 @@
+"""baseline schema
+
+Revision ID: 5b2f8c1d9a3e
+Revises:
+Create Date: 2026-10-18 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5b2f8c1d9a3e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+test_status = sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED', name='teststatus')
+issue_severity = sa.Enum('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO', name='issueseverity')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_superuser', sa.Boolean(), nullable=True),
+        sa.Column('plan', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'projects',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('target_url', sa.String(length=500), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('test_config', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'tests',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_type', sa.String(length=100), nullable=False),
+        sa.Column('status', test_status, nullable=True),
+        sa.Column('results', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('screenshots', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('videos', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('error_stack', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'issues',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('severity', issue_severity, nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('url', sa.String(length=500), nullable=True),
+        sa.Column('element_selector', sa.String(length=500), nullable=True),
+        sa.Column('screenshot_url', sa.String(length=500), nullable=True),
+        sa.Column('code_snippet', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'comments',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('issue_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'manual_test_results',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('screenshots', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('videos', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('test_duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'reports',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('report_type', sa.String(length=50), nullable=False),
+        sa.Column('file_url', sa.String(length=500), nullable=True),
+        sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('generated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'webhooks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('url', sa.String(length=500), nullable=False),
+        sa.Column('events', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('webhooks')
+    op.drop_table('reports')
+    op.drop_table('manual_test_results')
+    op.drop_table('comments')
+    op.drop_table('issues')
+    op.drop_table('tests')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('projects')
+    op.drop_table('users')
+    issue_severity.drop(op.get_bind(), checkfirst=True)
+    test_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""keyset pagination indexes for tests and issues
+
+Revision ID: 8d4e6a7b1c2f
+Revises: 5b2f8c1d9a3e
+Create Date: 2026-10-18 02:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8d4e6a7b1c2f'
+down_revision = '5b2f8c1d9a3e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tests_project_id_created_at_id', 'tests', ['project_id', 'created_at', 'id'])
+    op.create_index('ix_tests_project_id_status_created_at_id', 'tests', ['project_id', 'status', 'created_at', 'id'])
+    op.create_index('ix_tests_project_id_test_type_created_at_id', 'tests', ['project_id', 'test_type', 'created_at', 'id'])
+
+    op.create_index('ix_issues_test_id_created_at_id', 'issues', ['test_id', 'created_at', 'id'])
+    op.create_index('ix_issues_test_id_severity_created_at_id', 'issues', ['test_id', 'severity', 'created_at', 'id'])
+    op.create_index('ix_issues_test_id_category_created_at_id', 'issues', ['test_id', 'category', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_issues_test_id_category_created_at_id', table_name='issues')
+    op.drop_index('ix_issues_test_id_severity_created_at_id', table_name='issues')
+    op.drop_index('ix_issues_test_id_created_at_id', table_name='issues')
+
+    op.drop_index('ix_tests_project_id_test_type_created_at_id', table_name='tests')
+    op.drop_index('ix_tests_project_id_status_created_at_id', table_name='tests')
+    op.drop_index('ix_tests_project_id_created_at_id', table_name='tests')
@@ -0,0 +1,54 @@
+"""indexes for route query patterns and foreign keys
+
+Revision ID: c3a9e5f7d1b4
+Revises: 8d4e6a7b1c2f
+Create Date: 2026-10-18 02:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3a9e5f7d1b4'
+down_revision = '8d4e6a7b1c2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Project listing and stats filter on the owner and skip deleted projects
+    op.create_index(
+        'ix_projects_user_id_active',
+        'projects',
+        ['user_id'],
+        postgresql_where=sa.text("status != 'deleted'"),
+    )
+
+    # Open critical issue counts on the project list
+    op.create_index(
+        'ix_issues_test_id_open_critical',
+        'issues',
+        ['test_id'],
+        postgresql_where=sa.text("severity = 'CRITICAL' AND status = 'open'"),
+    )
+
+    # Foreign keys without a covering index (lookups and cascading deletes)
+    op.create_index('ix_comments_issue_id', 'comments', ['issue_id'])
+    op.create_index('ix_comments_user_id', 'comments', ['user_id'])
+    op.create_index('ix_manual_test_results_test_id', 'manual_test_results', ['test_id'])
+    op.create_index('ix_manual_test_results_user_id', 'manual_test_results', ['user_id'])
+    op.create_index('ix_reports_test_id', 'reports', ['test_id'])
+    op.create_index('ix_webhooks_user_id', 'webhooks', ['user_id'])
+    op.create_index('ix_webhooks_project_id', 'webhooks', ['project_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhooks_project_id', table_name='webhooks')
+    op.drop_index('ix_webhooks_user_id', table_name='webhooks')
+    op.drop_index('ix_reports_test_id', table_name='reports')
+    op.drop_index('ix_manual_test_results_user_id', table_name='manual_test_results')
+    op.drop_index('ix_manual_test_results_test_id', table_name='manual_test_results')
+    op.drop_index('ix_comments_user_id', table_name='comments')
+    op.drop_index('ix_comments_issue_id', table_name='comments')
+    op.drop_index('ix_issues_test_id_open_critical', table_name='issues')
+    op.drop_index('ix_projects_user_id_active', table_name='projects')
@@ -0,0 +1,32 @@
+"""ingest chunk ledger for idempotent result ingestion
+
+Revision ID: e7f1a2b3c4d5
+Revises: c3a9e5f7d1b4
+Create Date: 2026-10-18 02:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e7f1a2b3c4d5'
+down_revision = 'c3a9e5f7d1b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingest_chunks',
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('records', sa.Integer(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('test_id', 'seq'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_chunks')
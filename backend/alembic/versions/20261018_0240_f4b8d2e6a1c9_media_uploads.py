@@ -0,0 +1,47 @@
+"""media uploads for chunked screenshot and video uploads
+
+Revision ID: f4b8d2e6a1c9
+Revises: e7f1a2b3c4d5
+Create Date: 2026-10-18 02:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d2e6a1c9'
+down_revision = 'e7f1a2b3c4d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'media_uploads',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('received', sa.BigInteger(), nullable=False),
+        sa.Column('checksum', sa.String(length=64), nullable=True),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('has_thumbnail', sa.Boolean(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_media_uploads_user_id', 'media_uploads', ['user_id'])
+    op.create_index('ix_media_uploads_sha256', 'media_uploads', ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_media_uploads_sha256', table_name='media_uploads')
+    op.drop_index('ix_media_uploads_user_id', table_name='media_uploads')
+    op.drop_table('media_uploads')
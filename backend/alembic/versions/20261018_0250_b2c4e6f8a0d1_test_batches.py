@@ -0,0 +1,45 @@
+"""test batches for bulk test scheduling
+
+Revision ID: b2c4e6f8a0d1
+Revises: f4b8d2e6a1c9
+Create Date: 2026-10-18 02:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b2c4e6f8a0d1'
+down_revision = 'f4b8d2e6a1c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'test_batches',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('test_type', sa.String(length=100), nullable=False),
+        sa.Column('config', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_test_batches_user_id', 'test_batches', ['user_id'])
+
+    op.add_column('tests', sa.Column('batch_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'tests_batch_id_fkey', 'tests', 'test_batches', ['batch_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_tests_batch_id_created_at_id', 'tests', ['batch_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tests_batch_id_created_at_id', table_name='tests')
+    op.drop_constraint('tests_batch_id_fkey', 'tests', type_='foreignkey')
+    op.drop_column('tests', 'batch_id')
+    op.drop_index('ix_test_batches_user_id', table_name='test_batches')
+    op.drop_table('test_batches')
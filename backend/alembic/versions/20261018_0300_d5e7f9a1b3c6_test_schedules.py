@@ -0,0 +1,40 @@
+"""recurring test schedules
+
+Revision ID: d5e7f9a1b3c6
+Revises: b2c4e6f8a0d1
+Create Date: 2026-10-18 03:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd5e7f9a1b3c6'
+down_revision = 'b2c4e6f8a0d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('next_run_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_projects_next_run_at',
+        'projects',
+        ['next_run_at'],
+        postgresql_where=sa.text("next_run_at IS NOT NULL"),
+    )
+
+    op.add_column('tests', sa.Column('scheduled_for', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_tests_project_id_scheduled_for',
+        'tests',
+        ['project_id', 'scheduled_for'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tests_project_id_scheduled_for', table_name='tests')
+    op.drop_column('tests', 'scheduled_for')
+    op.drop_index('ix_projects_next_run_at', table_name='projects')
+    op.drop_column('projects', 'next_run_at')
@@ -0,0 +1,38 @@
+"""page fingerprints for incremental re-testing
+
+Revision ID: a7c9e1f3b5d8
+Revises: d5e7f9a1b3c6
+Create Date: 2026-10-18 03:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b5d8'
+down_revision = 'd5e7f9a1b3c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'page_fingerprints',
+        sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('url', sa.String(length=2000), nullable=False),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=64), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('checked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'url'),
+    )
+    op.create_index('ix_page_fingerprints_test_id', 'page_fingerprints', ['test_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_page_fingerprints_test_id', table_name='page_fingerprints')
+    op.drop_table('page_fingerprints')
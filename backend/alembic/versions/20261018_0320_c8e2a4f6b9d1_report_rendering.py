@@ -0,0 +1,41 @@
+"""report rendering status and cache key
+
+Revision ID: c8e2a4f6b9d1
+Revises: a7c9e1f3b5d8
+Create Date: 2026-10-18 03:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2a4f6b9d1'
+down_revision = 'a7c9e1f3b5d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows were generated outside the report engine
+    op.add_column('reports', sa.Column('template_version', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('reports', sa.Column('status', sa.String(length=20), nullable=False, server_default='ready'))
+    op.alter_column('reports', 'template_version', server_default=None)
+    op.alter_column('reports', 'status', server_default=None)
+    op.add_column('reports', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('reports', sa.Column('error_message', sa.Text(), nullable=True))
+    op.add_column('reports', sa.Column('requested_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_reports_test_id_report_type_template_version',
+        'reports',
+        ['test_id', 'report_type', 'template_version'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reports_test_id_report_type_template_version', table_name='reports')
+    op.drop_column('reports', 'requested_at')
+    op.drop_column('reports', 'error_message')
+    op.drop_column('reports', 'size')
+    op.drop_column('reports', 'status')
+    op.drop_column('reports', 'template_version')
@@ -0,0 +1,70 @@
+"""webhook delivery outbox and circuit breaker
+
+Revision ID: e9b1d3f5a7c2
+Revises: c8e2a4f6b9d1
+Create Date: 2026-10-18 03:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e9b1d3f5a7c2'
+down_revision = 'c8e2a4f6b9d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('webhooks', sa.Column('consecutive_failures', sa.Integer(), nullable=False, server_default='0'))
+    op.alter_column('webhooks', 'consecutive_failures', server_default=None)
+    op.add_column('webhooks', sa.Column('circuit_open_until', sa.DateTime(), nullable=True))
+
+    op.create_table(
+        'webhook_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event', sa.String(length=50), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_webhook_events_created_at', 'webhook_events', ['created_at'])
+
+    op.create_table(
+        'webhook_deliveries',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('webhook_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_status_code', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['webhook_events.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['webhook_id'], ['webhooks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_webhook_deliveries_event_id', 'webhook_deliveries', ['event_id'])
+    op.create_index('ix_webhook_deliveries_webhook_id', 'webhook_deliveries', ['webhook_id'])
+    op.create_index('ix_webhook_deliveries_created_at', 'webhook_deliveries', ['created_at'])
+    op.create_index(
+        'ix_webhook_deliveries_next_attempt_at',
+        'webhook_deliveries',
+        ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_deliveries_next_attempt_at', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_created_at', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_webhook_id', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_event_id', table_name='webhook_deliveries')
+    op.drop_table('webhook_deliveries')
+    op.drop_index('ix_webhook_events_created_at', table_name='webhook_events')
+    op.drop_table('webhook_events')
+    op.drop_column('webhooks', 'circuit_open_until')
+    op.drop_column('webhooks', 'consecutive_failures')
@@ -0,0 +1,83 @@
+"""project daily stats rollups for analytics
+
+Revision ID: f2a4c6e8b0d3
+Revises: e9b1d3f5a7c2
+Create Date: 2026-10-18 03:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'f2a4c6e8b0d3'
+down_revision = 'e9b1d3f5a7c2'
+branch_labels = None
+depends_on = None
+
+COUNTERS = [
+    'tests_completed', 'tests_failed',
+    'checks_total', 'checks_passed', 'checks_failed', 'checks_warnings',
+    'issues_critical', 'issues_high', 'issues_medium', 'issues_low', 'issues_info',
+    'load_time_ms_count',
+]
+
+
+def upgrade() -> None:
+    op.add_column('tests', sa.Column('rolled_up_at', sa.DateTime(), nullable=True))
+
+    op.create_table(
+        'project_daily_stats',
+        sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in COUNTERS],
+        sa.Column('duration_seconds_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('load_time_ms_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('load_time_ms_max', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'day'),
+    )
+
+    # Backfill from the tests finished so far
+    op.execute("""
+        INSERT INTO project_daily_stats (
+            project_id, day, tests_completed, tests_failed,
+            checks_total, checks_passed, checks_failed, checks_warnings,
+            issues_critical, issues_high, issues_medium, issues_low, issues_info,
+            duration_seconds_sum, load_time_ms_sum, load_time_ms_count, load_time_ms_max, updated_at
+        )
+        SELECT
+            project_id, completed_at::date,
+            count(*) FILTER (WHERE status = 'COMPLETED'),
+            count(*) FILTER (WHERE status = 'FAILED'),
+            coalesce(sum((results -> 'stats' ->> 'total_checks')::int), 0),
+            coalesce(sum((results -> 'stats' ->> 'passed')::int), 0),
+            coalesce(sum((results -> 'stats' ->> 'failed')::int), 0),
+            coalesce(sum((results -> 'stats' ->> 'warnings')::int), 0),
+            coalesce(sum((results -> 'issue_counts' ->> 'critical')::int), 0),
+            coalesce(sum((results -> 'issue_counts' ->> 'high')::int), 0),
+            coalesce(sum((results -> 'issue_counts' ->> 'medium')::int), 0),
+            coalesce(sum((results -> 'issue_counts' ->> 'low')::int), 0),
+            coalesce(sum((results -> 'issue_counts' ->> 'info')::int), 0),
+            coalesce(sum(duration_seconds), 0),
+            coalesce(sum((results ->> 'load_time_ms')::int), 0),
+            count(results ->> 'load_time_ms'),
+            max((results ->> 'load_time_ms')::int),
+            now()
+        FROM tests
+        WHERE status IN ('COMPLETED', 'FAILED') AND completed_at IS NOT NULL
+        GROUP BY project_id, completed_at::date
+    """)
+    op.execute("""
+        UPDATE tests SET rolled_up_at = now()
+        WHERE status IN ('COMPLETED', 'FAILED') AND completed_at IS NOT NULL
+    """)
+
+    for name in COUNTERS + ['duration_seconds_sum', 'load_time_ms_sum']:
+        op.alter_column('project_daily_stats', name, server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_table('project_daily_stats')
+    op.drop_column('tests', 'rolled_up_at')
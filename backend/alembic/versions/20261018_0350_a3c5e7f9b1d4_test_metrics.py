@@ -0,0 +1,62 @@
+"""test metrics series for performance regression detection
+
+Revision ID: a3c5e7f9b1d4
+Revises: f2a4c6e8b0d3
+Create Date: 2026-10-18 03:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f9b1d4'
+down_revision = 'f2a4c6e8b0d3'
+branch_labels = None
+depends_on = None
+
+METRICS = ['load_time', 'dom_content_loaded', 'first_paint', 'resource_count', 'total_size', 'lcp', 'fid', 'cls']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'test_metrics',
+        sa.Column('test_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('browser', sa.String(length=50), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        *[sa.Column(name, sa.Float(), nullable=True) for name in METRICS],
+        sa.Column('evaluated_at', sa.DateTime(), nullable=True),
+        sa.Column('regressions', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('test_id'),
+    )
+    op.create_index(
+        'ix_test_metrics_project_id_browser_recorded_at',
+        'test_metrics',
+        ['project_id', 'browser', 'recorded_at'],
+    )
+    op.create_index(
+        'ix_test_metrics_pending',
+        'test_metrics',
+        ['recorded_at'],
+        postgresql_where=sa.text('evaluated_at IS NULL'),
+    )
+
+    # Earlier runs only kept the page load time on the row; they seed the
+    # load time baselines and are not scanned themselves
+    op.execute("""
+        INSERT INTO test_metrics (test_id, project_id, browser, recorded_at, load_time, evaluated_at)
+        SELECT id, project_id, coalesce(results ->> 'browser', 'chromium'), completed_at,
+               (results ->> 'load_time_ms')::float, now()
+        FROM tests
+        WHERE status = 'COMPLETED' AND completed_at IS NOT NULL
+          AND results ->> 'load_time_ms' IS NOT NULL AND results ->> 'carried_over_from' IS NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_test_metrics_pending', table_name='test_metrics')
+    op.drop_index('ix_test_metrics_project_id_browser_recorded_at', table_name='test_metrics')
+    op.drop_table('test_metrics')
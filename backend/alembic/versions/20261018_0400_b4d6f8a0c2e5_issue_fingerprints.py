@@ -0,0 +1,163 @@
+"""issue fingerprints and the cross-run issue index
+
+Revision ID: b4d6f8a0c2e5
+Revises: a3c5e7f9b1d4
+Create Date: 2026-10-18 04:00:00.000000
+
+"""
+import hashlib
+import re
+from urllib.parse import urlsplit
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e5'
+down_revision = 'a3c5e7f9b1d4'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+DIGITS = re.compile(r"\d+(?:[.,]\d+)*")
+WHITESPACE = re.compile(r"\s+")
+
+
+# A frozen copy of app.services.issue_index.issue_fingerprint as of this
+# revision, so later changes to the app don't change what this migration does
+def normalize_url(url):
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    path = parts.path.rstrip("/") or "/"
+    if not parts.netloc:
+        return path
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}"
+
+
+def issue_fingerprint(category, title, url, element_selector):
+    parts = (
+        (category or "").strip().lower(),
+        DIGITS.sub("#", WHITESPACE.sub(" ", (title or "").strip().lower())),
+        normalize_url(url),
+        WHITESPACE.sub(" ", (element_selector or "").strip()),
+    )
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('issues', sa.Column('fingerprint', sa.String(length=32), nullable=True))
+
+    op.create_table(
+        'issue_fingerprints',
+        sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('fingerprint', sa.String(length=32), nullable=False),
+        sa.Column('severity', postgresql.ENUM(name='issueseverity', create_type=False), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('url', sa.String(length=500), nullable=True),
+        sa.Column('element_selector', sa.String(length=500), nullable=True),
+        sa.Column('test_type', sa.String(length=100), nullable=False),
+        sa.Column('first_seen_test_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('last_seen_test_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('occurrences', sa.Integer(), nullable=False),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['first_seen_test_id'], ['tests.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['last_seen_test_id'], ['tests.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('project_id', 'fingerprint'),
+    )
+    op.create_index(
+        'ix_issue_fingerprints_project_id_first_seen_test_id',
+        'issue_fingerprints',
+        ['project_id', 'first_seen_test_id'],
+    )
+    op.create_index(
+        'ix_issue_fingerprints_project_id_last_seen_test_id',
+        'issue_fingerprints',
+        ['project_id', 'last_seen_test_id'],
+    )
+    op.create_index(
+        'ix_issue_fingerprints_project_id_open_critical',
+        'issue_fingerprints',
+        ['project_id'],
+        postgresql_where=sa.text("severity = 'CRITICAL' AND resolved_at IS NULL"),
+    )
+
+    # Fingerprint existing issues in batches (the normalization lives in Python)
+    bind = op.get_bind()
+    while True:
+        rows = bind.execute(sa.text("""
+            SELECT id, category, title, url, element_selector FROM issues
+            WHERE fingerprint IS NULL LIMIT :limit
+        """), {"limit": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(sa.text("""
+            UPDATE issues SET fingerprint = batch.fingerprint
+            FROM unnest(CAST(:ids AS uuid[]), CAST(:fingerprints AS varchar[])) AS batch (id, fingerprint)
+            WHERE issues.id = batch.id
+        """), {
+            "ids": [str(row.id) for row in rows],
+            "fingerprints": [issue_fingerprint(row.category, row.title, row.url, row.element_selector) for row in rows],
+        })
+
+    # One index row per project and fingerprint, described as last seen
+    op.execute("""
+        INSERT INTO issue_fingerprints (
+            project_id, fingerprint, severity, category, title, url, element_selector, test_type,
+            first_seen_test_id, first_seen_at, last_seen_test_id, last_seen_at, occurrences
+        )
+        SELECT
+            t.project_id, i.fingerprint,
+            (array_agg(i.severity ORDER BY i.created_at DESC NULLS LAST))[1],
+            (array_agg(i.category ORDER BY i.created_at DESC NULLS LAST))[1],
+            (array_agg(i.title ORDER BY i.created_at DESC NULLS LAST))[1],
+            (array_agg(i.url ORDER BY i.created_at DESC NULLS LAST))[1],
+            (array_agg(i.element_selector ORDER BY i.created_at DESC NULLS LAST))[1],
+            (array_agg(t.test_type ORDER BY i.created_at DESC NULLS LAST))[1],
+            (array_agg(t.id ORDER BY i.created_at NULLS LAST))[1],
+            coalesce(min(i.created_at), now()),
+            (array_agg(t.id ORDER BY i.created_at DESC NULLS LAST))[1],
+            coalesce(max(i.created_at), now()),
+            count(DISTINCT t.id)
+        FROM issues i
+        JOIN tests t ON t.id = i.test_id
+        GROUP BY t.project_id, i.fingerprint
+    """)
+
+    # Issues a later completed run of the same type no longer found are resolved
+    op.execute("""
+        UPDATE issue_fingerprints f SET resolved_at = now()
+        FROM tests seen
+        WHERE seen.id = f.last_seen_test_id
+          AND EXISTS (
+              SELECT 1 FROM tests t
+              WHERE t.project_id = f.project_id AND t.test_type = f.test_type
+                AND t.status = 'COMPLETED' AND t.created_at > seen.created_at
+          )
+    """)
+
+    # Critical counts now come from the index
+    op.drop_index('ix_issues_test_id_open_critical', table_name='issues')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_issues_test_id_open_critical',
+        'issues',
+        ['test_id'],
+        postgresql_where=sa.text("severity = 'CRITICAL' AND status = 'open'"),
+    )
+    op.drop_index('ix_issue_fingerprints_project_id_open_critical', table_name='issue_fingerprints')
+    op.drop_index('ix_issue_fingerprints_project_id_last_seen_test_id', table_name='issue_fingerprints')
+    op.drop_index('ix_issue_fingerprints_project_id_first_seen_test_id', table_name='issue_fingerprints')
+    op.drop_table('issue_fingerprints')
+    op.drop_column('issues', 'fingerprint')
@@ -0,0 +1,23 @@
+"""keyset pagination index for a test's issues filtered by status
+
+Revision ID: c6e8a0b2d4f7
+Revises: b4d6f8a0c2e5
+Create Date: 2026-10-18 04:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c6e8a0b2d4f7'
+down_revision = 'b4d6f8a0c2e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_issues_test_id_status_created_at_id', 'issues', ['test_id', 'status', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_issues_test_id_status_created_at_id', table_name='issues')
@@ -0,0 +1,55 @@
+"""triage status on the issue index; open critical counts honour it
+
+Revision ID: d8f0b2c4e6a9
+Revises: c6e8a0b2d4f7
+Create Date: 2026-10-18 04:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd8f0b2c4e6a9'
+down_revision = 'c6e8a0b2d4f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'issue_fingerprints',
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='open'),
+    )
+    op.alter_column('issue_fingerprints', 'status', server_default=None)
+
+    # The status of the issue row last seen
+    op.execute("""
+        UPDATE issue_fingerprints f SET status = last.status
+        FROM (
+            SELECT DISTINCT ON (i.test_id, i.fingerprint) i.test_id, i.fingerprint, i.status
+            FROM issues i
+            JOIN issue_fingerprints seen ON seen.last_seen_test_id = i.test_id AND seen.fingerprint = i.fingerprint
+            ORDER BY i.test_id, i.fingerprint, i.created_at DESC
+        ) last
+        WHERE last.test_id = f.last_seen_test_id AND last.fingerprint = f.fingerprint
+          AND last.status IS NOT NULL AND last.status != f.status
+    """)
+
+    op.drop_index('ix_issue_fingerprints_project_id_open_critical', table_name='issue_fingerprints')
+    op.create_index(
+        'ix_issue_fingerprints_project_id_open_critical',
+        'issue_fingerprints',
+        ['project_id'],
+        postgresql_where=sa.text("severity = 'CRITICAL' AND status = 'open' AND resolved_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_issue_fingerprints_project_id_open_critical', table_name='issue_fingerprints')
+    op.create_index(
+        'ix_issue_fingerprints_project_id_open_critical',
+        'issue_fingerprints',
+        ['project_id'],
+        postgresql_where=sa.text("severity = 'CRITICAL' AND resolved_at IS NULL"),
+    )
+    op.drop_column('issue_fingerprints', 'status')
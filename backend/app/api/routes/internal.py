@@ -0,0 +1,73 @@
+"""
+Internal API routes (service-to-service, not for end users)
+"""
+import hmac
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.db.models import Test
+from app.services.ingestion import IngestError, ingest_chunk, iter_ndjson
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+async def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Require the shared internal API token"""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resource not found"
+        )
+
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token"
+        )
+
+
+@router.put("/tests/{test_id}/results/{seq}", dependencies=[Depends(verify_internal_token)])
+async def ingest_test_results(
+    test_id: uuid.UUID,
+    seq: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ingest one chunk of a test run's results as NDJSON (application/x-ndjson)
+
+    Chunks are numbered by the sender; re-sending a chunk that was already
+    applied is a no-op, so failed uploads can simply be retried.
+    """
+    test_exists = await db.scalar(select(Test.id).where(Test.id == test_id))
+
+    if not test_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+
+    try:
+        result = await ingest_chunk(db, test_id, seq, iter_ndjson(request.stream()))
+    except IngestError as exc:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        )
+
+    await db.commit()
+
+    return {
+        "test_id": str(test_id),
+        "seq": seq,
+        "duplicate": result.duplicate,
+        "records": result.records,
+        "issues": result.issues
+    }
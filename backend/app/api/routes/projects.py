@@ -1,24 +1,99 @@
 """
 Project API routes
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import Select, and_, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.principal_cache import Principal
+from app.core.response_cache import cache_key, cached_response
+from app.core.serialization import JSONBytesResponse, serialize_page
 from app.core.security import get_current_user
-from app.db.session import get_db
-from app.db.models import User, Project, Test, Issue
-from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectWithStats
+from app.db.session import get_async_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page_of
+from app.db.models import Project, Test, TestStatus, IssueFingerprint, IssueSeverity
+from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectWithStats, ProjectAnalytics
+from app.schemas.test import TestResponse, TestPage
+from app.services.analytics import analytics_query, analytics_series, analytics_totals
+from app.services.scheduler import sync_project_schedule
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
+def projects_with_stats_query(user_id) -> Select:
+    """
+    A user's non-deleted projects with their test and issue statistics,
+    aggregated in a single statement
+
+    Critical issues are counted once per distinct open issue in the issue
+    index, not once per run that found them; issues last seen triaged
+    (acknowledged, fixed, wont_fix) are left out. The status/severity constants
+    are rendered inline rather than bound so the planner can match the
+    partial indexes on projects and issue_fingerprints even for prepared
+    statements.
+    """
+    not_deleted = Project.status != literal("deleted", literal_execute=True)
+    open_critical = and_(
+        IssueFingerprint.severity == literal(IssueSeverity.CRITICAL, IssueFingerprint.severity.type, literal_execute=True),
+        IssueFingerprint.status == literal("open", literal_execute=True),
+        IssueFingerprint.resolved_at.is_(None),
+    )
+
+    test_stats = (
+        select(
+            Test.project_id.label("project_id"),
+            func.count(Test.id).label("total_tests"),
+            func.max(Test.created_at).label("latest_test"),
+        )
+        .join(Project, Project.id == Test.project_id)
+        .where(Project.user_id == user_id, not_deleted)
+        .group_by(Test.project_id)
+        .subquery()
+    )
+
+    issue_stats = (
+        select(
+            IssueFingerprint.project_id.label("project_id"),
+            func.count().label("critical_issues"),
+        )
+        .join(Project, Project.id == IssueFingerprint.project_id)
+        .where(Project.user_id == user_id, not_deleted, open_critical)
+        .group_by(IssueFingerprint.project_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Project,
+            func.coalesce(test_stats.c.total_tests, 0),
+            test_stats.c.latest_test,
+            func.coalesce(issue_stats.c.critical_issues, 0),
+        )
+        .outerjoin(test_stats, test_stats.c.project_id == Project.id)
+        .outerjoin(issue_stats, issue_stats.c.project_id == Project.id)
+        .where(Project.user_id == user_id, not_deleted)
+    )
+
+
+def apply_schedule(project: Project):
+    """Validate the project's schedule and set its next run"""
+    try:
+        sync_project_schedule(project)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        )
+
+
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new project
@@ -30,66 +105,94 @@ async def create_project(
         description=project_data.description,
         test_config=project_data.test_config
     )
+    apply_schedule(new_project)
 
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project)
 
     return ProjectResponse.from_orm(new_project)
 
 
 @router.get("", response_model=List[ProjectWithStats])
 async def list_projects(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all projects for current user
+
+    Statistics are aggregated in a single statement regardless of the
+    number of projects.
     """
-    projects = db.query(Project).filter(
-        Project.user_id == current_user.id,
-        Project.status != "deleted"
-    ).all()
+    async def build():
+        rows = (await db.execute(projects_with_stats_query(current_user.id))).all()
+        projects = [
+            ProjectWithStats.model_validate(project).model_copy(update={
+                "total_tests": total_tests,
+                "latest_test": latest_test,
+                "critical_issues": critical_issues,
+            })
+            for project, total_tests, latest_test, critical_issues in rows
+        ]
+        # Also listed under each project's tag, so test activity refreshes it
+        tags.extend(f"project:{project.id}" for project in projects)
+        return projects, settings.RESPONSE_CACHE_TTL_SECONDS
 
-    # Add statistics to each project
-    projects_with_stats = []
-    for project in projects:
-        # Count total tests
-        total_tests = db.query(func.count(Test.id)).filter(Test.project_id == project.id).scalar()
+    tags = [f"projects:{current_user.id}"]
+    return await cached_response(request, cache_key(request, current_user.id, "projects"), tags, build)
 
-        # Get latest test timestamp
-        latest_test = db.query(func.max(Test.created_at)).filter(Test.project_id == project.id).scalar()
 
-        # Count critical issues
-        critical_issues = db.query(func.count(Issue.id)).join(Test).filter(
-            Test.project_id == project.id,
-            Issue.severity == "critical",
-            Issue.status == "open"
-        ).scalar()
+@router.get("/{project_id}", response_model=ProjectResponse)
+async def get_project(
+    project_id: str,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a specific project
+    """
+    async def build():
+        project = await db.scalar(select(Project).where(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        ))
 
-        project_dict = ProjectResponse.from_orm(project).dict()
-        project_dict["total_tests"] = total_tests or 0
-        project_dict["latest_test"] = latest_test
-        project_dict["critical_issues"] = critical_issues or 0
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
 
-        projects_with_stats.append(ProjectWithStats(**project_dict))
+        return ProjectResponse.from_orm(project), settings.RESPONSE_CACHE_TTL_SECONDS
 
-    return projects_with_stats
+    return await cached_response(
+        request,
+        cache_key(request, current_user.id, f"project:{project_id}"),
+        [f"project:{project_id}"],
+        build
+    )
 
 
-@router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(
+@router.get("/{project_id}/tests", response_model=TestPage)
+async def list_project_tests(
     project_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    test_status: Optional[TestStatus] = Query(None, alias="status"),
+    test_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific project
+    Get a page of tests for a project, newest first
     """
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
 
     if not project:
         raise HTTPException(
@@ -97,23 +200,96 @@ async def get_project(
             detail="Project not found"
         )
 
-    return ProjectResponse.from_orm(project)
+    query = select(Test).where(Test.project_id == project.id)
+    if test_status:
+        query = query.where(Test.status == test_status)
+    if test_type:
+        query = query.where(Test.test_type == test_type)
+
+    rows = (await db.scalars(paginate(query, Test, cursor, limit))).all()
+    tests, next_cursor = page_of(rows, limit)
+
+    return JSONBytesResponse(serialize_page(TestResponse, tests, next_cursor))
+
+
+@router.get("/{project_id}/analytics", response_model=ProjectAnalytics)
+async def get_project_analytics(
+    project_id: str,
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Literal["day", "week", "month"] = "day",
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get test trends for a project: outcomes, pass rate, issues by severity
+    and load time per day, week or month (UTC), from start to end inclusive
+
+    Reads the project's daily rollups, so the cost depends on the length of
+    the range, not on the number of tests. Defaults to the last
+    ANALYTICS_DEFAULT_RANGE_DAYS days.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=settings.ANALYTICS_DEFAULT_RANGE_DAYS - 1)
+
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="start must not be after end"
+        )
+
+    if (end - start).days >= settings.ANALYTICS_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Ranges can span at most {settings.ANALYTICS_MAX_RANGE_DAYS} days"
+        )
+
+    async def build():
+        project = await db.scalar(select(Project.id).where(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        ))
+
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+
+        rows = (await db.execute(analytics_query(project, start, end, interval))).all()
+        analytics = ProjectAnalytics(
+            project_id=project,
+            start=start,
+            end=end,
+            interval=interval,
+            totals=analytics_totals(start, rows),
+            series=analytics_series(rows)
+        )
+        return analytics, settings.RESPONSE_CACHE_TTL_SECONDS
+
+    return await cached_response(
+        request,
+        cache_key(request, current_user.id, f"project:{project_id}:analytics"),
+        [f"project:{project_id}"],
+        build
+    )
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
 async def update_project(
     project_id: str,
     project_data: ProjectUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a project
     """
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
 
     if not project:
         raise HTTPException(
@@ -128,8 +304,11 @@ async def update_project(
             value = str(value)
         setattr(project, field, value)
 
-    db.commit()
-    db.refresh(project)
+    if "test_config" in update_data or "status" in update_data:
+        apply_schedule(project)
+
+    await db.commit()
+    await db.refresh(project)
 
     return ProjectResponse.from_orm(project)
 
@@ -137,16 +316,16 @@ async def update_project(
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a project (soft delete)
     """
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
 
     if not project:
         raise HTTPException(
@@ -156,6 +335,7 @@ async def delete_project(
 
     # Soft delete
     project.status = "deleted"
-    db.commit()
+    project.next_run_at = None
+    await db.commit()
 
     return None
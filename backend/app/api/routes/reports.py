@@ -0,0 +1,197 @@
+"""
+Report routes
+
+    POST /reports                  request a test's report (202 while it renders, 200 once ready)
+    GET  /reports/{id}             report status
+    GET  /reports/{id}/download    the rendered file
+"""
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.principal_cache import Principal
+from app.core.response_cache import etag_matches
+from app.core.security import get_current_user
+from app.db.session import get_async_db
+from app.db.models import Project, Report, Test, TestStatus
+from app.schemas.report import ReportCreate, ReportResponse
+from app.services.reports import REPORT_CONTENT_TYPES, TEMPLATE_VERSION, report_filename, report_path
+from app.workers.reports import enqueue_report
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+REPORTABLE_STATUSES = (TestStatus.COMPLETED, TestStatus.FAILED, TestStatus.CANCELLED)
+
+
+def report_response(report: Report) -> ReportResponse:
+    """Build the API representation of a report"""
+    download_url = f"{settings.API_V1_PREFIX}/reports/{report.id}/download" if report.status == "ready" else None
+    return ReportResponse.model_validate(report).model_copy(update={"download_url": download_url})
+
+
+def needs_render(report: Report, now: datetime) -> bool:
+    """Failed, stale, lost (file gone) or stuck (queued too long ago) reports are rendered again"""
+    if report.status in ("failed", "stale"):
+        return True
+    if report.status == "ready":
+        return not report.file_url or not os.path.exists(report_path(report.file_url))
+    return not report.requested_at or now - report.requested_at > timedelta(seconds=settings.REPORT_RENDER_TIME_LIMIT)
+
+
+async def get_owned_report(report_id: str, user_id, db: AsyncSession) -> Report:
+    report = await db.scalar(select(Report).join(Test).join(Project).where(
+        Report.id == report_id,
+        Project.user_id == user_id
+    ))
+
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not found"
+        )
+
+    return report
+
+
+@router.post("", response_model=ReportResponse)
+async def request_report(
+    report_data: ReportCreate,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Request a test's report in a format
+
+    Reports are rendered once per test, format and template version; later
+    requests return the same report.
+    """
+    test_status = await db.scalar(select(Test.status).join(Project).where(
+        Test.id == report_data.test_id,
+        Project.user_id == current_user.id
+    ))
+
+    if test_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+
+    if test_status not in REPORTABLE_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reports are available once the test has finished"
+        )
+
+    now = datetime.utcnow()
+    key = (
+        Report.test_id == report_data.test_id,
+        Report.report_type == report_data.report_type,
+        Report.template_version == TEMPLATE_VERSION
+    )
+
+    # Concurrent requests for the same report insert it once
+    queued = await db.scalar(
+        insert(Report).values(
+            id=uuid.uuid4(),
+            test_id=report_data.test_id,
+            report_type=report_data.report_type,
+            template_version=TEMPLATE_VERSION,
+            status="pending",
+            requested_at=now
+        )
+        .on_conflict_do_nothing(index_elements=["test_id", "report_type", "template_version"])
+        .returning(Report.id)
+    )
+
+    if queued is None:
+        report = await db.scalar(select(Report).where(*key))
+        if needs_render(report, now):
+            # Only the request that moves requested_at queues the render
+            queued = await db.scalar(
+                update(Report)
+                .where(Report.id == report.id, Report.requested_at == report.requested_at)
+                .values(status="pending", error_message=None, requested_at=now)
+                .returning(Report.id)
+            )
+    await db.commit()
+
+    report = await db.scalar(select(Report).where(*key).execution_options(populate_existing=True))
+    if queued is not None:
+        try:
+            await run_in_threadpool(enqueue_report, str(report.id))
+        except OperationalError:
+            logger.error("Could not queue report %s", report.id)
+            report.status = "failed"
+            report.error_message = "Report queue unavailable"
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Report queue unavailable, try again shortly"
+            )
+
+    response.status_code = status.HTTP_200_OK if report.status == "ready" else status.HTTP_202_ACCEPTED
+    return report_response(report)
+
+
+@router.get("/{report_id}", response_model=ReportResponse)
+async def get_report(
+    report_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get report status
+    """
+    return report_response(await get_owned_report(report_id, current_user.id, db))
+
+
+@router.get("/{report_id}/download")
+async def download_report(
+    report_id: str,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Download a rendered report
+    """
+    report = await get_owned_report(report_id, current_user.id, db)
+
+    if report.status != "ready" or not report.file_url:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report is {report.status}"
+        )
+
+    path = report_path(report.file_url)
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report file is missing; request the report again"
+        )
+
+    # A rendered file never changes; a new rendering gets a new generated_at
+    etag = f'"{report.id.hex}-{report.generated_at.isoformat()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        path,
+        media_type=REPORT_CONTENT_TYPES[report.report_type],
+        filename=report_filename(report),
+        headers=headers
+    )
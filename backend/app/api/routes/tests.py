@@ -1,72 +1,108 @@
 """
 Test API routes
 """
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+import asyncio
+import json
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.core.security import get_current_user
-from app.db.session import get_db
-from app.db.models import User, Project, Test, TestStatus, Issue
-from app.schemas.test import TestCreate, TestResponse, IssueResponse, ManualTestSubmit
+from app.core.config import settings
+from app.core.principal_cache import Principal
+from app.core.security import authenticate_token, get_current_user
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page_of
+from app.core.ranges import parse_byte_range
+from app.core.response_cache import cache_key, cached_response, mark_stale
+from app.core.serialization import JSONBytesResponse, serialize_page, serialize_row
+from app.db.models import MediaUpload, Project, Test, TestBatch, TestStatus, Issue, IssueFingerprint, IssueSeverity, User
+from app.schemas.test import (
+    TestCreate, TestResponse, TestPage, TestBatchCreate, TestBatchResponse, IssueResponse, IssuePage,
+    IssueDiff, IssueFingerprintResponse, ManualTestSubmit
+)
+from app.services.analytics import rollup_test_statement
+from app.services.artifacts import ArtifactRef, get_artifact_store
+from app.services.events import STATUS_EVENT, TERMINAL_STATUSES, test_event_broker
+from app.services.issue_index import new_issues_query, previous_run_query, resolved_issues_query
+from app.services.matrix import matrix_cells
+from app.workers.tasks import enqueue_test_batch, enqueue_test_job, fail_unqueued_tests_statement
 
 router = APIRouter(prefix="/tests", tags=["Tests"])
 
 
-async def run_test_job(test_id: str, project_url: str, test_type: str):
+ACTIVE_TEST_STATUSES = (TestStatus.PENDING, TestStatus.RUNNING)
+
+
+def validate_test_config(test_type: str, config: Optional[dict]):
+    """Reject a config whose browser x module matrix is invalid"""
+    try:
+        matrix_cells(test_type, config)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        )
+
+
+async def check_concurrent_test_quota(db: AsyncSession, user: Principal, new_tests: int = 1, batch: bool = False):
     """
-    Background task to run test (placeholder)
-    This would call the bot-engine to actually run tests
+    Refuse to start tests beyond the plan's concurrent test limit
+
+    Interactive tests count against PLAN_CONCURRENT_TESTS and batch tests
+    against the separate PLAN_BATCH_TESTS; scheduled runs count against
+    neither. The user's row is locked until the caller commits, so
+    concurrent requests from one user are checked and inserted one at a
+    time.
     """
-    # TODO: Integrate with bot-engine
-    # For now, this is a placeholder
-    import time
-    from app.db.session import SessionLocal
+    await db.execute(select(User.id).where(User.id == user.id).with_for_update())
 
-    db = SessionLocal()
-    try:
-        test = db.query(Test).filter(Test.id == test_id).first()
-        if test:
-            test.status = TestStatus.RUNNING
-            test.started_at = datetime.utcnow()
-            db.commit()
-
-            # Simulate test execution
-            time.sleep(5)
-
-            # Update test status
-            test.status = TestStatus.COMPLETED
-            test.completed_at = datetime.utcnow()
-            test.duration_seconds = 5
-            test.results = {
-                "summary": "Test completed successfully",
-                "stats": {
-                    "total_checks": 25,
-                    "passed": 22,
-                    "failed": 3
-                }
-            }
-            db.commit()
-    finally:
-        db.close()
+    active = await db.scalar(
+        select(func.count(Test.id))
+        .join(Project)
+        .where(
+            Project.user_id == user.id,
+            Project.status != literal("deleted", literal_execute=True),
+            Test.status.in_(ACTIVE_TEST_STATUSES),
+            Test.batch_id.isnot(None) if batch else Test.batch_id.is_(None),
+            Test.scheduled_for.is_(None)
+        )
+    )
+    limits = settings.PLAN_BATCH_TESTS if batch else settings.PLAN_CONCURRENT_TESTS
+    limit = limits.get(user.plan, limits.get("free", 1))
+    kind = "batch" if batch else "concurrent"
+
+    if active + new_tests > limit:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"The {user.plan} plan allows {limit} {kind} tests; {active} are already queued or running"
+        )
 
 
 @router.post("", response_model=TestResponse, status_code=status.HTTP_201_CREATED)
 async def create_test(
     test_data: TestCreate,
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create and start a new test
+
+    A config with a "matrix" runs every browser x module cell in parallel
+    and merges them into this test (see app.services.matrix).
     """
+    validate_test_config(test_data.test_type, test_data.config)
+
     # Verify project belongs to user
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == test_data.project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
 
     if not project:
         raise HTTPException(
@@ -74,6 +110,8 @@ async def create_test(
             detail="Project not found"
         )
 
+    await check_concurrent_test_quota(db, current_user)
+
     # Create test
     new_test = Test(
         project_id=project.id,
@@ -82,84 +120,473 @@ async def create_test(
     )
 
     db.add(new_test)
-    db.commit()
-    db.refresh(new_test)
-
-    # Queue test execution in background
-    background_tasks.add_task(
-        run_test_job,
-        str(new_test.id),
-        project.target_url,
-        test_data.test_type
+    await db.commit()
+    await db.refresh(new_test)
+
+    # Queue test execution on the worker pool
+    try:
+        await run_in_threadpool(
+            enqueue_test_job,
+            str(new_test.id),
+            project.target_url,
+            test_data.test_type,
+            test_data.config
+        )
+    except OperationalError:
+        await db.execute(fail_unqueued_tests_statement([new_test.id]))
+        await db.execute(rollup_test_statement(new_test.id))
+        mark_stale(db.sync_session, f"test:{new_test.id}", f"project:{project.id}")
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Test queue unavailable"
+        )
+
+    return JSONBytesResponse(serialize_row(TestResponse, new_test), status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/batches", response_model=TestBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_test_batch(
+    batch_data: TestBatchCreate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start the same test on many projects at once
+
+    Ownership is checked with one query, the tests are inserted with one
+    statement and queued as one group, below interactive tests in priority.
+    """
+    validate_test_config(batch_data.test_type, batch_data.config)
+
+    project_ids = list(dict.fromkeys(batch_data.project_ids))
+    if len(project_ids) > settings.TEST_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can include at most {settings.TEST_BATCH_MAX_SIZE} projects"
+        )
+
+    rows = await db.execute(select(Project.id, Project.target_url).where(
+        Project.id.in_(project_ids),
+        Project.user_id == current_user.id,
+        Project.status != literal("deleted", literal_execute=True)
+    ))
+    target_urls = {row.id: row.target_url for row in rows}
+
+    missing = [str(project_id) for project_id in project_ids if project_id not in target_urls]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Projects not found: {', '.join(missing)}"
+        )
+
+    await check_concurrent_test_quota(db, current_user, new_tests=len(project_ids), batch=True)
+
+    batch = TestBatch(
+        user_id=current_user.id,
+        test_type=batch_data.test_type,
+        config=batch_data.config,
+        total=len(project_ids)
+    )
+    db.add(batch)
+    await db.flush()
+
+    created_at = datetime.utcnow()
+    test_ids = {project_id: uuid.uuid4() for project_id in project_ids}
+    await db.execute(insert(Test), [
+        {
+            "id": test_id,
+            "project_id": project_id,
+            "batch_id": batch.id,
+            "test_type": batch_data.test_type,
+            "status": TestStatus.PENDING,
+            "created_at": created_at
+        }
+        for project_id, test_id in test_ids.items()
+    ])
+
+    # Core inserts skip the ORM hooks that invalidate cached responses
+    mark_stale(db.sync_session, f"projects:{current_user.id}", *(f"project:{project_id}" for project_id in project_ids))
+    await db.commit()
+
+    try:
+        await run_in_threadpool(enqueue_test_batch, [
+            (str(test_id), target_urls[project_id], batch_data.test_type, batch_data.config)
+            for project_id, test_id in test_ids.items()
+        ])
+    except OperationalError:
+        failed = await db.execute(fail_unqueued_tests_statement(list(test_ids.values())))
+        for row in failed.all():
+            await db.execute(rollup_test_statement(row.id))
+            mark_stale(db.sync_session, f"test:{row.id}", f"project:{row.project_id}")
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Test queue unavailable"
+        )
+
+    return batch_progress(batch, {TestStatus.PENDING.value: batch.total})
+
+
+def batch_progress(batch: TestBatch, status_counts: Dict[str, int]) -> TestBatchResponse:
+    """Aggregate progress of a batch from its per-status test counts"""
+    finished = sum(count for test_status, count in status_counts.items() if test_status in TERMINAL_STATUSES)
+    return TestBatchResponse(
+        id=batch.id,
+        test_type=batch.test_type,
+        total=batch.total,
+        status_counts=status_counts,
+        finished=finished,
+        progress=round(finished / batch.total, 4) if batch.total else 1.0,
+        created_at=batch.created_at
+    )
+
+
+@router.get("/batches/{batch_id}", response_model=TestBatchResponse)
+async def get_test_batch(
+    batch_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a test batch with aggregate progress
+    """
+    batch = await db.scalar(select(TestBatch).where(
+        TestBatch.id == batch_id,
+        TestBatch.user_id == current_user.id
+    ))
+
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+
+    rows = await db.execute(
+        select(Test.status, func.count(Test.id))
+        .where(Test.batch_id == batch.id)
+        .group_by(Test.status)
     )
+    return batch_progress(batch, {test_status.value: count for test_status, count in rows})
+
+
+@router.get("/batches/{batch_id}/tests", response_model=TestPage)
+async def list_test_batch_tests(
+    batch_id: str,
+    test_status: Optional[TestStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a page of a batch's tests, newest first
+    """
+    batch = await db.scalar(select(TestBatch.id).where(
+        TestBatch.id == batch_id,
+        TestBatch.user_id == current_user.id
+    ))
+
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+
+    query = select(Test).where(Test.batch_id == batch)
+    if test_status:
+        query = query.where(Test.status == test_status)
 
-    return TestResponse.from_orm(new_test)
+    rows = (await db.scalars(paginate(query, Test, cursor, limit))).all()
+    tests, next_cursor = page_of(rows, limit)
+
+    return JSONBytesResponse(serialize_page(TestResponse, tests, next_cursor))
+
+
+def test_cache_ttl(test: Test) -> Optional[int]:
+    """Cache finished tests; a running test changes with every progress update"""
+    if test.status.value in TERMINAL_STATUSES:
+        return settings.RESPONSE_CACHE_COMPLETED_TTL_SECONDS
+    return None
 
 
 @router.get("/{test_id}", response_model=TestResponse)
 async def get_test(
     test_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get test details
     """
-    test = db.query(Test).join(Project).filter(
+    async def build():
+        test = await db.scalar(select(Test).join(Project).where(
+            Test.id == test_id,
+            Project.user_id == current_user.id
+        ))
+
+        if not test:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test not found"
+            )
+
+        return serialize_row(TestResponse, test), test_cache_ttl(test)
+
+    return await cached_response(
+        request,
+        cache_key(request, current_user.id, f"test:{test_id}"),
+        [f"test:{test_id}"],
+        build
+    )
+
+
+def test_artifact_refs(results: Optional[dict]) -> Dict[str, ArtifactRef]:
+    """Artifacts referenced by a test's result summary, by digest"""
+    results = results or {}
+    refs = (
+        [results.get("artifact")]
+        + list((results.get("modules") or {}).values())
+        + [cell.get("artifact") for cell in results.get("cells") or []]
+    )
+    return {
+        ref["digest"]: ArtifactRef.from_dict(ref)
+        for ref in refs
+        if isinstance(ref, dict) and "digest" in ref
+    }
+
+
+async def artifact_response(ref: ArtifactRef, range_header: Optional[str]) -> StreamingResponse:
+    """Stream an artifact, honouring a single byte range"""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{ref.digest}"',
+        "Cache-Control": "private, max-age=31536000, immutable"
+    }
+
+    try:
+        byte_range = parse_byte_range(range_header, ref.size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{ref.size}"}
+        )
+
+    store = get_artifact_store()
+    if not await run_in_threadpool(store.exists, ref):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Artifact not found"
+        )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(ref.size)
+        return StreamingResponse(store.iter_range(ref), media_type=ref.content_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{ref.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        store.iter_range(ref, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=ref.content_type,
+        headers=headers
+    )
+
+
+async def get_owned_test_results(test_id: str, user_id, db: AsyncSession) -> dict:
+    """Load only the result summary of a test owned by the user"""
+    row = await db.execute(select(Test.results).join(Project).where(
         Test.id == test_id,
-        Project.user_id == current_user.id
-    ).first()
+        Project.user_id == user_id
+    ))
+    row = row.first()
 
-    if not test:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Test not found"
         )
 
-    return TestResponse.from_orm(test)
+    return row.results or {}
 
 
-@router.get("/{test_id}/issues", response_model=List[IssueResponse])
-async def get_test_issues(
+@router.get("/{test_id}/results/full")
+async def get_full_test_results(
     test_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all issues for a test
+    Get the full bot-engine result document of a test (supports Range)
     """
-    # Verify test belongs to user
-    test = db.query(Test).join(Project).filter(
-        Test.id == test_id,
-        Project.user_id == current_user.id
-    ).first()
+    results = await get_owned_test_results(test_id, current_user.id, db)
 
-    if not test:
+    if not results.get("artifact"):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test not found"
+            detail="Full results not available"
         )
 
-    issues = db.query(Issue).filter(Issue.test_id == test_id).all()
+    return await artifact_response(ArtifactRef.from_dict(results["artifact"]), request.headers.get("range"))
+
+
+@router.get("/{test_id}/artifacts/{digest}")
+async def get_test_artifact(
+    test_id: str,
+    digest: str,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get an artifact referenced by a test's results (supports Range)
+    """
+    results = await get_owned_test_results(test_id, current_user.id, db)
+    ref = test_artifact_refs(results).get(digest)
+
+    if ref is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Artifact not found"
+        )
 
-    return [IssueResponse.from_orm(issue) for issue in issues]
+    return await artifact_response(ref, request.headers.get("range"))
+
+
+@router.get("/{test_id}/issues", response_model=IssuePage)
+async def get_test_issues(
+    test_id: str,
+    request: Request,
+    severity: Optional[IssueSeverity] = None,
+    category: Optional[str] = None,
+    issue_status: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a page of issues for a test, newest first
+    """
+    async def build():
+        # Verify test belongs to user
+        test = await db.scalar(select(Test).join(Project).where(
+            Test.id == test_id,
+            Project.user_id == current_user.id
+        ))
+
+        if not test:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test not found"
+            )
+
+        query = select(Issue).where(Issue.test_id == test.id)
+        if severity:
+            query = query.where(Issue.severity == severity)
+        if category:
+            query = query.where(Issue.category == category)
+        if issue_status:
+            query = query.where(Issue.status == issue_status)
+
+        rows = (await db.scalars(paginate(query, Issue, cursor, limit))).all()
+        issues, next_cursor = page_of(rows, limit)
+
+        return serialize_page(IssueResponse, issues, next_cursor), test_cache_ttl(test)
+
+    return await cached_response(
+        request,
+        cache_key(request, current_user.id, f"test:{test_id}:issues"),
+        [f"test:{test_id}"],
+        build
+    )
+
+
+@router.get("/{test_id}/issues/diff", response_model=IssueDiff)
+async def get_test_issue_diff(
+    test_id: str,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the issues a completed test found for the first time, and those the
+    previous completed test of its type found that it no longer finds
+
+    Read from the project's issue index rather than by comparing the runs'
+    issue lists; each list holds up to limit issues, most severe first.
+    """
+    async def build():
+        test = await db.scalar(select(Test).join(Project).where(
+            Test.id == test_id,
+            Project.user_id == current_user.id
+        ))
+
+        if not test:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test not found"
+            )
+
+        if test.status != TestStatus.COMPLETED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Issue diffs are available once the test has completed"
+            )
+
+        # Later runs resolve and reopen issues
+        tags.append(f"project:{test.project_id}")
+
+        async def listed(query):
+            count = await db.scalar(select(func.count()).select_from(query.subquery()))
+            rows = (await db.scalars(
+                query.order_by(IssueFingerprint.severity, IssueFingerprint.title, IssueFingerprint.fingerprint).limit(limit)
+            )).all()
+            return count, rows
+
+        previous_id = await db.scalar(previous_run_query(test))
+        new_count, new = await listed(new_issues_query(test))
+        resolved_count, resolved = (0, []) if previous_id is None else await listed(resolved_issues_query(test, previous_id))
+
+        diff = IssueDiff(
+            test_id=test.id,
+            previous_test_id=previous_id,
+            new_count=new_count,
+            resolved_count=resolved_count,
+            new=[IssueFingerprintResponse.model_validate(row) for row in new],
+            resolved=[IssueFingerprintResponse.model_validate(row) for row in resolved]
+        )
+        return diff, test_cache_ttl(test)
+
+    tags = [f"test:{test_id}"]
+    return await cached_response(
+        request,
+        cache_key(request, current_user.id, f"test:{test_id}:issues:diff"),
+        tags,
+        build
+    )
 
 
 @router.post("/{test_id}/manual", status_code=status.HTTP_201_CREATED)
 async def submit_manual_test(
     test_id: str,
     manual_data: ManualTestSubmit,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit manual test results
     """
     # Verify test belongs to user
-    test = db.query(Test).join(Project).filter(
+    test = await db.scalar(select(Test).join(Project).where(
         Test.id == test_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
 
     if not test:
         raise HTTPException(
@@ -170,16 +597,157 @@ async def submit_manual_test(
     # Store manual test results
     from app.db.models import ManualTestResult
 
+    # Only a reference is kept on the row; the data itself can be large
+    test_data = None
+    if manual_data.test_data is not None:
+        artifact = await run_in_threadpool(get_artifact_store().put_json, manual_data.test_data)
+        test_data = {"artifact": artifact.to_dict()}
+
+    # Attach completed uploads by their content URLs
+    screenshots = list(manual_data.screenshots or [])
+    videos = list(manual_data.videos or [])
+    if manual_data.upload_ids:
+        uploads = (await db.scalars(select(MediaUpload).where(
+            MediaUpload.id.in_(manual_data.upload_ids),
+            MediaUpload.user_id == current_user.id,
+            MediaUpload.sha256.isnot(None)
+        ))).all()
+
+        if len(uploads) != len(set(manual_data.upload_ids)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown or incomplete upload"
+            )
+
+        for upload in uploads:
+            url = f"{settings.API_V1_PREFIX}/uploads/{upload.id}/content"
+            (videos if upload.kind == "video" else screenshots).append(url)
+
     manual_result = ManualTestResult(
         test_id=test.id,
         user_id=current_user.id,
-        test_data=manual_data.test_data,
-        screenshots=manual_data.screenshots,
-        videos=manual_data.videos,
+        test_data=test_data,
+        screenshots=screenshots or None,
+        videos=videos or None,
         test_duration_seconds=manual_data.test_duration_seconds
     )
 
     db.add(manual_result)
-    db.commit()
+    await db.commit()
 
     return {"message": "Manual test results submitted successfully"}
+
+
+async def read_test_status(test_id) -> Optional[str]:
+    """A test's current status, read on a short-lived session"""
+    async with AsyncSessionLocal() as db:
+        test_status = await db.scalar(select(Test.status).where(Test.id == test_id))
+    return test_status.value if test_status is not None else None
+
+
+async def test_event_stream(test: Test):
+    """
+    Events for a test: a status snapshot first, then live events until the
+    test reaches a terminal status. The snapshot is read after subscribing,
+    so a test finishing in between is not missed, and the status is read
+    again whenever the stream has been idle, when None is yielded as a
+    keep-alive.
+    """
+    async with test_event_broker.subscribe(test.id) as queue:
+        current = await read_test_status(test.id) or test.status.value
+        yield {"event": STATUS_EVENT, "data": {"status": current}}
+        if current in TERMINAL_STATUSES:
+            return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.TEST_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                current = await read_test_status(test.id)
+                if current in TERMINAL_STATUSES:
+                    yield {"event": STATUS_EVENT, "data": {"status": current}}
+                    return
+                yield None
+                continue
+
+            yield event
+            if event["event"] == STATUS_EVENT and event["data"].get("status") in TERMINAL_STATUSES:
+                return
+
+
+async def get_owned_test_for_stream(test_id: str, user_id, db: AsyncSession) -> Optional[Test]:
+    """
+    Load a test owned by the user, then release the DB connection so a
+    long-lived stream does not hold it
+    """
+    test = await db.scalar(select(Test).join(Project).where(
+        Test.id == test_id,
+        Project.user_id == user_id
+    ))
+    await db.close()
+    return test
+
+
+@router.get("/{test_id}/events")
+async def stream_test_events(
+    test_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream live test progress as Server-Sent Events
+    """
+    test = await get_owned_test_for_stream(test_id, current_user.id, db)
+
+    if not test:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+
+    async def sse():
+        async for event in test_event_stream(test):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{test_id}/ws")
+async def test_events_websocket(
+    websocket: WebSocket,
+    test_id: str,
+    token: str = Query(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream live test progress over a WebSocket
+    Browsers can't set headers on WebSockets, so the access token is a query parameter
+    """
+    try:
+        principal = await authenticate_token(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    test = await get_owned_test_for_stream(test_id, principal.id, db)
+
+    if not test:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        async for event in test_event_stream(test):
+            if event is None:
+                event = {"event": "keep-alive", "data": {}}
+            await websocket.send_text(json.dumps(event, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,358 @@
+"""
+Media upload routes (chunked, resumable)
+
+    POST   /uploads             declare filename, content type, size and optional SHA-256
+    PATCH  /uploads/{id}        append the request body at the Upload-Offset header
+    HEAD   /uploads/{id}        current Upload-Offset, to resume after an interruption
+    GET    /uploads/{id}        upload status
+    DELETE /uploads/{id}        abort an unfinished upload
+    GET    /uploads/{id}/content, /uploads/{id}/thumbnail
+"""
+import logging
+import os
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.core.principal_cache import Principal
+from app.core.ranges import parse_byte_range
+from app.core.security import get_current_user
+from app.db.session import get_async_db
+from app.db.models import MediaUpload
+from app.schemas.upload import UploadCreate, UploadResponse
+from app.services.media import (
+    ChecksumMismatch,
+    UploadBusy,
+    close_partial,
+    discard_partial,
+    iter_file,
+    max_upload_size,
+    media_kind,
+    media_path,
+    open_partial,
+    store_completed,
+    thumbnail_path,
+)
+from app.workers.media import enqueue_media_processing
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+def upload_response(upload: MediaUpload) -> UploadResponse:
+    """Build the API representation of an upload"""
+    base = f"{settings.API_V1_PREFIX}/uploads/{upload.id}"
+    return UploadResponse.model_validate(upload).model_copy(update={
+        "content_url": f"{base}/content" if upload.sha256 else None,
+        "thumbnail_url": f"{base}/thumbnail" if upload.has_thumbnail else None
+    })
+
+
+def offset_headers(upload: MediaUpload) -> dict:
+    return {"Upload-Offset": str(upload.received), "Upload-Length": str(upload.size)}
+
+
+async def get_owned_upload(upload_id: str, user_id, db: AsyncSession) -> MediaUpload:
+    upload = await db.scalar(select(MediaUpload).where(
+        MediaUpload.id == upload_id,
+        MediaUpload.user_id == user_id
+    ))
+
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+
+    return upload
+
+
+@router.post("", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_data: UploadCreate,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start an upload; send the bytes with PATCH
+
+    When a checksum is given and the user has already uploaded the same
+    content, the upload completes immediately without any bytes being sent.
+    """
+    kind = media_kind(upload_data.content_type)
+
+    if kind is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only image and video uploads are supported"
+        )
+
+    if upload_data.size > max_upload_size(kind):
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{kind.capitalize()} uploads are limited to {max_upload_size(kind)} bytes"
+        )
+
+    upload = MediaUpload(
+        user_id=current_user.id,
+        kind=kind,
+        filename=upload_data.filename,
+        content_type=upload_data.content_type,
+        size=upload_data.size,
+        received=0,
+        checksum=upload_data.checksum.lower() if upload_data.checksum else None,
+        status="uploading"
+    )
+
+    if upload.checksum:
+        existing = await db.scalar(select(MediaUpload).where(
+            MediaUpload.user_id == current_user.id,
+            MediaUpload.sha256 == upload.checksum,
+            MediaUpload.size == upload.size,
+            MediaUpload.status == "ready"
+        ).limit(1))
+
+        if existing:
+            upload.received = upload.size
+            upload.sha256 = existing.sha256
+            upload.has_thumbnail = existing.has_thumbnail
+            upload.status = "ready"
+            upload.completed_at = datetime.utcnow()
+
+    db.add(upload)
+    await db.commit()
+
+    response.headers.update(offset_headers(upload))
+    return upload_response(upload)
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the offset to resume an upload from
+    """
+    upload = await get_owned_upload(upload_id, current_user.id, db)
+    return Response(headers={**offset_headers(upload), "Cache-Control": "no-store"})
+
+
+@router.get("/{upload_id}", response_model=UploadResponse)
+async def get_upload(
+    upload_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get upload status
+    """
+    upload = await get_owned_upload(upload_id, current_user.id, db)
+    return upload_response(upload)
+
+
+@router.patch("/{upload_id}", response_model=UploadResponse)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Append the request body to an upload at Upload-Offset
+
+    The body is streamed to disk. If the connection drops, the bytes that
+    arrived are kept; HEAD the upload and resume from its Upload-Offset.
+    """
+    upload = await get_owned_upload(upload_id, current_user.id, db)
+
+    if upload.status != "uploading":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status}"
+        )
+
+    if upload_offset != upload.received:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload-Offset does not match the stored offset",
+            headers=offset_headers(upload)
+        )
+
+    # Don't hold a pooled connection while the body streams in
+    await db.commit()
+
+    try:
+        file = await run_in_threadpool(open_partial, upload.id, upload.received)
+    except UploadBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is already being written by another request"
+        )
+
+    written = 0
+    too_large = False
+    try:
+        async for chunk in request.stream():
+            if upload.received + written + len(chunk) > upload.size:
+                too_large = True
+                break
+            await run_in_threadpool(file.write, chunk)
+            written += len(chunk)
+    except ClientDisconnect:
+        logger.info("Upload %s interrupted after %d bytes", upload.id, written)
+    finally:
+        await run_in_threadpool(close_partial, file)
+
+    upload.received += written
+    await db.commit()
+
+    if too_large:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Body extends past the declared upload size",
+            headers=offset_headers(upload)
+        )
+
+    if upload.received == upload.size:
+        await complete_upload(upload, db)
+
+    response.headers.update(offset_headers(upload))
+    return upload_response(upload)
+
+
+async def complete_upload(upload: MediaUpload, db: AsyncSession):
+    """Verify and store a fully received upload, then queue its thumbnail"""
+    try:
+        upload.sha256 = await run_in_threadpool(store_completed, upload.id, upload.checksum)
+    except ChecksumMismatch as exc:
+        upload.status = "failed"
+        upload.error_message = str(exc)
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        )
+
+    upload.completed_at = datetime.utcnow()
+    upload.status = "processing"
+    if os.path.exists(thumbnail_path(upload.sha256)):
+        # Same content was processed before
+        upload.status = "ready"
+        upload.has_thumbnail = True
+    await db.commit()
+
+    if upload.status == "processing":
+        try:
+            await run_in_threadpool(enqueue_media_processing, str(upload.id))
+        except OperationalError:
+            logger.warning("Could not queue thumbnail for upload %s", upload.id)
+            upload.status = "ready"
+            await db.commit()
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Abort an unfinished upload and discard its bytes
+    """
+    upload = await get_owned_upload(upload_id, current_user.id, db)
+
+    if upload.status != "uploading":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only unfinished uploads can be aborted"
+        )
+
+    await run_in_threadpool(discard_partial, upload.id)
+    await db.delete(upload)
+    await db.commit()
+
+
+@router.get("/{upload_id}/content")
+async def get_upload_content(
+    upload_id: str,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the uploaded file (supports Range, for video seeking)
+    """
+    upload = await get_owned_upload(upload_id, current_user.id, db)
+
+    if not upload.sha256:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload is not complete"
+        )
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{upload.sha256}"',
+        "Cache-Control": "private, max-age=31536000, immutable"
+    }
+
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), upload.size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{upload.size}"}
+        )
+
+    path = media_path(upload.sha256)
+    if byte_range is None:
+        headers["Content-Length"] = str(upload.size)
+        return StreamingResponse(iter_file(path), media_type=upload.content_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{upload.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file(path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=upload.content_type,
+        headers=headers
+    )
+
+
+@router.get("/{upload_id}/thumbnail")
+async def get_upload_thumbnail(
+    upload_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the thumbnail (screenshots) or poster frame (videos) of an upload
+    """
+    upload = await get_owned_upload(upload_id, current_user.id, db)
+
+    if not upload.has_thumbnail:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not available"
+        )
+
+    return FileResponse(
+        thumbnail_path(upload.sha256),
+        media_type="image/jpeg",
+        headers={"Cache-Control": "private, max-age=31536000, immutable"}
+    )
@@ -0,0 +1,102 @@
+"""
+Webhook routes
+
+Deliveries are made by the webhook dispatcher (app.workers.webhooks), never
+by these routes.
+"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db.session import get_async_db
+from app.db.models import Project, Webhook
+from app.schemas.webhook import WebhookCreate, WebhookResponse
+from app.services.webhooks import check_webhook_url
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+
+@router.get("", response_model=List[WebhookResponse])
+async def list_webhooks(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List the user's webhooks
+    """
+    webhooks = await db.scalars(
+        select(Webhook).where(Webhook.user_id == current_user.id).order_by(Webhook.created_at)
+    )
+    return webhooks.all()
+
+
+@router.post("", response_model=WebhookResponse, status_code=status.HTTP_201_CREATED)
+async def create_webhook(
+    webhook_data: WebhookCreate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Subscribe a URL to events of one or all of the user's projects
+
+    The URL's host must resolve to public addresses only.
+    """
+    try:
+        await check_webhook_url(str(webhook_data.url))
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        )
+
+    if webhook_data.project_id is not None:
+        project_id = await db.scalar(select(Project.id).where(
+            Project.id == webhook_data.project_id,
+            Project.user_id == current_user.id
+        ))
+        if project_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+
+    webhook = Webhook(
+        user_id=current_user.id,
+        project_id=webhook_data.project_id,
+        url=str(webhook_data.url),
+        events=list(dict.fromkeys(webhook_data.events)),
+        is_active=True,
+        consecutive_failures=0
+    )
+    db.add(webhook)
+    await db.commit()
+    await db.refresh(webhook)
+
+    return webhook
+
+
+@router.delete("/{webhook_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_webhook(
+    webhook_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete a webhook and its pending deliveries
+    """
+    webhook = await db.scalar(select(Webhook).where(
+        Webhook.id == webhook_id,
+        Webhook.user_id == current_user.id
+    ))
+
+    if not webhook:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook not found"
+        )
+
+    await db.delete(webhook)
+    await db.commit()
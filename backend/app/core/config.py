@@ -1,7 +1,7 @@
 """
 Application configuration settings
 """
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 
@@ -20,9 +20,27 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 0
+    ASYNC_DATABASE_URL: Optional[str] = None  # Defaults to DATABASE_URL on asyncpg
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # seconds
+
+    # Principal cache (authenticated user lookups)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_REDIS_ENABLED: bool = False
+
+    # Serialize responses with orjson straight from rows, skipping validation
+    FAST_JSON_RESPONSES: bool = False
+
+    # Response cache (project and test read endpoints)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 300  # Redis tier
+    RESPONSE_CACHE_COMPLETED_TTL_SECONDS: int = 3600  # Finished tests no longer change
+    RESPONSE_CACHE_LOCAL_TTL_SECONDS: int = 5  # In-process tier; bounds staleness across replicas
+    RESPONSE_CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_REDIS_ENABLED: bool = True
 
     # JWT
     JWT_SECRET_KEY: str
@@ -41,7 +59,20 @@ class Settings(BaseSettings):
 
     # File Upload
     UPLOAD_DIR: str = "./uploads"
-    MAX_UPLOAD_SIZE: int = 10485760  # 10MB
+    MAX_UPLOAD_SIZE: int = 10485760  # 10MB, per image
+    MAX_VIDEO_UPLOAD_SIZE: int = 524288000  # 500MB
+    MEDIA_THUMBNAIL_SIZE: int = 320  # Longest edge of thumbnails and poster frames, px
+    MEDIA_POSTER_OFFSET_SECONDS: float = 1.0  # Where in a video the poster frame is taken
+    FFMPEG_COMMAND: str = "ffmpeg"
+
+    # Artifact store (large result documents)
+    ARTIFACT_STORE: str = "local"  # local (UPLOAD_DIR/artifacts), s3
+    ARTIFACT_ZSTD_LEVEL: int = 3
+    ARTIFACT_S3_BUCKET: str = "checkmate-artifacts"
+    ARTIFACT_S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://minio:9000
+    ARTIFACT_S3_REGION: Optional[str] = None
+    ARTIFACT_S3_ACCESS_KEY_ID: Optional[str] = None
+    ARTIFACT_S3_SECRET_ACCESS_KEY: Optional[str] = None
 
     # Email (optional)
     SMTP_HOST: str = "smtp.gmail.com"
@@ -54,12 +85,113 @@ class Settings(BaseSettings):
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/2"
+    CELERY_WORKER_CONCURRENCY: int = 4
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # Use with CELERY_BROKER_URL=memory://
+
+    # Test jobs
+    TEST_JOB_MAX_RETRIES: int = 3
+    TEST_JOB_RETRY_BACKOFF_MAX: int = 300  # seconds
+    TEST_JOB_TIME_LIMIT: int = 900  # seconds
+
+    # Result ingestion
+    INTERNAL_API_TOKEN: str = ""  # Shared secret for /internal routes; empty disables them
+    INGEST_BATCH_SIZE: int = 1000  # Issues per INSERT; 15 bound columns per row, so at most 2184 (32767 params)
+
+    # Live test events
+    TEST_EVENTS_QUEUE_SIZE: int = 100  # Buffered events per subscriber
+    TEST_EVENTS_KEEPALIVE_SECONDS: int = 15
+
+    # Bot engine worker pool
+    BOT_ENGINE_DIR: str = "../bot-engine"
+    BOT_ENGINE_COMMAND: str = "node dist/worker.js"
+    BOT_ENGINE_POOL_SIZE: int = 4
+    BOT_ENGINE_MAX_JOBS_PER_WORKER: int = 50
+    BOT_ENGINE_MAX_RSS_MB: int = 1536
+    BOT_ENGINE_STARTUP_TIMEOUT: int = 30  # seconds
+    BOT_ENGINE_JOB_TIMEOUT: int = 600  # seconds
+    TEST_MATRIX_MAX_CELLS: int = 12  # Browser x module cells a test's config.matrix may ask for
+
+    # Incremental re-testing (config "incremental": true reuses results of unchanged pages)
+    INCREMENTAL_TESTS_DEFAULT: bool = False
+    INCREMENTAL_MAX_AGE_HOURS: int = 168  # Results older than this are re-checked even if unchanged
+    FINGERPRINT_TIMEOUT_SECONDS: float = 10.0
+    FINGERPRINT_MAX_ASSETS: int = 20  # Scripts and stylesheets fingerprinted per page
+
+    # Reports (rendered by the media worker, on the "reports" queue)
+    REPORT_FETCH_SIZE: int = 500  # Issue rows fetched per round trip while rendering
+    REPORT_RENDER_TIME_LIMIT: int = 600  # seconds; a pending report older than this is re-queued
+
+    # Webhooks (test_completed, issue_found), delivered by app.workers.webhooks
+    WEBHOOKS_ENABLED: bool = True
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_ALLOW_PRIVATE_ADDRESSES: bool = False  # Development only: allow loopback/private/link-local hosts
+    WEBHOOK_MAX_CONNECTIONS: int = 200  # Shared keep-alive pool of the dispatcher
+    WEBHOOK_PER_HOST_CONCURRENCY: int = 8
+    WEBHOOK_MAX_IN_FLIGHT: int = 400  # Batches being sent or waiting for a host slot
+    WEBHOOK_MAX_BATCH_EVENTS: int = 100  # Events per request
+    WEBHOOK_COALESCE_SECONDS: float = 2.0  # issue_found events wait this long to be batched
+    WEBHOOK_CLAIM_BATCH_SIZE: int = 1000
+    WEBHOOK_LEASE_SECONDS: int = 300  # Claimed deliveries are retried after this if never recorded
+    WEBHOOK_POLL_SECONDS: float = 1.0
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    WEBHOOK_RETRY_BACKOFF_SECONDS: float = 10.0  # Doubles with each failed attempt
+    WEBHOOK_RETRY_BACKOFF_MAX: int = 3600
+    WEBHOOK_CIRCUIT_FAILURES: int = 5  # Consecutive failed requests that pause a webhook
+    WEBHOOK_CIRCUIT_COOLDOWN_SECONDS: int = 60
+    WEBHOOK_CIRCUIT_MAX_COOLDOWN_SECONDS: int = 3600
+    WEBHOOK_RETENTION_DAYS: int = 7
+    WEBHOOK_PRUNE_INTERVAL_SECONDS: int = 3600
+
+    # Project analytics (daily rollups)
+    ANALYTICS_DEFAULT_RANGE_DAYS: int = 90
+    ANALYTICS_MAX_RANGE_DAYS: int = 731
+
+    # Performance regression detection (scanned by celery beat on the "regressions" queue)
+    REGRESSIONS_ENABLED: bool = True
+    REGRESSION_SCAN_SECONDS: int = 300
+    REGRESSION_BATCH_SIZE: int = 5000  # Runs claimed per scan transaction
+    REGRESSION_BASELINE_RUNS: int = 20
+    REGRESSION_MIN_BASELINE_RUNS: int = 8  # Fewer measured baseline runs are not tested
+    REGRESSION_RECENT_RUNS: int = 3
+    REGRESSION_Z_THRESHOLD: float = 4.0  # Robust standard deviations above the baseline
+    REGRESSION_MIN_INCREASE: float = 0.2  # And at least this fraction of the baseline
 
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 60  # Anonymous requests, per client address
+    PLAN_RATE_LIMITS: Dict[str, int] = {"free": 60, "pro": 300, "team": 600, "enterprise": 1200}  # per minute
+    RATE_LIMIT_REDIS_ENABLED: bool = True
+    RATE_LIMIT_REDIS_RETRY_SECONDS: int = 30  # In-process buckets this long after a Redis error
+
+    # Concurrent pending/running tests per user, by plan
+    PLAN_CONCURRENT_TESTS: Dict[str, int] = {"free": 1, "pro": 3, "team": 10, "enterprise": 25}
+
+    # Bulk test scheduling (POST /tests/batches)
+    TEST_BATCH_MAX_SIZE: int = 1000  # Projects per batch
+    PLAN_BATCH_TESTS: Dict[str, int] = {"free": 10, "pro": 100, "team": 500, "enterprise": 2000}  # Pending/running
+    TEST_BATCH_PRIORITY: int = 6  # Celery priority, 0 (highest) to 9; interactive tests run at 0
+
+    # Recurring test schedules (run `celery beat` to drive the scheduler)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TICK_SECONDS: int = 30
+    SCHEDULER_BATCH_SIZE: int = 500  # Due projects claimed per transaction
+    SCHEDULER_MAX_JITTER_SECONDS: int = 300  # Per-project offset spreading runs scheduled for the same time
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = 600  # Later than this, a run counts as missed (see catch_up)
+    SCHEDULER_MAX_CATCH_UP_RUNS: int = 3  # Missed runs replayed by catch_up "all"
+    SCHEDULER_MIN_INTERVAL_SECONDS: int = 900  # Shortest allowed time between runs of a schedule
+
+    # Metrics and profiling
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""  # Bearer token required by GET /metrics; empty leaves it open
+    SLOW_REQUEST_STATEMENTS: int = 25  # Log requests issuing more SQL statements than this
+    PROFILING_ENABLED: bool = False  # Let superusers profile a request with an X-Profile header
+    PROFILING_INTERVAL_SECONDS: float = 0.001
 
     # Security
     BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "process"  # process, thread
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # In-flight hashes before returning 503
 
     class Config:
         env_file = ".env"
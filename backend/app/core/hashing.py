@@ -0,0 +1,74 @@
+"""
+Password hashing off the event loop
+
+bcrypt is deliberately slow (~250ms at 12 rounds), so hashing inline in an
+async handler stalls every other request on the worker. Hashing runs on a
+dedicated executor instead, a process pool by default, so a burst of logins
+uses all cores without holding the GIL of the API process.
+
+The number of in-flight hashing jobs is capped; once the cap is reached
+requests fail fast with 503 instead of queueing without bound.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password
+
+_executor: Optional[Executor] = None
+_pending = 0
+
+
+def get_hashing_executor() -> Executor:
+    """Get the hashing executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+        else:
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _executor
+
+
+def shutdown_hashing_executor():
+    """Stop the hashing executor's workers"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run(func, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hashing_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the hashing executor"""
+    return await _run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hashing executor
+    Returns (valid, new_hash); new_hash is set when the stored hash needs upgrading
+    """
+    return await _run(verify_and_update_password, plain_password, hashed_password)
@@ -0,0 +1,189 @@
+"""
+Request metrics and instrumentation
+
+MetricsMiddleware times every HTTP request per route template, and the
+SQLAlchemy hooks below count statements and database time against the
+request that issued them (tracked in a context variable, which SQLAlchemy
+carries into its async greenlets). Everything is aggregated in-process
+into Prometheus-style histograms and rendered by render_metrics() for
+GET /metrics.
+
+Each response also gets a Server-Timing header (total, db time and
+statement count), so a browser's network panel shows where time went.
+Requests issuing more than SLOW_REQUEST_STATEMENTS statements are logged
+as likely N+1 queries.
+
+All state is updated from the event loop thread; recording a request is
+a few dictionary operations.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestStats:
+    """Database work done on behalf of one request"""
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, per label set"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, labels))
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+        return lines
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"), LATENCY_BUCKETS
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Database time per HTTP request", ("method", "route"), LATENCY_BUCKETS
+)
+request_statements = Histogram(
+    "http_request_db_statements", "SQL statements per HTTP request", ("method", "route"), STATEMENT_BUCKETS
+)
+
+# name -> (help, callback returning {labels: value}); read at scrape time
+_gauges: Dict[str, Tuple[str, Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]]] = {}
+
+
+def register_gauge(name: str, documentation: str, collect: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]):
+    """Expose values computed at scrape time (cache stats, pool sizes, ...)"""
+    _gauges[name] = (documentation, collect)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for histogram in (request_latency, request_db_time, request_statements):
+        lines.extend(histogram.render())
+    for name, (documentation, collect) in sorted(_gauges.items()):
+        lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge"])
+        for labels, value in collect().items():
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if current_request_stats.get() is not None:
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    started = conn.info.get("statement_started")
+    if stats is None or not started:
+        return
+    stats.statements += 1
+    stats.db_seconds += time.perf_counter() - started.pop()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and database work per route"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[Callable, str] = {}
+
+    def route_template(self, scope) -> str:
+        """The matched route's path template, e.g. /api/v1/tests/{test_id}"""
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._route_paths:
+            router = scope["app"].router
+            for candidate in router.routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    self._route_paths[endpoint] = candidate.path
+                    break
+            else:
+                self._route_paths[endpoint] = "unmatched"
+        return self._route_paths[endpoint]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = (
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}, "
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} statements"'
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            method, route = scope["method"], self.route_template(scope)
+
+            request_latency.observe((method, route, str(status_code)), elapsed)
+            request_db_time.observe((method, route), stats.db_seconds)
+            request_statements.observe((method, route), stats.statements)
+
+            if stats.statements > settings.SLOW_REQUEST_STATEMENTS:
+                logger.warning(
+                    "%s %s issued %d SQL statements (%.1f ms); possible N+1",
+                    method, route, stats.statements, stats.db_seconds * 1000
+                )
@@ -0,0 +1,228 @@
+"""
+Cache of authenticated principals
+
+get_current_user resolves the user behind every request. Instead of a
+database round trip per request, the fields routes need are cached per
+user id: an in-process LRU with TTL, backed by an optional Redis tier
+shared between API replicas.
+
+Entries are invalidated when a user's active flag, plan or superuser flag
+changes (see invalidate_principal and the session hooks below); the TTL
+bounds staleness in other replicas' in-process tiers.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis, get_sync_redis
+from app.db.models import User
+
+logger = logging.getLogger(__name__)
+
+# Changes to these User fields invalidate the cached principal
+PRINCIPAL_FIELDS = ("is_active", "plan", "is_superuser")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as seen by routes"""
+    id: uuid.UUID
+    is_active: bool
+    plan: str
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            is_active=bool(user.is_active),
+            plan=user.plan or "free",
+            is_superuser=bool(user.is_superuser),
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["id"] = str(self.id)
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw) -> "Principal":
+        data = json.loads(raw)
+        data["id"] = uuid.UUID(data["id"])
+        return cls(**data)
+
+
+def _redis_key(user_id) -> str:
+    return f"principal:{user_id}"
+
+
+class PrincipalCache:
+    """Two-tier principal cache: in-process LRU with TTL, then Redis"""
+
+    def __init__(
+        self,
+        ttl: int = settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        max_size: int = settings.PRINCIPAL_CACHE_MAX_SIZE,
+        use_redis: bool = settings.PRINCIPAL_CACHE_REDIS_ENABLED,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _get_local(self, key: str) -> Optional[Principal]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def _set_local(self, key: str, principal: Principal):
+        self._entries[key] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def peek(self, user_id) -> Optional[Principal]:
+        """Look up a principal in the in-process tier only, without counting it"""
+        return self._get_local(str(user_id))
+
+    async def get(self, user_id) -> Optional[Principal]:
+        """Look up a principal, returning None on a miss"""
+        key = str(user_id)
+        principal = self._get_local(key)
+        if principal is not None:
+            self.local_hits += 1
+            return principal
+
+        if self.use_redis:
+            try:
+                raw = await get_redis().get(_redis_key(key))
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Principal cache Redis lookup failed: %s", exc)
+                raw = None
+            if raw is not None:
+                principal = Principal.from_json(raw)
+                self._set_local(key, principal)
+                self.redis_hits += 1
+                return principal
+
+        self.misses += 1
+        return None
+
+    async def set(self, principal: Principal):
+        """Store a principal in both tiers"""
+        key = str(principal.id)
+        self._set_local(key, principal)
+        if self.use_redis:
+            try:
+                await get_redis().set(_redis_key(key), principal.to_json(), ex=self.ttl)
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Principal cache Redis store failed: %s", exc)
+
+    def invalidate_local(self, user_id):
+        """Drop a principal from the in-process tier only"""
+        self._entries.pop(str(user_id), None)
+
+    async def invalidate(self, user_id):
+        """Drop a principal from both tiers"""
+        self.invalidate_local(user_id)
+        if self.use_redis:
+            try:
+                await get_redis().delete(_redis_key(user_id))
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Principal cache Redis invalidation failed: %s", exc)
+
+    def invalidate_sync(self, user_id):
+        """Drop a principal from both tiers, from synchronous code"""
+        self.invalidate_local(user_id)
+        if self.use_redis:
+            try:
+                get_sync_redis().delete(_redis_key(user_id))
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Principal cache Redis invalidation failed: %s", exc)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and hit rate since process start"""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_errors": self.redis_errors,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
+
+# Redis invalidations scheduled from commit hooks; the loop only holds weak references
+_pending_invalidations: Set[asyncio.Task] = set()
+
+
+async def invalidate_principal(user_id):
+    """Invalidation hook: call after deactivating a user or changing their plan"""
+    await principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_principal_changes(session, flush_context, instances):
+    """Remember users whose cached fields are about to change"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or any(
+            state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS
+        ):
+            session.info.setdefault("principal_invalidations", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    """Invalidate cached principals once their changes are committed"""
+    user_ids = session.info.pop("principal_invalidations", None)
+    if not user_ids:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    for user_id in user_ids:
+        if loop is not None:
+            principal_cache.invalidate_local(user_id)
+            task = loop.create_task(principal_cache.invalidate(user_id))
+            _pending_invalidations.add(task)
+            task.add_done_callback(_pending_invalidations.discard)
+        else:
+            principal_cache.invalidate_sync(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session):
+    session.info.pop("principal_invalidations", None)
@@ -0,0 +1,83 @@
+"""
+On-demand request profiling
+
+With PROFILING_ENABLED, a superuser can send any request with an
+"X-Profile: html" (or "text") header to have it run under pyinstrument's
+sampling profiler; the response body is replaced with the profile. Other
+requests pay only a header scan, and the profiler is imported on first use.
+"""
+import logging
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.security import authenticate_token
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMATS = ("html", "text")
+
+
+async def is_superuser_token(token: str) -> bool:
+    """Whether an access token belongs to an active superuser"""
+    async with AsyncSessionLocal() as db:
+        try:
+            principal = await authenticate_token(token, db)
+        except HTTPException:
+            return False
+    return principal.is_superuser
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            return await self.app(scope, receive, send)
+
+        profile_format = token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                profile_format = value.decode("latin-1").strip().lower() or "html"
+            elif name == b"authorization" and value[:7].lower() == b"bearer ":
+                token = value[7:].decode("latin-1")
+
+        if profile_format not in PROFILE_FORMATS or not token or not await is_superuser_token(token):
+            return await self.app(scope, receive, send)
+
+        from pyinstrument import Profiler
+
+        status_code = None
+
+        async def discard_response(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            profiler.stop()
+
+        logger.info("Profiled %s %s (status %s)", scope["method"], scope["path"], status_code)
+        if profile_format == "html":
+            body, content_type = profiler.output_html().encode(), b"text/html; charset=utf-8"
+        else:
+            body, content_type = profiler.output_text(unicode=True).encode(), b"text/plain; charset=utf-8"
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(status_code).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,30 @@
+"""
+HTTP byte range parsing
+"""
+from typing import Optional, Tuple
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into inclusive (start, end)
+    Returns None to serve the whole body (no header, or several ranges);
+    raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise ValueError(f"Range not satisfiable for {size} bytes")
+    return start, min(end, size - 1)
@@ -0,0 +1,217 @@
+"""
+Request rate limiting
+
+A token bucket per caller: authenticated requests are keyed by user id and
+limited by their plan (PLAN_RATE_LIMITS, requests per minute), anonymous
+requests by client address at RATE_LIMIT_PER_MINUTE. Buckets hold up to
+one minute's allowance, so short bursts pass and sustained load is capped.
+
+Buckets live in Redis, updated by one Lua script call per request so
+replicas share them. If Redis fails, the limiter falls back to in-process
+buckets for RATE_LIMIT_REDIS_RETRY_SECONDS instead of failing requests or
+waiting on timeouts.
+"""
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Paths that are never limited
+EXEMPT_PATHS = ("/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+EXEMPT_PREFIXES = (f"{settings.API_V1_PREFIX}/internal/",)
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of taking one token from a bucket"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+class MemoryBuckets:
+    """In-process token buckets, bounded in number (least recently used dropped)"""
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, capacity: int, rate: float) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        tokens, ts = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+
+        allowed = tokens >= 1
+        retry_after = 0.0
+        if allowed:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_size:
+            self._buckets.popitem(last=False)
+        return allowed, tokens, retry_after
+
+
+class RateLimiter:
+    """Token-bucket limiter in Redis with an in-process fallback"""
+
+    def __init__(self, use_redis: bool = settings.RATE_LIMIT_REDIS_ENABLED):
+        self.use_redis = use_redis
+        self.memory = MemoryBuckets()
+        self._script = None
+        self._redis_down_until = 0.0
+        self.redis_errors = 0
+
+    async def _take_redis(self, key: str, capacity: int, rate: float) -> Tuple[bool, float, float]:
+        if self._script is None:
+            self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+        allowed, tokens, retry_after = await self._script(keys=[f"ratelimit:{key}"], args=[capacity, rate])
+        return bool(allowed), float(tokens), float(retry_after)
+
+    async def hit(self, key: str, per_minute: int) -> RateLimitResult:
+        """Take one token from key's bucket"""
+        capacity, rate = per_minute, per_minute / 60.0
+
+        if self.use_redis and time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, tokens, retry_after = await self._take_redis(key, capacity, rate)
+                return RateLimitResult(allowed, per_minute, int(tokens), retry_after)
+            except Exception as exc:
+                self.redis_errors += 1
+                self._redis_down_until = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+                logger.warning("Rate limiter falling back to in-process buckets: %s", exc)
+
+        allowed, tokens, retry_after = self.memory.take(key, capacity, rate)
+        return RateLimitResult(allowed, per_minute, int(tokens), retry_after)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
+
+
+def plan_rate_limit(plan: Optional[str]) -> int:
+    return settings.PLAN_RATE_LIMITS.get(plan or "free", settings.RATE_LIMIT_PER_MINUTE)
+
+
+# Verified access tokens: token -> (user id, expiry), so repeat requests skip the JWT decode
+_token_users: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+TOKEN_CACHE_SIZE = 10_000
+
+
+def token_user(token: bytes) -> Optional[str]:
+    """User id of a valid access token, or None"""
+    cached = _token_users.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at > time.time():
+            return user_id
+        del _token_users[token]
+        return None
+
+    try:
+        payload = jwt.decode(token.decode(), settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except (JWTError, UnicodeDecodeError):
+        return None
+    user_id = payload.get("sub")
+    if not user_id or payload.get("type") != "access":
+        return None
+
+    _token_users[token] = (user_id, float(payload.get("exp", 0)))
+    if len(_token_users) > TOKEN_CACHE_SIZE:
+        _token_users.popitem(last=False)
+    return user_id
+
+
+def identify(scope) -> Tuple[str, int]:
+    """Bucket key and per-minute limit for a request"""
+    for name, value in scope["headers"]:
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            user_id = token_user(value[7:])
+            if user_id:
+                # Local tier only; an uncached user gets the free allowance once
+                principal = principal_cache.peek(user_id)
+                return f"user:{user_id}", plan_rate_limit(principal.plan if principal else None)
+            break
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}", settings.RATE_LIMIT_PER_MINUTE
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying rate_limiter to every HTTP request"""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        if path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES) or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        key, limit = identify(scope)
+        result = await self.limiter.hit(key, limit)
+        headers = [
+            (b"x-ratelimit-limit", str(result.limit).encode()),
+            (b"x-ratelimit-remaining", str(max(result.remaining, 0)).encode()),
+        ]
+
+        if not result.allowed:
+            retry_after = str(max(int(result.retry_after + 0.999), 1)).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", retry_after),
+                    (b"content-type", b"application/json"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Rate limit exceeded"}'})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,44 @@
+"""
+Shared Redis clients
+"""
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_async_client: Optional[aioredis.Redis] = None
+_sync_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Get the process-wide async Redis client (connection pooled)"""
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _async_client
+
+
+def get_sync_redis() -> redis.Redis:
+    """Get the process-wide sync Redis client, for workers and sync code paths"""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _sync_client
+
+
+async def close_redis():
+    """Close the async Redis client"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -0,0 +1,433 @@
+"""
+Response cache for read-heavy endpoints
+
+Routes hand cached_response a key (scoped to the user), the resource tags
+the response depends on and a builder. Responses are stored as serialized
+JSON bytes with an ETag, so a hit skips the database, Pydantic validation
+and encoding, and a matching If-None-Match gets a bodyless 304.
+
+Tiers: an in-process LRU bounded by bytes with a short TTL, then Redis
+shared between API replicas. Writes invalidate by tag:
+
+    projects:<user id>   the user's project list
+    project:<project id> the project and every list containing it
+    test:<test id>       the test and its issue pages
+
+ORM changes to projects, tests and issues are tagged automatically by the
+session hooks below and invalidated after commit; bulk statements (result
+ingestion) call mark_stale. The local TTL bounds staleness in other
+replicas' in-process tiers.
+
+Invalidating a tag also records when it happened (by the Redis clock, and
+the process clock for the local tier). A response built on a miss is only
+stored if none of its tags was invalidated since the lookup, so a slow
+build can't put back a payload that a concurrent write has made stale.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis, get_sync_redis
+from app.db.models import Issue, Project, Test
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Invalidation times are kept this long: longer than any response takes to build
+INVALIDATION_HORIZON_SECONDS = 60
+INVALIDATIONS_KEPT = 10000
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A serialized response body, its ETag and the tags it depends on"""
+    etag: str
+    body: bytes
+    tags: Tuple[str, ...] = ()
+
+    def encode(self) -> bytes:
+        return self.etag.encode() + b"\n" + " ".join(self.tags).encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedResponse":
+        etag, tags, body = raw.split(b"\n", 2)
+        return cls(etag=etag.decode(), body=body, tags=tuple(tags.decode().split()))
+
+
+def serialize(payload: Any) -> bytes:
+    """Serialize a model or list of models to JSON bytes without re-validating"""
+    if isinstance(payload, bytes):
+        # Already serialized (see app.core.serialization)
+        return payload
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json().encode()
+    if isinstance(payload, list):
+        return b"[" + b",".join(serialize(item) for item in payload) + b"]"
+    raise TypeError(f"Cannot cache response of type {type(payload).__name__}")
+
+
+def make_entry(body: bytes, tags: Iterable[str] = ()) -> CachedResponse:
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    return CachedResponse(etag=etag, body=body, tags=tuple(tags))
+
+
+def _redis_key(key: str) -> str:
+    return f"respcache:{key}"
+
+
+def _redis_tag(tag: str) -> str:
+    return f"respcache-tag:{tag}"
+
+
+def _redis_invalidated(tag: str) -> str:
+    return f"respcache-invalidated:{tag}"
+
+
+# KEYS: the response key, then each tag's key set, then each tag's invalidation time
+# ARGV: encoded response, ttl, lookup time (Redis clock, microseconds), number of tags
+STORE_SCRIPT = """
+local tags = tonumber(ARGV[4])
+for i = 1, tags do
+    local invalidated = redis.call('GET', KEYS[1 + tags + i])
+    if invalidated and tonumber(invalidated) >= tonumber(ARGV[3]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, tags do
+    redis.call('SADD', KEYS[1 + i], KEYS[1])
+    -- Tag sets outlive every key they list
+    if redis.call('TTL', KEYS[1 + i]) < tonumber(ARGV[2]) then
+        redis.call('EXPIRE', KEYS[1 + i], ARGV[2])
+    end
+end
+return 1
+"""
+
+# KEYS: each tag's key set, then each tag's invalidation time
+# ARGV: number of tags, how long invalidation times are kept
+INVALIDATE_SCRIPT = """
+local tags = tonumber(ARGV[1])
+local now = redis.call('TIME')
+now = string.format('%d', tonumber(now[1]) * 1000000 + tonumber(now[2]))
+for i = 1, tags do
+    local keys = redis.call('SMEMBERS', KEYS[i])
+    for j = 1, #keys do
+        redis.call('DEL', keys[j])
+    end
+    redis.call('DEL', KEYS[i])
+    redis.call('SET', KEYS[tags + i], now, 'EX', ARGV[2])
+end
+return tags
+"""
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """When a lookup missed, by each tier's clock; a fill stores only if no tag was invalidated since"""
+    local: float
+    redis: Optional[int] = None
+
+
+class ResponseCache:
+    """Two-tier response cache: in-process LRU, then Redis; invalidated by tag"""
+
+    def __init__(
+        self,
+        ttl: int = settings.RESPONSE_CACHE_TTL_SECONDS,
+        local_ttl: int = settings.RESPONSE_CACHE_LOCAL_TTL_SECONDS,
+        local_max_bytes: int = settings.RESPONSE_CACHE_LOCAL_MAX_BYTES,
+        use_redis: bool = settings.RESPONSE_CACHE_REDIS_ENABLED,
+    ):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_max_bytes = local_max_bytes
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._invalidated: Dict[str, float] = {}
+        self._bytes = 0
+        self._pending: Set[asyncio.Task] = set()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _get_local(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, cached = entry
+        if expires_at < time.monotonic():
+            self._drop_local(key)
+            return None
+        self._entries.move_to_end(key)
+        return cached
+
+    def _set_local(self, key: str, cached: CachedResponse, ttl: int):
+        if len(cached.body) > self.local_max_bytes // 10:
+            return
+        self._drop_local(key)
+        self._entries[key] = (time.monotonic() + min(ttl, self.local_ttl), cached)
+        self._bytes += len(cached.body)
+        for tag in cached.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self._bytes > self.local_max_bytes:
+            self._drop_local(next(iter(self._entries)))
+
+    def _drop_local(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, cached = entry
+        self._bytes -= len(cached.body)
+        for tag in cached.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> Tuple[Optional[CachedResponse], Lookup]:
+        """Look up a response; on a miss, the Lookup is passed to set with the rebuilt response"""
+        started = time.monotonic()
+        cached = self._get_local(key)
+        if cached is not None:
+            self.local_hits += 1
+            return cached, Lookup(started)
+
+        redis_time = None
+        if self.use_redis:
+            # Let this process's own invalidations land before reading Redis
+            if self._pending:
+                await asyncio.gather(*self._pending, return_exceptions=True)
+            try:
+                redis = get_redis()
+                raw, ttl, (seconds, micros) = await (
+                    redis.pipeline(transaction=False).get(_redis_key(key)).ttl(_redis_key(key)).time().execute()
+                )
+                redis_time = seconds * 1_000_000 + micros
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Response cache Redis lookup failed: %s", exc)
+                raw = None
+            if raw is not None:
+                cached = CachedResponse.decode(raw)
+                if not self._stale_since(cached.tags, started):
+                    self._set_local(key, cached, max(ttl, 0))
+                self.redis_hits += 1
+                return cached, Lookup(started, redis_time)
+
+        self.misses += 1
+        return None, Lookup(started, redis_time)
+
+    def _stale_since(self, tags: Iterable[str], since: float) -> bool:
+        return any(self._invalidated.get(tag, float("-inf")) >= since for tag in tags)
+
+    async def set(self, key: str, cached: CachedResponse, lookup: Lookup, ttl: Optional[int] = None) -> bool:
+        """
+        Store a response built after a missed lookup in both tiers under its
+        tags, unless one of them was invalidated since; returns whether it was stored
+        """
+        ttl = ttl or self.ttl
+        if self._stale_since(cached.tags, lookup.local):
+            return False
+        self._set_local(key, cached, ttl)
+        if self.use_redis:
+            if lookup.redis is None:
+                # The lookup couldn't read the Redis clock; don't guess
+                return True
+            tags = list(cached.tags)
+            try:
+                stored = await get_redis().register_script(STORE_SCRIPT)(
+                    keys=[_redis_key(key), *map(_redis_tag, tags), *map(_redis_invalidated, tags)],
+                    args=[cached.encode(), ttl, lookup.redis, len(tags)],
+                )
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Response cache Redis store failed: %s", exc)
+                return True
+            if not stored:
+                # Invalidated in another process while this one was building
+                self._drop_local(key)
+                return False
+        return True
+
+    def invalidate_local(self, tags: Iterable[str]):
+        """Drop tagged responses from the in-process tier only"""
+        now = time.monotonic()
+        for tag in tags:
+            self._invalidated[tag] = now
+            for key in list(self._tags.get(tag, ())):
+                self._drop_local(key)
+        if len(self._invalidated) > INVALIDATIONS_KEPT:
+            # Only fills still building can be affected by old invalidations
+            horizon = now - INVALIDATION_HORIZON_SECONDS
+            self._invalidated = {tag: at for tag, at in self._invalidated.items() if at >= horizon}
+
+    def _invalidate_script_args(self, tags: List[str]):
+        return {
+            "keys": [*map(_redis_tag, tags), *map(_redis_invalidated, tags)],
+            "args": [len(tags), max(self.ttl, INVALIDATION_HORIZON_SECONDS)],
+        }
+
+    async def invalidate(self, tags: Iterable[str]):
+        """Drop tagged responses from both tiers"""
+        tags = list(tags)
+        self.invalidate_local(tags)
+        if self.use_redis and tags:
+            try:
+                await get_redis().register_script(INVALIDATE_SCRIPT)(**self._invalidate_script_args(tags))
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Response cache Redis invalidation failed: %s", exc)
+
+    def invalidate_sync(self, tags: Iterable[str]):
+        """Drop tagged responses from both tiers, from synchronous code"""
+        tags = list(tags)
+        self.invalidate_local(tags)
+        if self.use_redis and tags:
+            try:
+                get_sync_redis().register_script(INVALIDATE_SCRIPT)(**self._invalidate_script_args(tags))
+            except Exception as exc:
+                self.redis_errors += 1
+                logger.warning("Response cache Redis invalidation failed: %s", exc)
+
+    def invalidate_soon(self, tags: Iterable[str]):
+        """Invalidate from a running event loop without awaiting Redis"""
+        tags = list(tags)
+        self.invalidate_local(tags)
+        task = asyncio.get_running_loop().create_task(self.invalidate(tags))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and hit rate since process start"""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_errors": self.redis_errors,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global response cache instance
+response_cache = ResponseCache()
+
+
+ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+
+def if_none_match(request: Request) -> List[str]:
+    """The entity tags of the request's If-None-Match, weak prefixes dropped ("*" kept)"""
+    return [
+        tag[2:] if tag.startswith("W/") else tag
+        for tag in ENTITY_TAG.findall(request.headers.get("if-none-match", ""))
+    ]
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match matches a current ETag (weak comparison, as for GET)"""
+    tags = if_none_match(request)
+    return "*" in tags or etag in tags
+
+
+def not_modified(request: Request, cached: CachedResponse) -> bool:
+    return etag_matches(request, cached.etag)
+
+
+def cache_key(request: Request, user_id, resource: str) -> str:
+    """Key for a user's view of a resource, including normalized query parameters"""
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    return f"{user_id}:{resource}?{query}"
+
+
+async def cached_response(
+    request: Request,
+    key: str,
+    tags: List[str],
+    build: Callable[[], Awaitable[Tuple[Any, Optional[int]]]],
+) -> Response:
+    """
+    Serve a response from the cache, building and storing it on a miss
+
+    build returns (payload, ttl): a Pydantic model, a list of models or
+    pre-serialized JSON bytes, and how long it may be cached (None to not
+    cache it, e.g. a running test).
+    """
+    cached, lookup = await response_cache.get(key) if settings.RESPONSE_CACHE_ENABLED else (None, None)
+    cache_status = "HIT"
+
+    if cached is None:
+        payload, ttl = await build()
+        cached = make_entry(serialize(payload), tags)
+        if lookup is not None and ttl and await response_cache.set(key, cached, lookup, ttl):
+            cache_status = "MISS"
+        else:
+            cache_status = "BYPASS"
+
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache", "X-Cache": cache_status}
+    if not_modified(request, cached):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def mark_stale(session, *tags: str):
+    """Invalidate tagged responses once the (sync or async) session commits"""
+    session.info.setdefault("response_cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_stale_responses(session, flush_context, instances):
+    """Tag cached responses that pending ORM changes make stale"""
+    tags = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        # New rows have no id until they are inserted, and nothing cached yet
+        if isinstance(obj, Project):
+            tags.update((f"project:{obj.id}", f"projects:{obj.user_id}"))
+        elif isinstance(obj, Test):
+            tags.add(f"test:{obj.id}")
+            if obj in session.new or obj in session.deleted:
+                # Project lists show test counts
+                tags.add(f"project:{obj.project_id}")
+        elif isinstance(obj, Issue):
+            tags.add(f"test:{obj.test_id}")
+    tags = {tag for tag in tags if not tag.endswith(":None")}
+    if tags:
+        mark_stale(session, *tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_responses(session):
+    """Invalidate tagged responses once their changes are committed"""
+    tags = session.info.pop("response_cache_tags", None)
+    if not tags:
+        return
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        response_cache.invalidate_sync(tags)
+    else:
+        response_cache.invalidate_soon(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_responses(session):
+    session.info.pop("response_cache_tags", None)
@@ -0,0 +1,62 @@
+"""
+Response serialization straight to JSON bytes
+
+Returning a model from a route makes FastAPI dump it to a dict, validate
+that dict against response_model again and then JSON-encode it. Routes
+that return rows use these helpers instead and hand the bytes to
+JSONBytesResponse (or cached_response).
+
+Default mode validates each row once with Pydantic and dumps it from
+pydantic-core. With FAST_JSON_RESPONSES the schema's fields are read
+straight off the ORM rows and encoded with orjson, skipping validation;
+only use it for schemas whose fields map 1:1 onto trusted columns.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Type
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+class JSONBytesResponse(Response):
+    """A response whose body is already serialized JSON"""
+    media_type = "application/json"
+
+
+def default_response_class() -> Type[JSONResponse]:
+    """The app-wide response class: orjson-backed in fast mode"""
+    return ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+
+
+@lru_cache(maxsize=None)
+def _field_reader(schema: Type[BaseModel]) -> Callable[[Any], Dict[str, Any]]:
+    """Read a schema's fields off an object, falling back to field defaults"""
+    fields = [(name, None if field.is_required() else field.default) for name, field in schema.model_fields.items()]
+
+    def read(obj: Any) -> Dict[str, Any]:
+        return {name: getattr(obj, name, default) for name, default in fields}
+
+    return read
+
+
+def serialize_row(schema: Type[BaseModel], obj: Any) -> bytes:
+    """Serialize one ORM row as schema"""
+    if settings.FAST_JSON_RESPONSES:
+        return orjson.dumps(_field_reader(schema)(obj))
+    return schema.model_validate(obj).model_dump_json().encode()
+
+
+def serialize_rows(schema: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+    """Serialize ORM rows as a JSON array of schema"""
+    if settings.FAST_JSON_RESPONSES:
+        read = _field_reader(schema)
+        return orjson.dumps([read(row) for row in rows])
+    return b"[" + b",".join(schema.model_validate(row).model_dump_json().encode() for row in rows) + b"]"
+
+
+def serialize_page(schema: Type[BaseModel], rows: Iterable[Any], next_cursor: Optional[str]) -> bytes:
+    """Serialize a page of rows in the {"items", "next_cursor"} page shape"""
+    return b'{"items":' + serialize_rows(schema, rows) + b',"next_cursor":' + orjson.dumps(next_cursor) + b"}"
@@ -3,7 +3,7 @@ Database models
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import Boolean, Column, String, DateTime, ForeignKey, Text, Integer, JSON, Enum as SQLEnum
+from sqlalchemy import BigInteger, Boolean, Column, Date, Float, String, DateTime, ForeignKey, Text, Integer, JSON, Index, Enum as SQLEnum, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
@@ -53,6 +53,20 @@ class User(Base):
 class Project(Base):
     """Project model"""
     __tablename__ = "projects"
+    __table_args__ = (
+        # Project listing and stats only ever look at non-deleted projects
+        Index(
+            "ix_projects_user_id_active",
+            "user_id",
+            postgresql_where=text("status != 'deleted'"),
+        ),
+        # The scheduler reads due projects in time order
+        Index(
+            "ix_projects_next_run_at",
+            "next_run_at",
+            postgresql_where=text("next_run_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -64,7 +78,8 @@ class Project(Base):
     status = Column(String(50), default="active")  # active, archived, deleted
 
     # Test configuration
-    test_config = Column(JSONB, nullable=True)  # Store test preferences
+    test_config = Column(JSONB, nullable=True)  # Store test preferences; "schedule" holds a recurring run
+    next_run_at = Column(DateTime, nullable=True)  # Next scheduled run, jitter included (app.services.scheduler)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -77,9 +92,19 @@ class Project(Base):
 class Test(Base):
     """Test execution model"""
     __tablename__ = "tests"
+    __table_args__ = (
+        # Keyset pagination of a project's tests, optionally filtered
+        Index("ix_tests_project_id_created_at_id", "project_id", "created_at", "id"),
+        Index("ix_tests_project_id_status_created_at_id", "project_id", "status", "created_at", "id"),
+        Index("ix_tests_project_id_test_type_created_at_id", "project_id", "test_type", "created_at", "id"),
+        Index("ix_tests_batch_id_created_at_id", "batch_id", "created_at", "id"),
+        # One test per scheduled firing, whichever scheduler claims it
+        Index("ix_tests_project_id_scheduled_for", "project_id", "scheduled_for", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    batch_id = Column(UUID(as_uuid=True), ForeignKey("test_batches.id", ondelete="SET NULL"), nullable=True)
 
     test_type = Column(String(100), nullable=False)  # full, auth, performance, security, ui
     status = Column(SQLEnum(TestStatus), default=TestStatus.PENDING)
@@ -88,9 +113,11 @@ class Test(Base):
     results = Column(JSONB, nullable=True)
 
     # Execution info
+    scheduled_for = Column(DateTime, nullable=True)  # Nominal firing time of a scheduled run
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     duration_seconds = Column(Integer, nullable=True)
+    rolled_up_at = Column(DateTime, nullable=True)  # When the finished test was added to project_daily_stats
 
     # Screenshots and media
     screenshots = Column(JSONB, nullable=True)  # List of screenshot URLs
@@ -104,13 +131,38 @@ class Test(Base):
 
     # Relationships
     project = relationship("Project", back_populates="tests")
+    batch = relationship("TestBatch", back_populates="tests")
     issues = relationship("Issue", back_populates="test", cascade="all, delete-orphan")
     manual_results = relationship("ManualTestResult", back_populates="test", cascade="all, delete-orphan")
 
 
+class TestBatch(Base):
+    """A group of tests started together across many projects"""
+    __tablename__ = "test_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    test_type = Column(String(100), nullable=False)
+    config = Column(JSONB, nullable=True)
+    total = Column(Integer, nullable=False)  # Tests created in the batch
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    tests = relationship("Test", back_populates="batch")
+
+
 class Issue(Base):
     """Issue/Bug model discovered during testing"""
     __tablename__ = "issues"
+    __table_args__ = (
+        # Keyset pagination of a test's issues, optionally filtered
+        Index("ix_issues_test_id_created_at_id", "test_id", "created_at", "id"),
+        Index("ix_issues_test_id_severity_created_at_id", "test_id", "severity", "created_at", "id"),
+        Index("ix_issues_test_id_category_created_at_id", "test_id", "category", "created_at", "id"),
+        Index("ix_issues_test_id_status_created_at_id", "test_id", "status", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
@@ -132,8 +184,11 @@ class Issue(Base):
     # Status
     status = Column(String(50), default="open")  # open, acknowledged, fixed, wont_fix
 
-    # Additional metadata
-    metadata = Column(JSONB, nullable=True)
+    # Identity across runs (app.services.issue_index)
+    fingerprint = Column(String(32), nullable=True)
+
+    # Additional metadata ("metadata" is reserved by the declarative API)
+    extra_metadata = Column("metadata", JSONB, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -143,13 +198,135 @@ class Issue(Base):
     comments = relationship("Comment", back_populates="issue", cascade="all, delete-orphan")
 
 
+class IngestChunk(Base):
+    """Ledger of result chunks applied to a test, so retried chunks are skipped"""
+    __tablename__ = "ingest_chunks"
+
+    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+
+    records = Column(Integer, nullable=False, default=0)
+
+    received_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PageFingerprint(Base):
+    """What a project's page or asset looked like at its last incremental run"""
+    __tablename__ = "page_fingerprints"
+
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    url = Column(String(2000), primary_key=True)
+
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=False)  # SHA-256 of the body
+
+    # The test whose results these fingerprints correspond to
+    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
+    checked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProjectDailyStats(Base):
+    """Per project per (UTC) day rollup of finished tests, for analytics"""
+    __tablename__ = "project_daily_stats"
+
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    tests_completed = Column(Integer, nullable=False, default=0)
+    tests_failed = Column(Integer, nullable=False, default=0)
+
+    checks_total = Column(Integer, nullable=False, default=0)
+    checks_passed = Column(Integer, nullable=False, default=0)
+    checks_failed = Column(Integer, nullable=False, default=0)
+    checks_warnings = Column(Integer, nullable=False, default=0)
+
+    issues_critical = Column(Integer, nullable=False, default=0)
+    issues_high = Column(Integer, nullable=False, default=0)
+    issues_medium = Column(Integer, nullable=False, default=0)
+    issues_low = Column(Integer, nullable=False, default=0)
+    issues_info = Column(Integer, nullable=False, default=0)
+
+    duration_seconds_sum = Column(BigInteger, nullable=False, default=0)
+    # Page load time of the performance module, over the tests that measured it
+    load_time_ms_sum = Column(BigInteger, nullable=False, default=0)
+    load_time_ms_count = Column(Integer, nullable=False, default=0)
+    load_time_ms_max = Column(Integer, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IssueFingerprint(Base):
+    """One row per distinct issue of a project, across all its runs"""
+    __tablename__ = "issue_fingerprints"
+    __table_args__ = (
+        # New and resolved issues of a run
+        Index("ix_issue_fingerprints_project_id_first_seen_test_id", "project_id", "first_seen_test_id"),
+        Index("ix_issue_fingerprints_project_id_last_seen_test_id", "project_id", "last_seen_test_id"),
+        # Open critical issue counts on the project list
+        Index(
+            "ix_issue_fingerprints_project_id_open_critical",
+            "project_id",
+            postgresql_where=text("severity = 'CRITICAL' AND status = 'open' AND resolved_at IS NULL"),
+        ),
+    )
+
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    fingerprint = Column(String(32), primary_key=True)
+
+    # As last seen
+    severity = Column(SQLEnum(IssueSeverity), nullable=False)
+    category = Column(String(100), nullable=False)
+    title = Column(String(500), nullable=False)
+    url = Column(String(500), nullable=True)
+    element_selector = Column(String(500), nullable=True)
+    status = Column(String(50), nullable=False, default="open")  # Of the issue row last seen (see Issue.status)
+    test_type = Column(String(100), nullable=False)  # Of the run that last saw it; its runs resolve it
+
+    first_seen_test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="SET NULL"), nullable=True)
+    first_seen_at = Column(DateTime, nullable=False)
+    last_seen_test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="SET NULL"), nullable=True)
+    last_seen_at = Column(DateTime, nullable=False)
+    occurrences = Column(Integer, nullable=False, default=1)  # Runs that found it
+
+    resolved_at = Column(DateTime, nullable=True)  # A later run of test_type no longer found it
+
+
+class TestMetrics(Base):
+    """Numeric performance-module measurements of a completed test, for regression detection"""
+    __tablename__ = "test_metrics"
+    __table_args__ = (
+        # A series' latest runs, newest first
+        Index("ix_test_metrics_project_id_browser_recorded_at", "project_id", "browser", "recorded_at"),
+        # Runs not yet looked at by the regression scan
+        Index("ix_test_metrics_pending", "recorded_at", postgresql_where=text("evaluated_at IS NULL")),
+    )
+
+    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    browser = Column(String(50), nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+
+    load_time = Column(Float, nullable=True)  # ms
+    dom_content_loaded = Column(Float, nullable=True)  # ms
+    first_paint = Column(Float, nullable=True)  # ms
+    resource_count = Column(Float, nullable=True)
+    total_size = Column(Float, nullable=True)  # bytes
+    lcp = Column(Float, nullable=True)  # ms
+    fid = Column(Float, nullable=True)  # ms
+    cls = Column(Float, nullable=True)
+
+    evaluated_at = Column(DateTime, nullable=True)
+    regressions = Column(JSONB, nullable=True)  # Metrics regressed as of this run, set on the run scanned
+
+
 class Comment(Base):
     """Comment on an issue"""
     __tablename__ = "comments"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    issue_id = Column(UUID(as_uuid=True), ForeignKey("issues.id", ondelete="CASCADE"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    issue_id = Column(UUID(as_uuid=True), ForeignKey("issues.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     content = Column(Text, nullable=False)
 
@@ -165,8 +342,8 @@ class ManualTestResult(Base):
     __tablename__ = "manual_test_results"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Manual test data
     test_data = Column(JSONB, nullable=False)  # Form responses, ratings, etc.
@@ -184,20 +361,54 @@ class ManualTestResult(Base):
     test = relationship("Test", back_populates="manual_results")
 
 
+class MediaUpload(Base):
+    """Chunked, resumable upload of a screenshot or video"""
+    __tablename__ = "media_uploads"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    kind = Column(String(20), nullable=False)  # image, video
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+
+    size = Column(BigInteger, nullable=False)  # Declared total size in bytes
+    received = Column(BigInteger, nullable=False, default=0)  # Bytes stored so far; the resume offset
+    checksum = Column(String(64), nullable=True)  # SHA-256 declared by the client
+    sha256 = Column(String(64), nullable=True, index=True)  # SHA-256 of the stored file
+
+    status = Column(String(20), nullable=False, default="uploading")  # uploading, processing, ready, failed
+    has_thumbnail = Column(Boolean, default=False)
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
 class Report(Base):
     """Generated report model"""
     __tablename__ = "reports"
+    __table_args__ = (
+        # One rendering per test, format and template version, reused by every request
+        Index("ix_reports_test_id_report_type_template_version", "test_id", "report_type", "template_version", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
+    test_id = Column(UUID(as_uuid=True), ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
 
     report_type = Column(String(50), nullable=False)  # pdf, json, html
-    file_url = Column(String(500), nullable=True)
+    template_version = Column(Integer, nullable=False, default=1)
+    status = Column(String(20), nullable=False, default="pending")  # pending, ready, failed, stale
+    file_url = Column(String(500), nullable=True)  # Path under UPLOAD_DIR
+    size = Column(BigInteger, nullable=True)
+    error_message = Column(Text, nullable=True)
 
-    # Report metadata
-    metadata = Column(JSONB, nullable=True)
+    # Report metadata ("metadata" is reserved by the declarative API)
+    extra_metadata = Column("metadata", JSONB, nullable=True)
 
-    generated_at = Column(DateTime, default=datetime.utcnow)
+    requested_at = Column(DateTime, default=datetime.utcnow)  # Last (re)render request
+    generated_at = Column(DateTime, nullable=True)
 
 
 class Webhook(Base):
@@ -205,12 +416,48 @@ class Webhook(Base):
     __tablename__ = "webhooks"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=True, index=True)
 
     url = Column(String(500), nullable=False)
     events = Column(JSONB, nullable=False)  # List of events to trigger: test_completed, issue_found, etc.
 
     is_active = Column(Boolean, default=True)
 
+    # Circuit breaker: deliveries pause until circuit_open_until after repeated failures
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    circuit_open_until = Column(DateTime, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class WebhookEvent(Base):
+    """An event awaiting delivery to its subscribed webhooks (the outbox)"""
+    __tablename__ = "webhook_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event = Column(String(50), nullable=False)  # test_completed, issue_found
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class WebhookDelivery(Base):
+    """Delivery of one event to one webhook"""
+    __tablename__ = "webhook_deliveries"
+    __table_args__ = (
+        # The dispatcher's claim query: due pending deliveries, oldest first
+        Index("ix_webhook_deliveries_next_attempt_at", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_id = Column(UUID(as_uuid=True), ForeignKey("webhook_events.id", ondelete="CASCADE"), nullable=False, index=True)
+    webhook_id = Column(UUID(as_uuid=True), ForeignKey("webhooks.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    status = Column(String(20), nullable=False, default="pending")  # pending, delivered, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    delivered_at = Column(DateTime, nullable=True)
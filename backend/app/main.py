@@ -1,12 +1,24 @@
 """
 Main FastAPI application
 """
-from fastapi import FastAPI
+import hmac
+
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.core.config import settings
-from app.api.routes import auth, projects, tests
+from app.core.hashing import shutdown_hashing_executor
+from app.core.metrics import MetricsMiddleware, register_gauge, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.response_cache import response_cache
+from app.core.serialization import default_response_class
+from app.core.redis import close_redis
+from app.db.session import async_engine
+from app.services.events import test_event_broker
+from app.api.routes import auth, projects, tests, uploads, reports, webhooks, internal
 
 # Create FastAPI app
 app = FastAPI(
@@ -14,9 +26,16 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Automated QA Testing Platform - Combines automated bot testing with human-driven evaluation",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=default_response_class()
 )
 
+# Innermost first: profiling wraps only the app, metrics also time rate limiting,
+# and CORS is added last so it wraps 429 responses too
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +46,15 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+async def dispose_database_engine():
+    """Close pooled connections and the password hashing pool"""
+    await test_event_broker.close()
+    await async_engine.dispose()
+    await close_redis()
+    shutdown_hashing_executor()
+
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -35,14 +63,43 @@ async def health_check():
         "status": "healthy",
         "app_name": settings.APP_NAME,
         "version": settings.APP_VERSION,
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "principal_cache": principal_cache.stats(),
+        "response_cache": response_cache.stats()
     }
 
 
+def _cache_gauges(stats) -> dict:
+    return {(("stat", name),): value for name, value in stats().items()}
+
+
+register_gauge("principal_cache", "Principal cache counters", lambda: _cache_gauges(principal_cache.stats))
+register_gauge("response_cache", "Response cache counters", lambda: _cache_gauges(response_cache.stats))
+register_gauge("db_pool_connections", "Async database pool connections", lambda: {
+    (("state", "checked_out"),): async_engine.pool.checkedout(),
+    (("state", "idle"),): async_engine.pool.checkedin(),
+    (("state", "overflow"),): max(async_engine.pool.overflow(), 0),
+})
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(authorization: str = Header(default="")):
+    """Prometheus metrics"""
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(projects.router, prefix=settings.API_V1_PREFIX)
 app.include_router(tests.router, prefix=settings.API_V1_PREFIX)
+app.include_router(uploads.router, prefix=settings.API_V1_PREFIX)
+app.include_router(reports.router, prefix=settings.API_V1_PREFIX)
+app.include_router(webhooks.router, prefix=settings.API_V1_PREFIX)
+app.include_router(internal.router, prefix=settings.API_V1_PREFIX)
 
 
 # Root endpoint
@@ -1,8 +1,8 @@
 """
 Project schemas for request/response validation
 """
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List
+from datetime import date, datetime
 from pydantic import BaseModel, HttpUrl, UUID4
 
 
@@ -33,6 +33,7 @@ class ProjectResponse(ProjectBase):
     user_id: UUID4
     status: str
     test_config: Optional[Dict[str, Any]] = None
+    next_run_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -45,3 +46,26 @@ class ProjectWithStats(ProjectResponse):
     total_tests: int = 0
     latest_test: Optional[datetime] = None
     critical_issues: int = 0
+
+
+class AnalyticsPoint(BaseModel):
+    """Finished tests of a period (or a whole range), from the daily rollups"""
+    period: date
+    tests_completed: int = 0
+    tests_failed: int = 0
+    checks: Dict[str, int]  # total, passed, failed, warnings
+    pass_rate: Optional[float] = None  # passed / total checks
+    issues: Dict[str, int]  # by severity
+    avg_duration_seconds: Optional[float] = None
+    avg_load_time_ms: Optional[float] = None  # performance module page load
+    max_load_time_ms: Optional[int] = None
+
+
+class ProjectAnalytics(BaseModel):
+    """Schema for project analytics response"""
+    project_id: UUID4
+    start: date
+    end: date
+    interval: str
+    totals: AnalyticsPoint
+    series: List[AnalyticsPoint]  # Periods without finished tests are omitted
@@ -0,0 +1,29 @@
+"""
+Report schemas for request/response validation
+"""
+from typing import Literal, Optional
+from datetime import datetime
+from pydantic import BaseModel, UUID4
+
+
+class ReportCreate(BaseModel):
+    """Schema for requesting a test report"""
+    test_id: UUID4
+    report_type: Literal["json", "html", "pdf"] = "html"
+
+
+class ReportResponse(BaseModel):
+    """Schema for report response"""
+    id: UUID4
+    test_id: UUID4
+    report_type: str
+    template_version: int
+    status: str
+    size: Optional[int] = None
+    error_message: Optional[str] = None
+    download_url: Optional[str] = None
+    requested_at: Optional[datetime] = None
+    generated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -3,7 +3,7 @@ Test schemas for request/response validation
 """
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel, Field, UUID4
 
 from app.db.models import TestStatus
 
@@ -15,15 +15,35 @@ class TestCreate(BaseModel):
     config: Optional[Dict[str, Any]] = None
 
 
+class TestBatchCreate(BaseModel):
+    """Schema for starting the same test on many projects"""
+    project_ids: List[UUID4] = Field(..., min_length=1)
+    test_type: str = "full"  # full, auth, performance, security, ui
+    config: Optional[Dict[str, Any]] = None
+
+
+class TestBatchResponse(BaseModel):
+    """Schema for a test batch with aggregate progress"""
+    id: UUID4
+    test_type: str
+    total: int
+    status_counts: Dict[str, int]  # Tests per status
+    finished: int  # Tests in a terminal status
+    progress: float  # finished / total
+    created_at: datetime
+
+
 class TestResponse(BaseModel):
     """Schema for test response"""
     id: UUID4
     project_id: UUID4
+    batch_id: Optional[UUID4] = None
     test_type: str
     status: TestStatus
     results: Optional[Dict[str, Any]] = None
     screenshots: Optional[List[str]] = None
     videos: Optional[List[str]] = None
+    scheduled_for: Optional[datetime] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     duration_seconds: Optional[int] = None
@@ -65,10 +85,53 @@ class IssueResponse(BaseModel):
         from_attributes = True
 
 
+class IssueFingerprintResponse(BaseModel):
+    """An issue as tracked across a project's runs"""
+    fingerprint: str
+    severity: str
+    category: str
+    title: str
+    url: Optional[str] = None
+    element_selector: Optional[str] = None
+    status: str
+    first_seen_test_id: Optional[UUID4] = None
+    first_seen_at: datetime
+    last_seen_test_id: Optional[UUID4] = None
+    last_seen_at: datetime
+    occurrences: int
+    resolved_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class IssueDiff(BaseModel):
+    """Issues a run found that no earlier run had, and those of the previous run it no longer found"""
+    test_id: UUID4
+    previous_test_id: Optional[UUID4] = None
+    new_count: int
+    resolved_count: int
+    new: List[IssueFingerprintResponse]
+    resolved: List[IssueFingerprintResponse]
+
+
+class TestPage(BaseModel):
+    """A page of tests; pass next_cursor back as cursor for the next page"""
+    items: List[TestResponse]
+    next_cursor: Optional[str] = None
+
+
+class IssuePage(BaseModel):
+    """A page of issues; pass next_cursor back as cursor for the next page"""
+    items: List[IssueResponse]
+    next_cursor: Optional[str] = None
+
+
 class ManualTestSubmit(BaseModel):
     """Schema for manual test submission"""
     test_id: UUID4
     test_data: Dict[str, Any]
     screenshots: Optional[List[str]] = None
     videos: Optional[List[str]] = None
+    upload_ids: Optional[List[UUID4]] = None  # Completed media uploads to attach
     test_duration_seconds: Optional[int] = None
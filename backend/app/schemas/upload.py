@@ -0,0 +1,35 @@
+"""
+Media upload schemas for request/response validation
+"""
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, UUID4
+
+
+class UploadCreate(BaseModel):
+    """Schema for starting an upload"""
+    filename: str = Field(..., max_length=255)
+    content_type: str = Field(..., max_length=100)  # image/* or video/*
+    size: int = Field(..., gt=0)
+    checksum: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")  # SHA-256, verified on completion
+
+
+class UploadResponse(BaseModel):
+    """Schema for upload response"""
+    id: UUID4
+    kind: str
+    filename: str
+    content_type: str
+    size: int
+    received: int
+    status: str
+    sha256: Optional[str] = None
+    has_thumbnail: bool = False
+    content_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
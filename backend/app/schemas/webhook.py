@@ -0,0 +1,28 @@
+"""
+Webhook schemas for request/response validation
+"""
+from typing import List, Literal, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, HttpUrl, UUID4
+
+
+class WebhookCreate(BaseModel):
+    """Schema for webhook creation"""
+    url: HttpUrl
+    events: List[Literal["test_completed", "issue_found"]] = Field(..., min_length=1)
+    project_id: Optional[UUID4] = None  # None: all of the user's projects
+
+
+class WebhookResponse(BaseModel):
+    """Schema for webhook response"""
+    id: UUID4
+    project_id: Optional[UUID4] = None
+    url: str
+    events: List[str]
+    is_active: bool
+    consecutive_failures: int = 0
+    circuit_open_until: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,158 @@
+"""
+Project analytics
+
+Finished tests are rolled up into project_daily_stats, one row per project
+per UTC day: test outcomes, check counts, issues by severity, run time and
+the performance module's page load time. The rollup is one upsert issued
+in the transaction that finishes the test (rollup_test_statement), and it
+claims the test through tests.rolled_up_at so a redelivered job is counted
+once.
+
+Analytics queries read a range of a project's rollup rows by primary key,
+so a year of history is at most 366 rows, however many tests ran.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, Integer, case, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.models import IssueSeverity, ProjectDailyStats, Test, TestStatus
+
+INTERVALS = ("day", "week", "month")
+
+CHECK_FIELDS = ("total", "passed", "failed", "warnings")
+
+# Columns summed when rows are merged
+COUNTER_COLUMNS = (
+    "tests_completed", "tests_failed",
+    *(f"checks_{name}" for name in CHECK_FIELDS),
+    *(f"issues_{severity.value}" for severity in IssueSeverity),
+    "duration_seconds_sum", "load_time_ms_sum", "load_time_ms_count",
+)
+
+
+def load_time_ms(document: Dict[str, Any]) -> Optional[int]:
+    """The performance module's page load time from a bot-engine results document"""
+    performance = (document.get("results") or {}).get("performance") or {}
+    load_time = (performance.get("metrics") or {}).get("loadTime")
+    return int(load_time) if isinstance(load_time, (int, float)) and load_time > 0 else None
+
+
+def rollup_test_statement(test_id):
+    """
+    Add a finished (completed or failed) test to its project's day, once;
+    reads the counters the test row holds at that point of the transaction.
+    The caller commits.
+    """
+    tests = Test.__table__
+    now = datetime.utcnow()
+
+    claimed = (
+        update(tests)
+        .where(
+            tests.c.id == test_id,
+            tests.c.rolled_up_at.is_(None),
+            tests.c.completed_at.isnot(None),
+            tests.c.status.in_([TestStatus.COMPLETED, TestStatus.FAILED])
+        )
+        .values(rolled_up_at=now)
+        .returning(tests.c.project_id, tests.c.completed_at, tests.c.status, tests.c.results, tests.c.duration_seconds)
+        .cte("claimed")
+    )
+
+    def counter(*path):
+        return func.coalesce(cast(claimed.c.results[path].astext, Integer), 0)
+
+    load_time = cast(claimed.c.results["load_time_ms"].astext, Integer)
+    values = {
+        "project_id": claimed.c.project_id,
+        "day": cast(claimed.c.completed_at, Date),
+        "tests_completed": case((claimed.c.status == TestStatus.COMPLETED, 1), else_=0),
+        "tests_failed": case((claimed.c.status == TestStatus.FAILED, 1), else_=0),
+        **{
+            f"checks_{name}": counter("stats", "total_checks" if name == "total" else name)
+            for name in CHECK_FIELDS
+        },
+        **{
+            f"issues_{severity.value}": counter("issue_counts", severity.value)
+            for severity in IssueSeverity
+        },
+        "duration_seconds_sum": func.coalesce(claimed.c.duration_seconds, 0),
+        "load_time_ms_sum": func.coalesce(load_time, 0),
+        "load_time_ms_count": case((load_time.isnot(None), 1), else_=0),
+        "load_time_ms_max": load_time,
+        "updated_at": literal(now),
+    }
+
+    table = ProjectDailyStats.__table__
+    statement = insert(table).from_select(list(values), select(*values.values()))
+    return statement.on_conflict_do_update(
+        index_elements=["project_id", "day"],
+        set_={
+            **{column: table.c[column] + statement.excluded[column] for column in COUNTER_COLUMNS},
+            "load_time_ms_max": func.greatest(table.c.load_time_ms_max, statement.excluded.load_time_ms_max),
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def analytics_query(project_id, start: date, end: date, interval: str):
+    """A project's rollups between start and end (inclusive), summed per interval"""
+    stats = ProjectDailyStats
+    if interval == "day":
+        period = stats.day
+    else:
+        period = cast(func.date_trunc(interval, stats.day), Date)
+
+    return (
+        select(
+            period.label("period"),
+            *(func.sum(getattr(stats, column)).label(column) for column in COUNTER_COLUMNS),
+            func.max(stats.load_time_ms_max).label("load_time_ms_max"),
+        )
+        .where(stats.project_id == project_id, stats.day >= start, stats.day <= end)
+        .group_by(period)
+        .order_by(period)
+    )
+
+
+def _ratio(numerator, denominator, digits: int = 4) -> Optional[float]:
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def analytics_point(period: date, row: Dict[str, Any]) -> Dict[str, Any]:
+    """The API representation of summed rollup counters"""
+    finished = row["tests_completed"] + row["tests_failed"]
+    return {
+        "period": period,
+        "tests_completed": row["tests_completed"],
+        "tests_failed": row["tests_failed"],
+        "checks": {name: row[f"checks_{name}"] for name in CHECK_FIELDS},
+        "pass_rate": _ratio(row["checks_passed"], row["checks_total"]),
+        "issues": {severity.value: row[f"issues_{severity.value}"] for severity in IssueSeverity},
+        "avg_duration_seconds": _ratio(row["duration_seconds_sum"], finished, 1),
+        "avg_load_time_ms": _ratio(row["load_time_ms_sum"], row["load_time_ms_count"], 1),
+        "max_load_time_ms": row["load_time_ms_max"],
+    }
+
+
+def analytics_series(rows) -> List[Dict[str, Any]]:
+    """One point per analytics_query row; sums come back as numeric"""
+    series = []
+    for row in rows:
+        counters = {column: int(getattr(row, column) or 0) for column in COUNTER_COLUMNS}
+        series.append(analytics_point(row.period, {**counters, "load_time_ms_max": row.load_time_ms_max}))
+    return series
+
+
+def analytics_totals(start: date, rows) -> Dict[str, Any]:
+    """All rows of a range summed into one point"""
+    totals = dict.fromkeys(COUNTER_COLUMNS, 0)
+    load_time_max = None
+    for row in rows:
+        for column in COUNTER_COLUMNS:
+            totals[column] += int(getattr(row, column) or 0)
+        if row.load_time_ms_max is not None:
+            load_time_max = max(load_time_max or 0, row.load_time_ms_max)
+    return analytics_point(start, {**totals, "load_time_ms_max": load_time_max})
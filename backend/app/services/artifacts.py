@@ -0,0 +1,206 @@
+"""
+Content-addressed artifact store
+
+Large documents (full test results, module results, manual test data) are
+kept out of hot database rows. Each blob is zstd-compressed and stored under
+the SHA-256 of its uncompressed content, so identical blobs are stored once;
+rows keep only an ArtifactRef.
+
+Backends: "local" (files under UPLOAD_DIR/artifacts) and "s3" (any
+S3-compatible endpoint, e.g. MinIO as a local stand-in; requires boto3).
+"""
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+import zstandard
+
+from app.core.config import settings
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    """Pointer to a stored artifact, as kept in database rows"""
+    digest: str  # SHA-256 of the uncompressed content
+    size: int  # Uncompressed size in bytes
+    content_type: str = JSON_CONTENT_TYPE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ArtifactRef":
+        return cls(digest=data["digest"], size=data["size"], content_type=data.get("content_type", JSON_CONTENT_TYPE))
+
+
+class ArtifactNotFound(LookupError):
+    """The store has no blob for a reference"""
+
+
+class ArtifactStore:
+    """Compression and addressing shared by all backends"""
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    @staticmethod
+    def key(digest: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.zst"
+
+    # Backend operations on compressed blobs
+    def _exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _write(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def exists(self, ref: ArtifactRef) -> bool:
+        return self._exists(self.key(ref.digest))
+
+    def put(self, data: bytes, content_type: str = JSON_CONTENT_TYPE) -> ArtifactRef:
+        """Store a blob, skipping the write when its content is already stored"""
+        digest = hashlib.sha256(data).hexdigest()
+        key = self.key(digest)
+        if not self._exists(key):
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            self._write(key, compressor.compress(data))
+        return ArtifactRef(digest=digest, size=len(data), content_type=content_type)
+
+    def put_json(self, document: Any) -> ArtifactRef:
+        data = json.dumps(document, separators=(",", ":"), default=str).encode()
+        return self.put(data, JSON_CONTENT_TYPE)
+
+    def read(self, ref: ArtifactRef) -> bytes:
+        return b"".join(self.iter_range(ref))
+
+    def read_json(self, ref: ArtifactRef) -> Any:
+        return json.loads(self.read(ref))
+
+    def iter_range(
+        self,
+        ref: ArtifactRef,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> Iterator[bytes]:
+        """
+        Yield uncompressed bytes [start, end] (inclusive), decompressing as a
+        stream so only one chunk is held in memory
+        """
+        end = ref.size - 1 if end is None else min(end, ref.size - 1)
+        remaining = end - start + 1
+
+        source = self._open(self.key(ref.digest))
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(source) as reader:
+                # Forward-only seek: decompresses and discards the prefix
+                reader.seek(start)
+                while remaining > 0:
+                    chunk = reader.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        finally:
+            source.close()
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Artifacts as files under a root directory"""
+
+    def __init__(self, root: str, level: int = 3):
+        super().__init__(level)
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write then rename, so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _open(self, key: str) -> BinaryIO:
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise ArtifactNotFound(key)
+
+
+class S3ArtifactStore(ArtifactStore):
+    """Artifacts as objects in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str, prefix: str = "artifacts/", level: int = 3, **client_options):
+        super().__init__(level)
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("ARTIFACT_STORE=s3 requires boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", **client_options)
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.client.exceptions.ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def _write(self, key: str, data: bytes) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType="application/zstd",
+        )
+
+    def _open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"]
+        except self.client.exceptions.NoSuchKey:
+            raise ArtifactNotFound(key)
+
+
+@lru_cache
+def get_artifact_store() -> ArtifactStore:
+    """The configured artifact store"""
+    if settings.ARTIFACT_STORE == "s3":
+        return S3ArtifactStore(
+            bucket=settings.ARTIFACT_S3_BUCKET,
+            level=settings.ARTIFACT_ZSTD_LEVEL,
+            endpoint_url=settings.ARTIFACT_S3_ENDPOINT_URL,
+            region_name=settings.ARTIFACT_S3_REGION,
+            aws_access_key_id=settings.ARTIFACT_S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.ARTIFACT_S3_SECRET_ACCESS_KEY,
+        )
+    return LocalArtifactStore(
+        root=os.path.join(settings.UPLOAD_DIR, "artifacts"),
+        level=settings.ARTIFACT_ZSTD_LEVEL,
+    )
+
@@ -0,0 +1,293 @@
+"""
+Pooled bot-engine runner
+
+Keeps a pool of warm, long-lived bot-engine worker processes
+(bot-engine/src/worker.ts) and dispatches test runs to them over a
+JSON-lines protocol on stdin/stdout. Browsers stay launched inside each
+worker, and every job gets a fresh browser context.
+
+Workers are recycled after BOT_ENGINE_MAX_JOBS_PER_WORKER jobs or once
+their process tree grows past BOT_ENGINE_MAX_RSS_MB.
+"""
+import atexit
+import errno
+import json
+import logging
+import os
+import queue
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BotEngineError(Exception):
+    """A bot-engine job produced no results"""
+
+
+class BotEngineUnavailable(BotEngineError):
+    """The worker crashed, timed out or could not take the job; worth retrying"""
+
+
+class BotEngineJobError(BotEngineError):
+    """The bot-engine reported the job itself as failed; retrying won't help"""
+
+
+def _process_tree_rss_kb(root_pid: int) -> int:
+    """Resident memory of a process and all its descendants (Linux only)"""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+
+    try:
+        pids = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return 0
+
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # The command name may contain spaces; fields resume after ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total
+
+
+class BotWorker:
+    """A single long-lived bot-engine worker process"""
+
+    def __init__(self, command: List[str], cwd: str, startup_timeout: float):
+        self.jobs_completed = 0
+        # Set once the worker timed out or died and must not be reused
+        self.broken = False
+        self._messages: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._reader = threading.Thread(target=self._read_messages, daemon=True)
+        self._reader.start()
+
+        try:
+            message = self._next_message(startup_timeout)
+            if message.get("type") != "ready":
+                self.broken = True
+                raise BotEngineUnavailable(f"Unexpected worker handshake: {message}")
+        except BaseException:
+            # Nothing else holds the process yet
+            self.close()
+            raise
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def _read_messages(self):
+        for line in self._process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self._messages.put(json.loads(line))
+            except ValueError:
+                logger.warning("Ignoring malformed bot-engine output: %s", line[:200])
+        # EOF: the worker exited
+        self._messages.put(None)
+
+    def _next_message(self, timeout: float, deadline: Optional[float] = None) -> dict:
+        """The worker's next message, waiting until deadline (default: timeout from now)"""
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        try:
+            message = self._messages.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            self.broken = True
+            raise BotEngineUnavailable(f"Bot-engine worker {self.pid} timed out after {timeout}s")
+        if message is None:
+            self.broken = True
+            raise BotEngineUnavailable(
+                f"Bot-engine worker {self.pid} exited with code {self._process.wait()}"
+            )
+        return message
+
+    def run(
+        self,
+        config: Dict[str, Any],
+        timeout: float,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run one job and return the bot-engine TestResults document
+        Progress messages for the job are passed to on_progress as they arrive;
+        the timeout covers the whole job, not each message
+        """
+        job_id = uuid.uuid4().hex
+        try:
+            self._process.stdin.write(json.dumps({"id": job_id, "config": config}) + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            self.broken = True
+            raise BotEngineUnavailable(f"Bot-engine worker {self.pid} is not accepting jobs: {exc}")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            message = self._next_message(timeout, deadline)
+            if message.get("id") != job_id:
+                continue
+            if message.get("type") == "progress":
+                if on_progress is not None:
+                    on_progress(message)
+                continue
+            break
+
+        self.jobs_completed += 1
+        if message.get("type") == "error":
+            raise BotEngineJobError(message.get("error") or "Bot-engine job failed")
+        return message["results"]
+
+    def should_recycle(self) -> bool:
+        """Whether the worker has done enough work to be replaced"""
+        if self.jobs_completed >= settings.BOT_ENGINE_MAX_JOBS_PER_WORKER:
+            return True
+        rss_mb = _process_tree_rss_kb(self.pid) / 1024
+        return rss_mb > settings.BOT_ENGINE_MAX_RSS_MB
+
+    def close(self):
+        """Ask the worker to exit, killing it if it doesn't; reaps it either way"""
+        if self.alive and not self.broken:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        if self.alive:
+            self._process.kill()
+        self._process.wait()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+
+
+class BotEnginePool:
+    """Fixed-size pool of warm bot-engine workers, safe to share across threads"""
+
+    def __init__(
+        self,
+        size: int = settings.BOT_ENGINE_POOL_SIZE,
+        command: str = settings.BOT_ENGINE_COMMAND,
+        cwd: str = settings.BOT_ENGINE_DIR,
+    ):
+        self.size = size
+        self.command = shlex.split(command)
+        self.cwd = cwd
+        self._idle: "queue.Queue[BotWorker]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _spawn(self) -> BotWorker:
+        try:
+            worker = BotWorker(self.command, self.cwd, settings.BOT_ENGINE_STARTUP_TIMEOUT)
+        except OSError as exc:
+            # Out of processes or memory for now; a missing command is a config error
+            if exc.errno in (errno.EAGAIN, errno.ENOMEM):
+                raise BotEngineUnavailable(f"Could not start a bot-engine worker: {exc}") from exc
+            raise
+        logger.info("Started bot-engine worker %s", worker.pid)
+        return worker
+
+    def _acquire(self) -> BotWorker:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._spawn()
+                if worker.alive:
+                    return worker
+                logger.info("Discarding exited bot-engine worker %s", worker.pid)
+                worker.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: BotWorker):
+        try:
+            if not worker.broken and not self._closed and worker.alive and not worker.should_recycle():
+                self._idle.put(worker)
+            else:
+                logger.info(
+                    "Retiring bot-engine worker %s after %s jobs",
+                    worker.pid,
+                    worker.jobs_completed,
+                )
+                worker.close()
+        finally:
+            self._slots.release()
+
+    def run(
+        self,
+        config: Dict[str, Any],
+        timeout: float = settings.BOT_ENGINE_JOB_TIMEOUT,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ) -> Dict[str, Any]:
+        """Run a job on the next free worker, blocking until one is available"""
+        if self._closed:
+            raise BotEngineUnavailable("Bot-engine pool is closed")
+
+        worker = self._acquire()
+        try:
+            return worker.run(config, timeout, on_progress)
+        finally:
+            # A job error reported by the worker leaves it reusable;
+            # timeouts and crashes retire it
+            self._release(worker)
+
+    def close(self):
+        """Shut down all idle workers"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool: Optional[BotEnginePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_bot_engine_pool() -> BotEnginePool:
+    """Get the process-wide bot-engine pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BotEnginePool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,137 @@
+"""
+Live test progress events
+
+Workers publish test events (status transitions, per-module progress and
+issues) to a Redis pub/sub channel per test. Every API process keeps a
+single pub/sub connection and fans events out to its local subscribers
+through in-memory queues, so any replica can serve any subscriber and an
+idle subscriber costs one small queue rather than a Redis connection.
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.redis import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+# Event types
+STATUS_EVENT = "status"
+PROGRESS_EVENT = "progress"
+ISSUE_EVENT = "issue"
+
+# Statuses after which no more events are published for a test
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+def test_channel(test_id) -> str:
+    return f"test-events:{test_id}"
+
+
+def publish_test_event(test_id, event: str, data: Dict[str, Any]) -> None:
+    """
+    Publish an event for a test from synchronous code (workers)
+    Delivery is best effort; failures are logged and never fail the job
+    """
+    message = json.dumps({"event": event, "data": data}, default=str)
+    try:
+        get_sync_redis().publish(test_channel(test_id), message)
+    except Exception as exc:
+        logger.warning("Could not publish %s event for test %s: %s", event, test_id, exc)
+
+
+class TestEventBroker:
+    """Per-process fan-out of Redis pub/sub test events to local subscribers"""
+
+    def __init__(self, queue_size: int = settings.TEST_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_listener(self):
+        if self._pubsub is None:
+            self._pubsub = get_redis().pubsub()
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.5)
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Test event listener error: %s", exc)
+                await asyncio.sleep(1)
+                continue
+
+            if message is None:
+                continue
+
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            test_id = channel.split(":", 1)[1]
+
+            try:
+                event = json.loads(message["data"])
+            except ValueError:
+                continue
+
+            for queue in list(self._subscribers.get(test_id, ())):
+                if queue.full():
+                    # Slow consumer: drop its oldest event rather than block the fan-out
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, test_id) -> AsyncIterator[asyncio.Queue]:
+        """Subscribe to a test's events for the duration of the context"""
+        test_id = str(test_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async with self._lock:
+            await self._ensure_listener()
+            subscribers = self._subscribers.setdefault(test_id, set())
+            if not subscribers:
+                await self._pubsub.subscribe(test_channel(test_id))
+            subscribers.add(queue)
+
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                subscribers = self._subscribers.get(test_id)
+                if subscribers is not None:
+                    subscribers.discard(queue)
+                    if not subscribers:
+                        del self._subscribers[test_id]
+                        try:
+                            await self._pubsub.unsubscribe(test_channel(test_id))
+                        except Exception as exc:
+                            logger.warning("Could not unsubscribe from test %s: %s", test_id, exc)
+
+    async def close(self):
+        """Stop the listener and close the pub/sub connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+# Global broker instance for the API process
+test_event_broker = TestEventBroker()
@@ -0,0 +1,242 @@
+"""
+Change detection for incremental re-testing
+
+Before an incremental run (config "incremental": true, or
+INCREMENTAL_TESTS_DEFAULT), the worker fingerprints the target page and
+its key assets (same-origin scripts and stylesheets): ETag, Last-Modified
+and a SHA-256 of the body. Requests are conditional on the previous
+fingerprints, so unchanged resources usually answer 304 without a body.
+
+If nothing changed since the run that recorded the previous fingerprints,
+and that run used the same test type and config, the new test carries
+that run's results and issues forward instead of running the bot-engine
+(see carry_forward), marked with "carried_over_from" on the results and
+"carried_over" on each issue.
+
+Every bot-engine module checks the target page itself, so a test covers
+one page: any change to the page or its assets re-runs the whole test.
+"""
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from sqlalchemy import cast, func, literal, select
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import mark_stale
+from app.db.models import Issue, PageFingerprint, Test, TestStatus
+from app.services.ingestion import claim_chunk_statement, finish_chunk_statement
+from app.services.issue_index import observe_test_issues_statement
+
+logger = logging.getLogger(__name__)
+
+# Config keys that don't change what a run checks
+NON_RESULT_CONFIG_KEYS = ("incremental",)
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """What a URL looked like when it was last fetched"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+
+
+class _AssetParser(HTMLParser):
+    """Collects script and stylesheet URLs from a page"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("src"):
+            self.assets.append(attrs["src"])
+        elif tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower() and attrs.get("href"):
+            self.assets.append(attrs["href"])
+
+
+def key_assets(page_url: str, html: str) -> List[str]:
+    """Same-origin script and stylesheet URLs of a page, up to FINGERPRINT_MAX_ASSETS"""
+    parser = _AssetParser()
+    try:
+        parser.feed(html)
+    except Exception as exc:
+        logger.debug("Could not parse %s for assets: %s", page_url, exc)
+    origin = urlsplit(page_url).netloc
+    assets = [urljoin(page_url, asset) for asset in parser.assets]
+    same_origin = [asset for asset in dict.fromkeys(assets) if urlsplit(asset).netloc == origin]
+    return same_origin[:settings.FINGERPRINT_MAX_ASSETS]
+
+
+def fetch_fingerprint(
+    client: httpx.Client, url: str, previous: Optional[Fingerprint]
+) -> Tuple[Fingerprint, Optional[str]]:
+    """Fingerprint a URL, conditionally on its previous fingerprint; also returns the body if fetched"""
+    headers = {}
+    if previous is not None:
+        if previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+
+    response = client.get(url, headers=headers)
+    if response.status_code == 304 and previous is not None:
+        return previous, None
+    response.raise_for_status()
+
+    return Fingerprint(
+        url=url,
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"),
+        content_hash=hashlib.sha256(response.content).hexdigest(),
+    ), response.text
+
+
+def fingerprint_site(target_url: str, previous: Dict[str, Fingerprint]) -> Dict[str, Fingerprint]:
+    """
+    Fingerprints of the target page and its key assets. If the page itself
+    is unchanged (304), its previously recorded assets are checked.
+    """
+    with httpx.Client(
+        timeout=settings.FINGERPRINT_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        headers={"User-Agent": "CheckmateBot/1.0"},
+    ) as client:
+        page, html = fetch_fingerprint(client, target_url, previous.get(target_url))
+        assets = key_assets(target_url, html) if html is not None else [url for url in previous if url != target_url]
+
+        fingerprints = {target_url: page}
+        for url in assets:
+            fingerprints[url], _ = fetch_fingerprint(client, url, previous.get(url))
+        return fingerprints
+
+
+def config_digest(test_type: str, config: Optional[dict]) -> str:
+    """Identifies what a run checks, so only comparable runs are reused"""
+    relevant = {key: value for key, value in (config or {}).items() if key not in NON_RESULT_CONFIG_KEYS}
+    raw = json.dumps({"test_type": test_type, "config": relevant}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def incremental_requested(config: Optional[dict]) -> bool:
+    return bool((config or {}).get("incremental", settings.INCREMENTAL_TESTS_DEFAULT))
+
+
+def load_fingerprints(db: Session, project_id) -> Dict[str, PageFingerprint]:
+    """A project's recorded fingerprints, by URL"""
+    rows = db.scalars(select(PageFingerprint).where(PageFingerprint.project_id == project_id))
+    return {row.url: row for row in rows}
+
+
+def as_fingerprints(rows: Dict[str, PageFingerprint]) -> Dict[str, Fingerprint]:
+    return {
+        url: Fingerprint(url=url, etag=row.etag, last_modified=row.last_modified, content_hash=row.content_hash)
+        for url, row in rows.items()
+    }
+
+
+def reusable_test(db: Session, rows: Dict[str, PageFingerprint], digest: str) -> Optional[Test]:
+    """The completed, recent, comparable test all recorded fingerprints belong to, if any"""
+    test_ids = {row.test_id for row in rows.values()}
+    if len(test_ids) != 1:
+        return None
+    test = db.get(Test, test_ids.pop())
+    if test is None or test.status != TestStatus.COMPLETED or not test.completed_at:
+        return None
+    if (test.results or {}).get("config_digest") != digest:
+        return None
+    if datetime.utcnow() - test.completed_at > timedelta(hours=settings.INCREMENTAL_MAX_AGE_HOURS):
+        return None
+    return test
+
+
+def save_fingerprints(db: Session, project_id, test_id, fingerprints: Iterable[Fingerprint]):
+    """Record the fingerprints a completed test's results correspond to; the caller commits"""
+    fingerprints = {fingerprint.url: fingerprint for fingerprint in fingerprints}
+    if not fingerprints:
+        return
+    db.query(PageFingerprint).filter(
+        PageFingerprint.project_id == project_id,
+        PageFingerprint.url.notin_(list(fingerprints))
+    ).delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    statement = pg_insert(PageFingerprint).values([
+        {
+            "project_id": project_id,
+            "url": fingerprint.url,
+            "etag": fingerprint.etag,
+            "last_modified": fingerprint.last_modified,
+            "content_hash": fingerprint.content_hash,
+            "test_id": test_id,
+            "checked_at": now,
+        }
+        for fingerprint in fingerprints.values()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["project_id", "url"],
+        set_={
+            column: statement.excluded[column]
+            for column in ("etag", "last_modified", "content_hash", "test_id", "checked_at")
+        },
+    ))
+
+
+def carry_forward(db: Session, test: Test, source: Test) -> None:
+    """
+    Complete a test with a previous test's results and issues; the caller
+    commits. Issues are copied with one INSERT ... SELECT, claimed in the
+    ingest ledger like any results chunk so a redelivered job copies once,
+    and recorded as seen again in the issue index.
+    """
+    origin = (source.results or {}).get("carried_over_from") or str(source.id)
+    now = datetime.utcnow()
+
+    test.status = TestStatus.COMPLETED
+    test.started_at = test.started_at or now
+    test.completed_at = now
+    test.duration_seconds = 0
+    test.screenshots = source.screenshots
+    test.results = {
+        **(source.results or {}),
+        "summary": "No changes since the previous run; results carried over",
+        "carried_over_from": origin,
+    }
+
+    mark_stale(db, f"test:{test.id}", f"project:{test.project_id}")
+    if db.scalar(claim_chunk_statement(test.id, 0)) is None:
+        return
+
+    columns = [
+        column for column in Issue.__table__.columns
+        if column.name not in ("id", "test_id", "metadata", "created_at", "updated_at")
+    ]
+    marker = cast(literal(json.dumps({"carried_over": True, "carried_over_from": origin})), JSONB)
+    copied = select(
+        func.gen_random_uuid(),
+        literal(test.id, Issue.__table__.c.test_id.type),
+        *columns,
+        func.coalesce(Issue.__table__.c["metadata"], cast(literal("{}"), JSONB)).op("||")(marker),
+        literal(now),
+        literal(now),
+    ).where(Issue.__table__.c.test_id == source.id)
+
+    result = db.execute(
+        Issue.__table__.insert().from_select(
+            ["id", "test_id", *[column.name for column in columns], "metadata", "created_at", "updated_at"],
+            copied,
+        )
+    )
+    db.execute(finish_chunk_statement(test.id, 0, result.rowcount))
+    db.execute(observe_test_issues_statement(test.id))
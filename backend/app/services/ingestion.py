@@ -0,0 +1,323 @@
+"""
+Bulk ingestion of bot-engine results
+
+A run's results arrive as numbered chunks of NDJSON records:
+
+    {"type": "issue", "severity": "high", "category": "security", "title": "...", ...}
+    {"type": "results", "module": "performance", "results": {...}}
+    {"type": "summary", "summary": {"totalChecks": 40, "passed": 37, "failed": 3, "warnings": 1}}
+
+Issues are written with one multi-row INSERT per batch (an issue repeated
+within a batch once), their fingerprints are upserted into the project's
+issue index (app.services.issue_index), and the test's result summary and
+issue counters are updated once per batch. Module results go to the
+artifact store and the row keeps only their references.
+
+Each chunk is claimed in the ingest_chunks ledger inside the same
+transaction, so a retried chunk is detected and skipped instead of
+duplicating rows (or issue_found webhook events). Cached responses for
+the test and its project are invalidated when the caller commits.
+"""
+import json
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Integer, bindparam, cast, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.response_cache import mark_stale
+from app.db.models import IngestChunk, Issue, IssueSeverity, Test
+from app.services.artifacts import ArtifactStore, get_artifact_store
+from app.services.issue_index import issue_fingerprint, observe_issues_statement
+from app.services.webhooks import webhook_event_statement
+
+
+class IngestError(ValueError):
+    """A chunk contained a malformed record"""
+
+
+@dataclass
+class IngestResult:
+    """Outcome of ingesting one chunk"""
+    test_id: uuid.UUID
+    seq: int
+    duplicate: bool = False
+    records: int = 0
+    issues: int = 0
+
+
+def _truncate(value: Optional[str], length: int) -> Optional[str]:
+    return value[:length] if value else None
+
+
+def issue_row(test_id, record: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Map a bot-engine issue record to an issues table row"""
+    try:
+        severity = IssueSeverity(record.get("severity"))
+    except ValueError:
+        severity = IssueSeverity.INFO
+
+    metadata = record.get("metadata") or {}
+    if record.get("recommendation"):
+        metadata = {**metadata, "recommendation": record["recommendation"]}
+
+    category = _truncate(record.get("category"), 100) or "general"
+    title = _truncate(record.get("title"), 500) or "Untitled issue"
+    url = _truncate(record.get("url"), 500)
+    element_selector = _truncate(record.get("element_selector"), 500)
+
+    return {
+        "id": uuid.uuid4(),
+        "test_id": test_id,
+        "severity": severity,
+        "category": category,
+        "title": title,
+        "description": record.get("description"),
+        "url": url,
+        "element_selector": element_selector,
+        "screenshot_url": _truncate(record.get("screenshot") or record.get("screenshot_url"), 500),
+        "code_snippet": record.get("code_snippet"),
+        "status": "open",
+        "fingerprint": issue_fingerprint(category, title, url, element_selector),
+        "metadata": metadata or None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class IngestBatch:
+    """Accumulates records and renders the statements that apply them"""
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+        self.issue_rows: List[Dict[str, Any]] = []
+        self.fingerprints: Set[str] = set()
+        self.severity_counts: Counter = Counter()
+        self.modules: Dict[str, Any] = {}
+        self.stats: Optional[Dict[str, Any]] = None
+        self.records = 0
+
+    def __len__(self):
+        return self.records
+
+    def add(self, record: Dict[str, Any], now: datetime):
+        record_type = record.get("type", "issue")
+        if record_type == "issue":
+            row = issue_row(self.test_id, record, now)
+            # The same issue reported twice in a run is stored once
+            if row["fingerprint"] not in self.fingerprints:
+                self.fingerprints.add(row["fingerprint"])
+                self.issue_rows.append(row)
+                self.severity_counts[row["severity"].value] += 1
+        elif record_type == "results":
+            if not record.get("module"):
+                raise IngestError("results record requires a module")
+            self.modules[record["module"]] = record.get("results")
+        elif record_type == "summary":
+            summary = record.get("summary") or {}
+            self.stats = {
+                "total_checks": summary.get("totalChecks", 0),
+                "passed": summary.get("passed", 0),
+                "failed": summary.get("failed", 0),
+                "warnings": summary.get("warnings", 0),
+            }
+        else:
+            raise IngestError(f"Unknown record type: {record_type}")
+        self.records += 1
+
+    def store_modules(self, store: ArtifactStore):
+        """Replace module result documents with artifact references"""
+        self.modules = {
+            module: store.put_json(results).to_dict()
+            for module, results in self.modules.items()
+        }
+
+    def statements(self) -> list:
+        """
+        Statements applying this batch: one INSERT and one UPDATE at most,
+        the issue index upsert and the issue_found event
+        """
+        statements = []
+        if self.issue_rows:
+            # Keyed by column name so the "metadata" column maps directly
+            statements.append(insert(Issue.__table__).values(self.issue_rows))
+            statements.append(observe_issues_statement(self.test_id, self.issue_rows))
+            if settings.WEBHOOKS_ENABLED:
+                statements.append(webhook_event_statement("issue_found", self.test_id, self._issue_found()))
+
+        if self.issue_rows or self.modules or self.stats is not None:
+            statements.append(self._results_update())
+        return statements
+
+    def _issue_found(self) -> Dict[str, Any]:
+        return {
+            "test_id": str(self.test_id),
+            "issues": [
+                {
+                    "id": str(row["id"]),
+                    "severity": row["severity"].value,
+                    "category": row["category"],
+                    "title": row["title"],
+                    "url": row["url"],
+                }
+                for row in self.issue_rows
+            ],
+        }
+
+    def _results_update(self):
+        # Object keys are rendered inline: jsonb_build_object takes "any"
+        # arguments, so bound parameters there would have no type
+        def key(name):
+            return literal(name, literal_execute=True)
+
+        results = func.coalesce(Test.results, cast({}, JSONB))
+
+        counts = []
+        for name in [severity.value for severity in IssueSeverity] + ["total"]:
+            increment = sum(self.severity_counts.values()) if name == "total" else self.severity_counts[name]
+            current = func.coalesce(cast(Test.results[("issue_counts", name)].astext, Integer), 0)
+            counts.extend([key(name), current + increment])
+        updated = results.op("||")(func.jsonb_build_object(key("issue_counts"), func.jsonb_build_object(*counts)))
+
+        if self.modules:
+            modules = func.coalesce(Test.results["modules"], cast({}, JSONB)).op("||")(
+                bindparam("modules", self.modules, type_=JSONB)
+            )
+            updated = updated.op("||")(func.jsonb_build_object(key("modules"), modules))
+
+        if self.stats is not None:
+            updated = updated.op("||")(
+                func.jsonb_build_object(key("stats"), cast(bindparam("stats", self.stats, type_=JSONB), JSONB))
+            )
+
+        return update(Test).where(Test.id == self.test_id).values(results=updated)
+
+
+def claim_chunk_statement(test_id, seq: int):
+    """Insert the chunk into the ledger, returning nothing if it was already applied"""
+    return (
+        pg_insert(IngestChunk)
+        .values(test_id=test_id, seq=seq, records=0, received_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["test_id", "seq"])
+        .returning(IngestChunk.seq)
+    )
+
+
+def finish_chunk_statement(test_id, seq: int, records: int):
+    return (
+        update(IngestChunk)
+        .where(IngestChunk.test_id == test_id, IngestChunk.seq == seq)
+        .values(records=records)
+    )
+
+
+def parse_record(line: bytes) -> Dict[str, Any]:
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        raise IngestError(f"Invalid JSON record: {exc}")
+    if not isinstance(record, dict):
+        raise IngestError("Each record must be a JSON object")
+    return record
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Parse NDJSON records from a byte stream without buffering it whole"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_record(line)
+    if buffer.strip():
+        yield parse_record(buffer)
+
+
+async def ingest_chunk(
+    db: AsyncSession,
+    test_id: uuid.UUID,
+    seq: int,
+    records: AsyncIterator[Dict[str, Any]],
+    batch_size: int = settings.INGEST_BATCH_SIZE,
+) -> IngestResult:
+    """Apply one chunk of records in a single transaction; the caller commits"""
+    result = IngestResult(test_id=test_id, seq=seq)
+
+    claimed = await db.scalar(claim_chunk_statement(test_id, seq))
+    if claimed is None:
+        result.duplicate = True
+        return result
+
+    project_id = await db.scalar(select(Test.project_id).where(Test.id == test_id))
+    mark_stale(db, f"test:{test_id}", f"project:{project_id}")
+
+    store = get_artifact_store()
+
+    async def apply(batch: IngestBatch):
+        if batch.modules:
+            await run_in_threadpool(batch.store_modules, store)
+        for statement in batch.statements():
+            await db.execute(statement)
+        result.records += batch.records
+        result.issues += len(batch.issue_rows)
+
+    now = datetime.utcnow()
+    batch = IngestBatch(test_id)
+    async for record in records:
+        batch.add(record, now)
+        if len(batch) >= batch_size:
+            await apply(batch)
+            batch = IngestBatch(test_id)
+    await apply(batch)
+
+    await db.execute(finish_chunk_statement(test_id, seq, result.records))
+    return result
+
+
+def ingest_chunk_sync(
+    db: Session,
+    test_id: uuid.UUID,
+    seq: int,
+    records: Iterable[Dict[str, Any]],
+    batch_size: int = settings.INGEST_BATCH_SIZE,
+) -> IngestResult:
+    """Synchronous ingest_chunk, for workers; the caller commits"""
+    result = IngestResult(test_id=test_id, seq=seq)
+
+    claimed = db.scalar(claim_chunk_statement(test_id, seq))
+    if claimed is None:
+        result.duplicate = True
+        return result
+
+    project_id = db.scalar(select(Test.project_id).where(Test.id == test_id))
+    mark_stale(db, f"test:{test_id}", f"project:{project_id}")
+
+    store = get_artifact_store()
+
+    def apply(batch: IngestBatch):
+        batch.store_modules(store)
+        for statement in batch.statements():
+            db.execute(statement)
+        result.records += batch.records
+        result.issues += len(batch.issue_rows)
+
+    now = datetime.utcnow()
+    batch = IngestBatch(test_id)
+    for record in records:
+        batch.add(record, now)
+        if len(batch) >= batch_size:
+            apply(batch)
+            batch = IngestBatch(test_id)
+    apply(batch)
+
+    db.execute(finish_chunk_statement(test_id, seq, result.records))
+    return result
@@ -0,0 +1,196 @@
+"""
+Issue index across runs
+
+Every run of a project finds most of the same issues again. Each issue row
+carries a fingerprint of its normalized identity: category, title (with
+numbers masked, so "Found 3 images" and "Found 4 images" match), page URL
+(without query string or fragment) and element selector. issue_fingerprints
+keeps one row per project and fingerprint, upserted as issues are ingested
+or carried forward: which runs first and last found it, when, how many
+runs found it, and whether it has been resolved.
+
+Project-level questions read the index instead of every run's issues:
+the open critical issues on the project list, and the diff of a run
+against the previous run of its test type (GET /tests/{id}/issues/diff):
+
+    new       first found by the run
+    resolved  last found by the previous run; the run (and every run of
+              that test type since) no longer finds it
+
+A completed run resolves the open issues its test type last found in an
+earlier run (resolve_issues_statement); finding an issue again reopens it.
+The triage status (open, acknowledged, fixed, wont_fix) is that of the
+issue row last seen, so open critical counts leave out issues triaged in
+the latest run, as they did when they were counted from the runs' rows.
+"""
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import String, case, cast, column, literal, null, select, true, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import Select
+
+from app.db.models import Issue, IssueFingerprint, Test, TestStatus
+
+DIGITS = re.compile(r"\d+(?:[.,]\d+)*")
+WHITESPACE = re.compile(r"\s+")
+
+# Columns describing the issue, updated to how it was last seen
+DESCRIPTION_COLUMNS = ("severity", "category", "title", "url", "element_selector", "status")
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """Scheme, host and path of a page URL; query string and fragment vary between runs"""
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    path = parts.path.rstrip("/") or "/"
+    if not parts.netloc:
+        return path
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}"
+
+
+def issue_fingerprint(category: Optional[str], title: Optional[str], url: Optional[str], element_selector: Optional[str]) -> str:
+    """A stable identity of an issue across runs (32 hex characters)"""
+    parts = (
+        (category or "").strip().lower(),
+        DIGITS.sub("#", WHITESPACE.sub(" ", (title or "").strip().lower())),
+        normalize_url(url),
+        WHITESPACE.sub(" ", (element_selector or "").strip()),
+    )
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _upsert(statement):
+    """Record a sighting: the latest description, last seen, one more run, open again"""
+    table = IssueFingerprint.__table__
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=["project_id", "fingerprint"],
+        set_={
+            **{name: excluded[name] for name in DESCRIPTION_COLUMNS + ("test_type",)},
+            "last_seen_test_id": excluded.last_seen_test_id,
+            "last_seen_at": excluded.last_seen_at,
+            # Several chunks of one run count once
+            "occurrences": table.c.occurrences + case(
+                (table.c.last_seen_test_id.is_not_distinct_from(excluded.last_seen_test_id), 0), else_=1
+            ),
+            "resolved_at": null(),
+        },
+    )
+
+
+def _sighting_columns() -> Dict[str, Any]:
+    """The test's side of an upsert's columns, selected from its row"""
+    now = literal(datetime.utcnow())
+    return {
+        "test_type": Test.test_type,
+        "first_seen_test_id": Test.id,
+        "first_seen_at": now,
+        "last_seen_test_id": Test.id,
+        "last_seen_at": now,
+        "occurrences": literal(1),
+    }
+
+
+def observe_issues_statement(test_id, rows: List[Dict[str, Any]]):
+    """Upsert the fingerprints of a batch of a test's issue rows; the caller commits"""
+    latest = {row["fingerprint"]: row for row in rows}
+    found = values(
+        column("fingerprint", String),
+        column("severity", Issue.severity.type),
+        column("category", String),
+        column("title", String),
+        column("url", String),
+        column("element_selector", String),
+        column("status", String),
+        name="found",
+    ).data([
+        (fingerprint, row["severity"], row["category"], row["title"], row["url"], row["element_selector"], row["status"])
+        for fingerprint, row in latest.items()
+    ])
+
+    columns = {
+        "project_id": Test.project_id,
+        "fingerprint": found.c.fingerprint,
+        **{name: found.c[name] for name in DESCRIPTION_COLUMNS},
+        # VALUES columns are text to the database
+        "severity": cast(found.c.severity, Issue.severity.type),
+        **_sighting_columns(),
+    }
+    sightings = select(*columns.values()).select_from(found.join(Test, true())).where(Test.id == test_id)
+    return _upsert(insert(IssueFingerprint).from_select(list(columns), sightings))
+
+
+def observe_test_issues_statement(test_id):
+    """Upsert the fingerprints of all of a test's issue rows (e.g. carried forward ones); the caller commits"""
+    columns = {
+        "project_id": Test.project_id,
+        "fingerprint": Issue.fingerprint,
+        **{name: getattr(Issue, name) for name in DESCRIPTION_COLUMNS},
+        **_sighting_columns(),
+    }
+    sightings = (
+        select(*columns.values())
+        .select_from(Issue)
+        .join(Test, Test.id == Issue.test_id)
+        .where(Issue.test_id == test_id, Issue.fingerprint.isnot(None))
+        .distinct(Issue.fingerprint)
+        .order_by(Issue.fingerprint, Issue.created_at.desc())
+    )
+    return _upsert(insert(IssueFingerprint).from_select(list(columns), sightings))
+
+
+def resolve_issues_statement(test: Test):
+    """
+    Resolve the open issues of the test's type that a completed test did
+    not find; only issues last found before it started, so an overlapping
+    run's findings are left alone. The caller commits.
+    """
+    return (
+        update(IssueFingerprint)
+        .where(
+            IssueFingerprint.project_id == test.project_id,
+            IssueFingerprint.test_type == test.test_type,
+            IssueFingerprint.resolved_at.is_(None),
+            IssueFingerprint.last_seen_test_id.is_distinct_from(test.id),
+            IssueFingerprint.last_seen_at < (test.started_at or test.created_at),
+        )
+        .values(resolved_at=test.completed_at or datetime.utcnow())
+    )
+
+
+def previous_run_query(test: Test) -> Select:
+    """The completed run of the same project and test type before a test"""
+    return (
+        select(Test.id)
+        .where(
+            Test.project_id == test.project_id,
+            Test.test_type == test.test_type,
+            Test.status == TestStatus.COMPLETED,
+            Test.created_at < test.created_at,
+        )
+        .order_by(Test.created_at.desc(), Test.id.desc())
+        .limit(1)
+    )
+
+
+def new_issues_query(test: Test) -> Select:
+    return select(IssueFingerprint).where(
+        IssueFingerprint.project_id == test.project_id,
+        IssueFingerprint.first_seen_test_id == test.id,
+    )
+
+
+def resolved_issues_query(test: Test, previous_id) -> Select:
+    return select(IssueFingerprint).where(
+        IssueFingerprint.project_id == test.project_id,
+        IssueFingerprint.last_seen_test_id == previous_id,
+        IssueFingerprint.resolved_at.isnot(None),
+    )
@@ -0,0 +1,104 @@
+"""
+Browser x module test matrices
+
+A test's config can ask for a matrix:
+
+    {"matrix": {"browsers": ["chromium", "firefox"], "modules": ["security", "ui"]}}
+
+Each (browser, module) cell runs as its own bot-engine job, in its own
+browser context, so cells spread over the worker pool and a run takes as
+long as its slowest cell. Modules default to everything the test type
+covers, and browsers to the config's "browsers" (or chromium).
+
+merge_cells folds the per-cell documents into one result document: summary
+counters are summed, module results are taken from the first browser that
+ran the module, and an issue found in several cells is reported once with
+the browsers and modules it was seen in.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+BROWSERS = ("chromium", "firefox", "webkit")
+MODULES = ("auth", "performance", "security", "ui")
+
+SUMMARY_FIELDS = ("totalChecks", "passed", "failed", "warnings")
+
+
+def matrix_cells(test_type: str, config: Optional[dict]) -> List[Tuple[str, str]]:
+    """
+    The (browser, module) cells a test's config asks for, or [] when it
+    asks for a single run; raises ValueError for an invalid matrix
+    """
+    matrix = (config or {}).get("matrix")
+    if not matrix:
+        return []
+    if not isinstance(matrix, dict):
+        raise ValueError("matrix must be an object with browsers and/or modules")
+
+    browsers = list(dict.fromkeys(matrix.get("browsers") or (config or {}).get("browsers") or ["chromium"]))
+    unknown = [browser for browser in browsers if browser not in BROWSERS]
+    if unknown:
+        raise ValueError(f"Unknown browsers: {', '.join(map(str, unknown))}")
+
+    covered = MODULES if test_type == "full" else (test_type,)
+    modules = list(dict.fromkeys(matrix.get("modules") or covered))
+    outside = [module for module in modules if module not in covered]
+    if outside:
+        raise ValueError(f"Modules not covered by a {test_type} test: {', '.join(map(str, outside))}")
+
+    cells = [(browser, module) for browser in browsers for module in modules]
+    if len(cells) > settings.TEST_MATRIX_MAX_CELLS:
+        raise ValueError(f"A matrix can have at most {settings.TEST_MATRIX_MAX_CELLS} cells")
+    # A single cell is just a normal run
+    return cells if len(cells) > 1 else []
+
+
+def _issue_key(issue: Dict[str, Any]) -> tuple:
+    return (issue.get("category"), issue.get("title"), issue.get("url"), issue.get("description"))
+
+
+def merge_cells(cells: List[Dict[str, Any]], documents: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    One result document from the cell outcomes and their bot-engine
+    documents (None for failed cells)
+    """
+    summary = dict.fromkeys(SUMMARY_FIELDS, 0)
+    module_results: Dict[str, Any] = {}
+    issues: Dict[tuple, Dict[str, Any]] = {}
+    screenshots: List[str] = []
+    browsers = list(dict.fromkeys(cell["browser"] for cell in cells))
+
+    for cell, document in zip(cells, documents):
+        if document is None:
+            continue
+        for field in SUMMARY_FIELDS:
+            summary[field] += (document.get("summary") or {}).get(field, 0)
+        screenshots.extend(document.get("screenshots") or [])
+        # Module results of the first browser that ran the module
+        for module, results in (document.get("results") or {}).items():
+            module_results.setdefault(module, results)
+
+        for issue in document.get("issues") or []:
+            merged = issues.setdefault(_issue_key(issue), {
+                **issue,
+                "metadata": {**(issue.get("metadata") or {}), "browsers": [], "modules": []}
+            })
+            seen = merged["metadata"]
+            if cell["browser"] not in seen["browsers"]:
+                seen["browsers"].append(cell["browser"])
+            if cell["module"] not in seen["modules"]:
+                seen["modules"].append(cell["module"])
+
+    durations = [cell.get("duration") or 0 for cell in cells]
+    return {
+        "targetUrl": next((document.get("targetUrl") for document in documents if document), None),
+        "browser": ",".join(browsers),
+        "browsers": browsers,
+        "duration": max(durations, default=0),
+        "cells": cells,
+        "summary": summary,
+        "results": module_results,
+        "issues": list(issues.values()),
+        "screenshots": screenshots,
+    }
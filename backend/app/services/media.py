@@ -0,0 +1,200 @@
+"""
+Media upload storage and processing
+
+Uploads are written to UPLOAD_DIR/partial/<upload id> chunk by chunk. Once
+every byte has arrived the file is hashed and moved to
+UPLOAD_DIR/media/<sha256>, so identical files are stored once. Thumbnails
+(screenshots) and poster frames (videos) are generated off-request by the
+media worker and stored as UPLOAD_DIR/thumbnails/<sha256>.jpg.
+"""
+import fcntl
+import hashlib
+import os
+import subprocess
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+IMAGE = "image"
+VIDEO = "video"
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadBusy(RuntimeError):
+    """Another request is writing to the same upload"""
+
+
+class ChecksumMismatch(ValueError):
+    """The received file doesn't match the checksum declared by the client"""
+
+
+def media_kind(content_type: str) -> Optional[str]:
+    """Upload kind for a content type, or None if it isn't accepted"""
+    major = content_type.split("/", 1)[0]
+    return major if major in (IMAGE, VIDEO) else None
+
+
+def max_upload_size(kind: str) -> int:
+    return settings.MAX_VIDEO_UPLOAD_SIZE if kind == VIDEO else settings.MAX_UPLOAD_SIZE
+
+
+def partial_path(upload_id) -> str:
+    return os.path.join(settings.UPLOAD_DIR, "partial", str(upload_id))
+
+
+def media_path(sha256: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, "media", sha256[:2], sha256)
+
+
+def thumbnail_path(sha256: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, "thumbnails", sha256[:2], f"{sha256}.jpg")
+
+
+def open_partial(upload_id, offset: int) -> BinaryIO:
+    """
+    Open an upload's partial file for appending at offset
+
+    The file holds an exclusive lock until closed, and UploadBusy is raised
+    if another request holds it. Bytes past offset (left by an interrupted
+    request that never recorded them) are discarded first.
+    """
+    path = partial_path(upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o640)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise UploadBusy(str(upload_id))
+
+    file = os.fdopen(fd, "r+b")
+    file.truncate(offset)
+    file.seek(offset)
+    return file
+
+
+def close_partial(file: BinaryIO):
+    """Make written bytes durable before they are recorded, then unlock"""
+    try:
+        file.flush()
+        os.fsync(file.fileno())
+    finally:
+        file.close()
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(COPY_BUFFER_SIZE)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+
+
+def store_completed(upload_id, checksum: Optional[str] = None) -> str:
+    """
+    Verify a fully received upload and move it into content-addressed storage
+    Returns its SHA-256; if the content is already stored the partial file
+    is simply dropped.
+    """
+    source = partial_path(upload_id)
+    sha256 = file_sha256(source)
+    if checksum and checksum.lower() != sha256:
+        os.unlink(source)
+        raise ChecksumMismatch(f"Expected SHA-256 {checksum}, received {sha256}")
+
+    target = media_path(sha256)
+
+    if os.path.exists(target):
+        os.unlink(source)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(source, target)
+    return sha256
+
+
+def discard_partial(upload_id):
+    try:
+        os.unlink(partial_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def iter_file(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Yield bytes [start, end] (inclusive) of a file"""
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = (os.path.getsize(path) - 1 if end is None else end) - start + 1
+        while remaining > 0:
+            block = file.read(min(COPY_BUFFER_SIZE, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
+
+
+def save_thumbnail(image: Image.Image, target: str):
+    """Shrink an image to the thumbnail size and write it as JPEG atomically"""
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((settings.MEDIA_THUMBNAIL_SIZE, settings.MEDIA_THUMBNAIL_SIZE))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            image.save(tmp, "JPEG", quality=80, optimize=True)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def make_image_thumbnail(source: str, target: str):
+    with Image.open(source) as image:
+        # Let JPEG decode at reduced scale instead of full resolution
+        image.draft("RGB", (settings.MEDIA_THUMBNAIL_SIZE, settings.MEDIA_THUMBNAIL_SIZE))
+        save_thumbnail(image, target)
+
+
+def make_video_poster(source: str, target: str):
+    """Grab one frame with ffmpeg, then thumbnail it like a screenshot"""
+    with tempfile.TemporaryDirectory() as workdir:
+        frame = os.path.join(workdir, "frame.png")
+        for offset in (settings.MEDIA_POSTER_OFFSET_SECONDS, 0):
+            # Fall back to the first frame for clips shorter than the offset
+            subprocess.run(
+                [
+                    settings.FFMPEG_COMMAND, "-nostdin", "-loglevel", "error", "-y",
+                    "-ss", str(offset), "-i", source, "-frames:v", "1", frame,
+                ],
+                check=True,
+                capture_output=True,
+                timeout=60,
+            )
+            if os.path.exists(frame):
+                break
+        else:
+            raise RuntimeError("ffmpeg produced no frame")
+
+        with Image.open(frame) as image:
+            save_thumbnail(image, target)
+
+
+def make_thumbnail(kind: str, sha256: str) -> str:
+    """Generate the thumbnail or poster frame for stored media, once per content"""
+    target = thumbnail_path(sha256)
+    if not os.path.exists(target):
+        if kind == VIDEO:
+            make_video_poster(media_path(sha256), target)
+        else:
+            make_image_thumbnail(media_path(sha256), target)
+    return target
@@ -0,0 +1,363 @@
+"""
+Performance regression detection
+
+The performance module's numeric measurements (load timings, resource
+count and size, Core Web Vitals) are copied out of each completed run's
+results document into test_metrics, one row per run, so a project's
+history can be read without opening result artifacts. A series is one
+project in one browser.
+
+A periodic scan (app.workers.regressions) claims runs not yet looked at,
+reads the last REGRESSION_BASELINE_RUNS + REGRESSION_RECENT_RUNS runs of
+each series they belong to into one (series, runs, metrics) array, and
+tests every series and metric at once:
+
+    baseline   median and MAD of the older REGRESSION_BASELINE_RUNS runs
+    current    (lower) median of the REGRESSION_RECENT_RUNS newest runs
+    regressed  current and the newest run both exceed the baseline by
+               REGRESSION_Z_THRESHOLD robust standard deviations, by
+               REGRESSION_MIN_INCREASE of the baseline and by the metric's
+               min_delta, so a single slow run or noise on a flat series
+               is not reported
+
+For regressed metrics the change point, the run where the mean shifted,
+is the split of the window maximising the two-sample mean-shift statistic.
+
+A regression becomes a "performance" issue on the newest run. The metrics
+regressed as of a run are kept on its row, so an ongoing regression is
+reported once, when it starts, and again only after it has recovered.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import String, column, select, true, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import mark_stale
+from app.db.models import IssueSeverity, TestMetrics
+from app.services.ingestion import IngestBatch
+from app.services.reports import stale_reports_statement
+
+# Robust standard deviation of normally distributed data from its MAD
+MAD_SCALE = 1.4826
+
+
+@dataclass(frozen=True)
+class Metric:
+    """A performance-module measurement; higher is worse for all of them"""
+    name: str  # test_metrics column
+    label: str
+    unit: str
+    min_delta: float  # Smallest increase worth reporting
+    group: str  # Key of the performance results holding it
+    key: str
+    zero_valid: bool = False  # Otherwise 0 means "not measured"
+
+
+METRICS = (
+    Metric("load_time", "Page load time", "ms", 100, "metrics", "loadTime"),
+    Metric("dom_content_loaded", "DOM content loaded", "ms", 100, "metrics", "domContentLoaded"),
+    Metric("first_paint", "First paint", "ms", 50, "metrics", "firstPaint"),
+    Metric("resource_count", "Resource count", "", 5, "metrics", "resourceCount"),
+    Metric("total_size", "Transfer size", "bytes", 50_000, "metrics", "totalSize"),
+    Metric("lcp", "Largest Contentful Paint", "ms", 100, "coreWebVitals", "lcp"),
+    Metric("fid", "First Input Delay", "ms", 20, "coreWebVitals", "fid"),
+    Metric("cls", "Cumulative Layout Shift", "", 0.05, "coreWebVitals", "cls", zero_valid=True),
+)
+
+METRIC_COLUMNS = [metric.name for metric in METRICS]
+
+
+def performance_metrics(document: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """The numeric performance measurements of a bot-engine results document, if any"""
+    performance = (document.get("results") or {}).get("performance") or {}
+    measured = {}
+    for metric in METRICS:
+        value = (performance.get(metric.group) or {}).get(metric.key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and (
+            value > 0 or (value == 0 and metric.zero_valid)
+        ):
+            measured[metric.name] = float(value)
+    return measured or None
+
+
+def record_metrics_statement(test_id, project_id, browser: Optional[str], recorded_at: datetime, metrics: Dict[str, float]):
+    """Store a run's measurements, once; the caller commits"""
+    return (
+        insert(TestMetrics)
+        .values(
+            test_id=test_id,
+            project_id=project_id,
+            browser=browser or "chromium",
+            recorded_at=recorded_at,
+            **metrics
+        )
+        .on_conflict_do_nothing(index_elements=["test_id"])
+    )
+
+
+@dataclass
+class Detection:
+    """Per series and metric (arrays of shape (series, metrics)) results of detect_regressions"""
+    regressed: np.ndarray
+    baseline: np.ndarray
+    spread: np.ndarray  # Robust standard deviation of the baseline
+    current: np.ndarray
+    change_point: np.ndarray  # Run index where the shifted segment starts, for regressed series
+
+
+def detect_regressions(
+    windows: np.ndarray,
+    recent_runs: int,
+    min_baseline_runs: int,
+    z_threshold: float,
+    min_increase: float,
+    min_delta: np.ndarray,
+) -> Detection:
+    """
+    Test each series' newest runs against its baseline. windows has shape
+    (series, runs, metrics), oldest run first and NaN where a run is missing
+    or did not measure the metric; series shorter than the window are
+    padded at the start.
+    """
+    baseline_runs, recent = windows[:, :-recent_runs, :], windows[:, -recent_runs:, :]
+    baseline = nanmedian(baseline_runs)
+    spread = MAD_SCALE * nanmedian(np.abs(baseline_runs - baseline[:, None, :]))
+    # The lower median, so one slow run next to one missing run isn't a regression
+    current = nanmedian(recent, low=True)
+
+    newest = windows[:, -1, :]
+    threshold = baseline + np.fmax(np.fmax(z_threshold * spread, min_increase * baseline), min_delta)
+    regressed = (
+        (np.sum(~np.isnan(baseline_runs), axis=1) >= min_baseline_runs)
+        & (np.sum(~np.isnan(recent), axis=1) > recent_runs // 2)
+        & (current > threshold)
+        & (newest > threshold)
+    )
+
+    # Only needed for the few series that regressed
+    change_point = np.zeros(regressed.shape, dtype=int)
+    flagged = regressed.any(axis=1)
+    change_point[flagged] = change_points(windows[flagged])
+    return Detection(regressed, baseline, spread, current, change_point)
+
+
+def nanmedian(values: np.ndarray, low: bool = False) -> np.ndarray:
+    """
+    Median over axis 1 ignoring NaNs (NaN where there are no values), or
+    the lower of the two middle values with low. Sorting once is much
+    faster than np.nanmedian, which goes series by series when NaNs occur.
+    """
+    ordered = np.sort(values, axis=1)  # NaNs sort last
+    count = np.sum(~np.isnan(values), axis=1)
+    lower = np.take_along_axis(ordered, np.maximum(count - 1, 0)[:, None, :] // 2, axis=1)[:, 0, :]
+    upper = lower if low else np.take_along_axis(ordered, (count // 2)[:, None, :], axis=1)[:, 0, :]
+    with np.errstate(invalid="ignore"):
+        return np.where(count > 0, (lower + upper) / 2, np.nan)
+
+
+def change_points(windows: np.ndarray) -> np.ndarray:
+    """
+    For each series and metric, the index of the first run after the split
+    that maximises sqrt(n1 n2 / n) (mean after - mean before), ignoring NaNs
+    """
+    present = ~np.isnan(windows)
+    filled = np.where(present, windows, 0.0)
+    counts = np.cumsum(present, axis=1)
+    sums = np.cumsum(filled, axis=1)
+    total_count, total_sum = counts[:, -1:, :], sums[:, -1:, :]
+
+    # Split after run i, for i in 0..runs-2
+    before_count, before_sum = counts[:, :-1, :], sums[:, :-1, :]
+    after_count, after_sum = total_count - before_count, total_sum - before_sum
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = after_sum / after_count - before_sum / before_count
+        statistic = np.sqrt(before_count * after_count / total_count) * shift
+    statistic = np.where((before_count > 0) & (after_count > 0), statistic, -np.inf)
+    return np.argmax(statistic, axis=1) + 1
+
+
+@dataclass
+class SeriesWindow:
+    """The newest runs of one series, oldest first"""
+    project_id: uuid.UUID
+    browser: str
+    test_ids: List[uuid.UUID]
+    recorded_at: List[datetime]
+    ongoing: Set[str]  # Metrics already regressed as of the previous scan
+
+
+def claim_pending_statement(limit: int):
+    """Mark up to limit unscanned runs as scanned, returning them"""
+    pending = (
+        select(TestMetrics.test_id)
+        .where(TestMetrics.evaluated_at.is_(None))
+        .order_by(TestMetrics.recorded_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(TestMetrics)
+        .where(TestMetrics.test_id.in_(pending.scalar_subquery()))
+        .values(evaluated_at=datetime.utcnow())
+        .returning(TestMetrics.test_id, TestMetrics.project_id, TestMetrics.browser)
+    )
+
+
+def series_windows_statement(keys: List[Tuple[uuid.UUID, str]], runs: int):
+    """The newest runs of each (project_id, browser) series, newest first, one index range scan per series"""
+    series = values(
+        column("project_id", UUID(as_uuid=True)),
+        column("browser", String),
+        name="series",
+    ).data(keys)
+    newest = (
+        select(
+            TestMetrics.test_id, TestMetrics.recorded_at, TestMetrics.regressions,
+            *(getattr(TestMetrics, name) for name in METRIC_COLUMNS)
+        )
+        .where(TestMetrics.project_id == series.c.project_id, TestMetrics.browser == series.c.browser)
+        .order_by(TestMetrics.recorded_at.desc())
+        .limit(runs)
+        .lateral("newest")
+    )
+    return select(series.c.project_id, series.c.browser, newest).select_from(series.join(newest, true()))
+
+
+def load_windows(db: Session, keys: List[Tuple[uuid.UUID, str]], runs: int) -> Tuple[List[SeriesWindow], np.ndarray]:
+    """Read series into a (series, runs, metrics) array; rows arrive newest first and fill it from the end"""
+    windows = np.full((len(keys), runs, len(METRICS)), np.nan)
+    index = {key: position for position, key in enumerate(keys)}
+    series = [SeriesWindow(project_id, browser, [], [], set()) for project_id, browser in keys]
+    filled = [0] * len(keys)
+    seen_state = [False] * len(keys)
+
+    for row in db.execute(series_windows_statement(keys, runs)):
+        position = index[(row.project_id, row.browser)]
+        slot = runs - 1 - filled[position]
+        filled[position] += 1
+        window = series[position]
+        window.test_ids.insert(0, row.test_id)
+        window.recorded_at.insert(0, row.recorded_at)
+        # The newest recorded state before the run being scanned
+        if slot < runs - 1 and not seen_state[position] and row.regressions is not None:
+            window.ongoing = set(row.regressions)
+            seen_state[position] = True
+        windows[position, slot, :] = [
+            np.nan if getattr(row, name) is None else getattr(row, name) for name in METRIC_COLUMNS
+        ]
+    return series, windows
+
+
+def regression_severity(increase: float) -> IssueSeverity:
+    if increase >= 1.0:
+        return IssueSeverity.HIGH
+    if increase >= 0.5:
+        return IssueSeverity.MEDIUM
+    return IssueSeverity.LOW
+
+
+def _format(value: float, unit: str) -> str:
+    if unit == "ms":
+        return f"{value:,.0f} ms"
+    if unit == "bytes":
+        return f"{value / 1024:,.0f} KB"
+    return f"{value:,.3g}" if value < 10 else f"{value:,.0f}"
+
+
+def regression_issue(metric: Metric, window: SeriesWindow, baseline: float, spread: float, current: float, change_point: int) -> Dict[str, Any]:
+    """An ingestion issue record describing one regressed metric"""
+    increase = (current - baseline) / baseline if baseline else float("inf")
+    return {
+        "type": "issue",
+        "severity": regression_severity(increase).value,
+        "category": "performance",
+        "title": f"Performance regression: {metric.label}",
+        "description": (
+            f"{metric.label} rose from a baseline of {_format(baseline, metric.unit)} to "
+            f"{_format(current, metric.unit)} ({increase:+.0%}) over the last "
+            f"{settings.REGRESSION_RECENT_RUNS} {window.browser} runs"
+        ),
+        "recommendation": "Compare the page's changes around the first slow run",
+        "metadata": {
+            "regression": {
+                "metric": metric.name,
+                "browser": window.browser,
+                "baseline": round(baseline, 3),
+                "spread": round(spread, 3),
+                "current": round(current, 3),
+                "increase": round(increase, 4),
+                "change_point_test_id": str(window.test_ids[change_point]),
+                "change_point_at": window.recorded_at[change_point].isoformat(),
+            }
+        },
+    }
+
+
+def scan_regressions(db: Session, limit: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Scan up to limit pending runs and record regressions found in their
+    series; the caller commits. Returns (runs claimed, issues created).
+    """
+    limit = limit or settings.REGRESSION_BATCH_SIZE
+    claimed = db.execute(claim_pending_statement(limit)).all()
+    if not claimed:
+        return 0, 0
+
+    # Only series whose newest run was claimed here are tested; a series
+    # with a newer pending run is tested when that run is claimed
+    claimed_ids = {row.test_id for row in claimed}
+    keys = list(dict.fromkeys((row.project_id, row.browser) for row in claimed))
+    runs = settings.REGRESSION_BASELINE_RUNS + settings.REGRESSION_RECENT_RUNS
+    series, windows = load_windows(db, keys, runs)
+    scanned = [position for position, window in enumerate(series) if window.test_ids and window.test_ids[-1] in claimed_ids]
+    if not scanned:
+        return len(claimed), 0
+
+    detection = detect_regressions(
+        windows[scanned],
+        settings.REGRESSION_RECENT_RUNS,
+        settings.REGRESSION_MIN_BASELINE_RUNS,
+        settings.REGRESSION_Z_THRESHOLD,
+        settings.REGRESSION_MIN_INCREASE,
+        np.array([metric.min_delta for metric in METRICS]),
+    )
+
+    now = datetime.utcnow()
+    issues = 0
+    for row, position in enumerate(scanned):
+        window = series[position]
+        regressed = [metric for index, metric in enumerate(METRICS) if detection.regressed[row, index]]
+        test_id = window.test_ids[-1]
+        db.execute(
+            update(TestMetrics)
+            .where(TestMetrics.test_id == test_id)
+            .values(regressions=[metric.name for metric in regressed])
+        )
+
+        new = [metric for metric in regressed if metric.name not in window.ongoing]
+        if not new:
+            continue
+
+        batch = IngestBatch(test_id)
+        for metric in new:
+            index = METRICS.index(metric)
+            batch.add(regression_issue(
+                metric, window,
+                float(detection.baseline[row, index]),
+                float(detection.spread[row, index]),
+                float(detection.current[row, index]),
+                int(detection.change_point[row, index]) - (runs - len(window.test_ids)),
+            ), now)
+        for statement in batch.statements():
+            db.execute(statement)
+        db.execute(stale_reports_statement(test_id))
+        mark_stale(db, f"test:{test_id}", f"project:{window.project_id}")
+        issues += len(new)
+
+    return len(claimed), issues
@@ -0,0 +1,273 @@
+"""
+Test report rendering
+
+A report is a test's summary and issues rendered as JSON, HTML or PDF. It
+is rendered once per (test, format, TEMPLATE_VERSION) by the "reports"
+worker, written to UPLOAD_DIR/reports and served from there, so repeated
+downloads cost a file read. Bump TEMPLATE_VERSION when the output of a
+renderer changes; reports rendered with older templates are then rendered
+again on their next request. Reports of a test that gains issues after it
+finished (e.g. performance regressions) are marked stale and rendered
+again the same way.
+
+Issues are streamed from the database REPORT_FETCH_SIZE rows at a time
+(in the (test_id, severity, created_at, id) index order, so without a
+sort) and written out as they arrive, so a test with tens of thousands of
+issues renders in bounded memory. Output goes to a temporary file that is
+renamed into place once complete.
+"""
+import html
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+import orjson
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Issue, IssueSeverity, Project, Report, Test
+
+TEMPLATE_VERSION = 1
+
+REPORT_CONTENT_TYPES = {
+    "json": "application/json",
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+ISSUE_COLUMNS = (
+    Issue.id, Issue.severity, Issue.category, Issue.title, Issue.description,
+    Issue.url, Issue.element_selector, Issue.status, Issue.created_at,
+)
+
+
+def stale_reports_statement(test_id):
+    """Mark a test's rendered reports for rendering again; the caller commits"""
+    return (
+        update(Report)
+        .where(Report.test_id == test_id, Report.status != "pending")
+        .values(status="stale")
+    )
+
+
+def report_path(file_url: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, file_url)
+
+
+def report_file_url(report: Report) -> str:
+    return f"reports/{report.test_id}/{report.id}.{report.report_type}"
+
+
+def report_filename(report: Report) -> str:
+    return f"checkmate-report-{report.test_id}.{report.report_type}"
+
+
+def report_context(db: Session, test: Test) -> Dict[str, Any]:
+    """Everything a report shows besides the issue list"""
+    project = db.get(Project, test.project_id)
+    counts = dict(db.execute(
+        select(Issue.severity, func.count()).where(Issue.test_id == test.id).group_by(Issue.severity)
+    ).all())
+    results = test.results or {}
+    return {
+        "test_id": str(test.id),
+        "project": project.name if project else None,
+        "target_url": project.target_url if project else None,
+        "test_type": test.test_type,
+        "status": test.status.value if test.status else None,
+        "started_at": test.started_at.isoformat() if test.started_at else None,
+        "completed_at": test.completed_at.isoformat() if test.completed_at else None,
+        "duration_seconds": test.duration_seconds,
+        "browser": results.get("browser"),
+        "stats": results.get("stats") or {},
+        "cells": results.get("cells") or [],
+        "carried_over_from": results.get("carried_over_from"),
+        "error_message": test.error_message,
+        "issue_counts": {severity.value: counts.get(severity, 0) for severity in IssueSeverity},
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def iter_issues(db: Session, test_id) -> Iterator[Dict[str, Any]]:
+    """A test's issues, most severe first, fetched REPORT_FETCH_SIZE rows at a time"""
+    result = db.execute(
+        select(*ISSUE_COLUMNS)
+        .where(Issue.test_id == test_id)
+        .order_by(Issue.severity, Issue.created_at, Issue.id)
+        .execution_options(yield_per=settings.REPORT_FETCH_SIZE)
+    )
+    for row in result:
+        issue = row._asdict()
+        issue["id"] = str(issue["id"])
+        issue["severity"] = issue["severity"].value
+        issue["created_at"] = issue["created_at"].isoformat() if issue["created_at"] else None
+        yield issue
+
+
+class JsonReportWriter:
+    """{"report": {...}, "issues": [...]}, written one issue at a time"""
+
+    def __init__(self, file):
+        self.file = file
+        self.first = True
+
+    def begin(self, context: Dict[str, Any]):
+        self.file.write(b'{"report":' + orjson.dumps(context) + b',"issues":[')
+
+    def issue(self, issue: Dict[str, Any]):
+        self.file.write((b"" if self.first else b",") + orjson.dumps(issue))
+        self.first = False
+
+    def end(self):
+        self.file.write(b"]}")
+
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Checkmate report: {title}</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem; color: #1f2937; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 2rem; }}
+th, td {{ border: 1px solid #e5e7eb; padding: .4rem .6rem; text-align: left; vertical-align: top; }}
+th {{ background: #f9fafb; }}
+.critical {{ color: #b91c1c; }} .high {{ color: #c2410c; }} .medium {{ color: #a16207; }}
+.low {{ color: #2563eb; }} .info {{ color: #6b7280; }}
+</style>
+</head>
+<body>
+"""
+
+
+def _escape(value) -> str:
+    return html.escape("" if value is None else str(value))
+
+
+class HtmlReportWriter:
+    """A standalone HTML page; issue rows are written as they are read"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, text: str):
+        self.file.write(text.encode())
+
+    def begin(self, context: Dict[str, Any]):
+        self.write(HTML_HEAD.format(title=_escape(context["project"] or context["test_id"])))
+        self.write(f"<h1>{_escape(context['project'])}</h1>\n<p>{_escape(context['target_url'])}</p>\n<table>\n")
+        for label, key in (
+            ("Test", "test_id"), ("Type", "test_type"), ("Status", "status"), ("Browser", "browser"),
+            ("Started", "started_at"), ("Completed", "completed_at"), ("Duration (s)", "duration_seconds"),
+            ("Results carried over from", "carried_over_from"), ("Error", "error_message"),
+        ):
+            if context.get(key) is not None:
+                self.write(f"<tr><th>{label}</th><td>{_escape(context[key])}</td></tr>\n")
+        for key, value in context["stats"].items():
+            self.write(f"<tr><th>{_escape(key.replace('_', ' ').capitalize())}</th><td>{_escape(value)}</td></tr>\n")
+        self.write("</table>\n<h2>Issues</h2>\n<table>\n<tr>")
+        for severity in context["issue_counts"]:
+            self.write(f'<th class="{severity}">{severity.capitalize()}</th>')
+        self.write("</tr>\n<tr>")
+        for count in context["issue_counts"].values():
+            self.write(f"<td>{count}</td>")
+        self.write(
+            "</tr>\n</table>\n<table>\n"
+            "<tr><th>Severity</th><th>Category</th><th>Issue</th><th>Location</th><th>Status</th></tr>\n"
+        )
+
+    def issue(self, issue: Dict[str, Any]):
+        description = f"<br>{_escape(issue['description'])}" if issue["description"] else ""
+        location = _escape(issue["url"]) + (f"<br><code>{_escape(issue['element_selector'])}</code>" if issue["element_selector"] else "")
+        self.write(
+            f'<tr><td class="{_escape(issue["severity"])}">{_escape(issue["severity"])}</td><td>{_escape(issue["category"])}</td>'
+            f"<td><strong>{_escape(issue['title'])}</strong>{description}</td><td>{location}</td><td>{_escape(issue['status'])}</td></tr>\n"
+        )
+
+    def end(self):
+        self.write(f"</table>\n<p><small>Generated {datetime.utcnow():%Y-%m-%d %H:%M} UTC</small></p>\n</body>\n</html>\n")
+
+
+class PdfReportWriter:
+    """A plain A4 document laid out line by line with reportlab"""
+
+    MARGIN = 50
+    LEADING = 13
+
+    def __init__(self, file):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen.canvas import Canvas
+
+        self.width, self.height = A4
+        self.canvas = Canvas(file, pagesize=A4)
+        self.y = self.height - self.MARGIN
+
+    def line(self, text: str, font: str = "Helvetica", size: int = 10, indent: int = 0):
+        from reportlab.lib.utils import simpleSplit
+
+        width = self.width - 2 * self.MARGIN - indent
+        for part in simpleSplit(text, font, size, width) or [""]:
+            if self.y < self.MARGIN:
+                self.canvas.showPage()
+                self.y = self.height - self.MARGIN
+            self.canvas.setFont(font, size)
+            self.canvas.drawString(self.MARGIN + indent, self.y, part)
+            self.y -= self.LEADING
+
+    def begin(self, context: Dict[str, Any]):
+        self.canvas.setTitle(f"Checkmate report: {context['project'] or context['test_id']}")
+        self.line(context["project"] or "Test report", "Helvetica-Bold", 16)
+        self.line(context["target_url"] or "")
+        self.y -= self.LEADING
+        for label, key in (
+            ("Test", "test_id"), ("Type", "test_type"), ("Status", "status"), ("Browser", "browser"),
+            ("Completed", "completed_at"), ("Duration (s)", "duration_seconds"), ("Error", "error_message"),
+        ):
+            if context.get(key) is not None:
+                self.line(f"{label}: {context[key]}")
+        for key, value in context["stats"].items():
+            self.line(f"{key.replace('_', ' ').capitalize()}: {value}")
+        self.y -= self.LEADING
+        self.line("Issues", "Helvetica-Bold", 13)
+        self.line("   ".join(f"{severity}: {count}" for severity, count in context["issue_counts"].items()))
+        self.y -= self.LEADING
+
+    def issue(self, issue: Dict[str, Any]):
+        self.line(f"[{issue['severity'].upper()}] {issue['title']}", "Helvetica-Bold")
+        self.line(f"{issue['category']} | {issue['status']} | {issue['url'] or ''}", size=9, indent=12)
+        if issue["description"]:
+            self.line(issue["description"], size=9, indent=12)
+        self.y -= self.LEADING / 2
+
+    def end(self):
+        self.canvas.save()
+
+
+REPORT_WRITERS = {"json": JsonReportWriter, "html": HtmlReportWriter, "pdf": PdfReportWriter}
+
+
+def render_report(db: Session, report: Report) -> Optional[int]:
+    """
+    Render a report to its file under UPLOAD_DIR and return its size, or
+    None if its test is gone. The caller records the outcome on the row.
+    """
+    test = db.get(Test, report.test_id)
+    if test is None:
+        return None
+
+    path = report_path(report_file_url(report))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.partial"
+    try:
+        with open(partial, "wb") as file:
+            writer = REPORT_WRITERS[report.report_type](file)
+            writer.begin(report_context(db, test))
+            for issue in iter_issues(db, test.id):
+                writer.issue(issue)
+            writer.end()
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return os.path.getsize(path)
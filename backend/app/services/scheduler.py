@@ -0,0 +1,240 @@
+"""
+Recurring test schedules
+
+A project's schedule lives in its test_config under "schedule":
+
+    {"cron": "0 3 * * *", "test_type": "full", "timezone": "Europe/Berlin",
+     "catch_up": "skip", "config": {...}}
+
+Project.next_run_at holds the next firing time (including the project's
+jitter) and is indexed, so each tick reads only the due projects in time
+order instead of scanning every schedule. Due rows are claimed with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of scheduler processes can
+tick concurrently without firing a run twice; the unique
+(project_id, scheduled_for) index on tests backs that up.
+
+Each project gets a fixed jitter of up to SCHEDULER_MAX_JITTER_SECONDS,
+derived from its id, so thousands of "0 * * * *" schedules don't all fire
+on the same second.
+
+Runs missed while the scheduler was down (more than
+SCHEDULER_MISFIRE_GRACE_SECONDS late) follow the schedule's catch_up policy:
+
+    skip   drop missed runs and wait for the next one (default)
+    once   run once now for all missed runs
+    all    run every missed run, up to SCHEDULER_MAX_CATCH_UP_RUNS
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from croniter import croniter
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import mark_stale
+from app.db.models import Project, Test, TestStatus
+from app.services.matrix import matrix_cells
+from app.workers.celery_app import TEST_TYPES
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = "schedule"
+CATCH_UP_POLICIES = ("skip", "once", "all")
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """A validated project schedule"""
+    cron: str
+    test_type: str = "full"
+    timezone: str = "UTC"
+    catch_up: str = "skip"
+    config: Optional[Dict[str, Any]] = field(default=None, hash=False)
+
+    @property
+    def tz(self) -> ZoneInfo:
+        return ZoneInfo(self.timezone)
+
+    def _iter(self, start: datetime) -> croniter:
+        return croniter(self.cron, start.replace(tzinfo=timezone.utc).astimezone(self.tz))
+
+    def next_after(self, after: datetime) -> datetime:
+        """The first nominal firing time after a naive UTC time, as naive UTC"""
+        return _naive_utc(self._iter(after).get_next(datetime))
+
+    def fired_between(self, since: datetime, before: datetime, limit: int) -> List[datetime]:
+        """Up to limit most recent firing times in [since, before), oldest first"""
+        times = []
+        iterator = self._iter(before)
+        while len(times) < limit:
+            fire = _naive_utc(iterator.get_prev(datetime))
+            if fire < since:
+                break
+            times.append(fire)
+        return times[::-1]
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_schedule(test_config: Optional[dict]) -> Optional[Schedule]:
+    """The schedule in a project's test_config, or None; raises ValueError if invalid"""
+    raw = (test_config or {}).get(SCHEDULE_KEY)
+    if not raw:
+        return None
+    if not isinstance(raw, dict) or not isinstance(raw.get("cron"), str):
+        raise ValueError("schedule must be an object with a cron expression")
+    if raw.get("enabled") is False:
+        return None
+
+    schedule = Schedule(
+        cron=raw["cron"].strip(),
+        test_type=raw.get("test_type", "full"),
+        timezone=raw.get("timezone", "UTC"),
+        catch_up=raw.get("catch_up", "skip"),
+        config=raw.get("config"),
+    )
+
+    if not croniter.is_valid(schedule.cron):
+        raise ValueError(f"Invalid cron expression: {schedule.cron}")
+    if schedule.test_type not in TEST_TYPES:
+        raise ValueError(f"Unknown test type: {schedule.test_type}")
+    if schedule.catch_up not in CATCH_UP_POLICIES:
+        raise ValueError(f"catch_up must be one of: {', '.join(CATCH_UP_POLICIES)}")
+    try:
+        schedule.tz
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {schedule.timezone}")
+
+    matrix_cells(schedule.test_type, schedule.config)
+
+    first = schedule.next_after(datetime.utcnow())
+    if (schedule.next_after(first) - first).total_seconds() < settings.SCHEDULER_MIN_INTERVAL_SECONDS:
+        raise ValueError(f"Schedules may run at most every {settings.SCHEDULER_MIN_INTERVAL_SECONDS} seconds")
+    return schedule
+
+
+def jitter_for(project_id) -> timedelta:
+    """A project's fixed offset from its nominal firing times"""
+    if not settings.SCHEDULER_MAX_JITTER_SECONDS:
+        return timedelta(0)
+    return timedelta(seconds=uuid.UUID(str(project_id)).int % (settings.SCHEDULER_MAX_JITTER_SECONDS + 1))
+
+
+def sync_project_schedule(project: Project) -> None:
+    """Recompute next_run_at after a project's schedule or status changed; raises ValueError"""
+    schedule = parse_schedule(project.test_config)
+    if schedule is None or (project.status or "active") != "active":
+        project.next_run_at = None
+        return
+    # New projects have no id before the flush
+    if project.id is None:
+        project.id = uuid.uuid4()
+    project.next_run_at = schedule.next_after(datetime.utcnow()) + jitter_for(project.id)
+
+
+def runs_due(schedule: Schedule, nominal: datetime, jitter: timedelta, now: datetime) -> Tuple[List[datetime], datetime]:
+    """
+    Nominal times to run now, per the catch-up policy, and the next nominal
+    firing time after now. nominal is the due firing time (<= now).
+    """
+    next_fire = schedule.next_after(now)
+    missed = schedule.fired_between(nominal, next_fire, settings.SCHEDULER_MAX_CATCH_UP_RUNS) or [nominal]
+
+    latest = missed[-1]
+    on_time = (now - (latest + jitter)).total_seconds() <= settings.SCHEDULER_MISFIRE_GRACE_SECONDS
+    if schedule.catch_up == "all":
+        runs = missed
+    elif schedule.catch_up == "once" or on_time:
+        runs = [latest]
+    else:
+        runs = []
+    return runs, next_fire
+
+
+def fire_due_schedules(db: Session, now: Optional[datetime] = None) -> Tuple[int, List[Tuple[str, str, str, Optional[dict]]]]:
+    """
+    Claim one batch of due schedules, create their tests and advance them
+
+    Returns the number of schedules claimed and the run_test_job arguments
+    of the created tests; the caller queues them after the transaction
+    commits.
+    """
+    now = now or datetime.utcnow()
+    projects = Project.__table__
+
+    due = db.execute(
+        select(Project.id, Project.user_id, Project.target_url, Project.test_config, Project.next_run_at)
+        .where(Project.next_run_at <= now, Project.status == "active")
+        .order_by(Project.next_run_at)
+        .limit(settings.SCHEDULER_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not due:
+        return 0, []
+
+    # A project whose previous scheduled run is still going skips this one
+    busy = set(db.scalars(
+        select(Test.project_id).where(
+            Test.project_id.in_([row.id for row in due]),
+            Test.scheduled_for.isnot(None),
+            Test.status.in_((TestStatus.PENDING, TestStatus.RUNNING))
+        )
+    ))
+
+    new_tests, advanced, jobs = [], [], {}
+    for row in due:
+        # next_run_at is part of the project response
+        mark_stale(db, f"project:{row.id}", f"projects:{row.user_id}")
+        try:
+            schedule = parse_schedule(row.test_config)
+        except ValueError as exc:
+            logger.warning("Disabling invalid schedule of project %s: %s", row.id, exc)
+            schedule = None
+        if schedule is None:
+            advanced.append({"b_id": row.id, "b_next_run_at": None})
+            continue
+
+        jitter = jitter_for(row.id)
+        runs, next_fire = runs_due(schedule, row.next_run_at - jitter, jitter, now)
+        advanced.append({"b_id": row.id, "b_next_run_at": next_fire + jitter})
+
+        if row.id in busy:
+            logger.info("Skipping scheduled run of project %s; the previous run is still active", row.id)
+            continue
+        for scheduled_for in runs:
+            test_id = uuid.uuid4()
+            new_tests.append({
+                "id": test_id,
+                "project_id": row.id,
+                "test_type": schedule.test_type,
+                "status": TestStatus.PENDING,
+                "scheduled_for": scheduled_for,
+                "created_at": now,
+            })
+            jobs[test_id] = (str(test_id), row.target_url, schedule.test_type, schedule.config)
+
+    created = []
+    if new_tests:
+        # Another scheduler may already have fired a run (e.g. after a restore)
+        created = db.scalars(
+            insert(Test.__table__).values(new_tests)
+            .on_conflict_do_nothing(index_elements=["project_id", "scheduled_for"])
+            .returning(Test.__table__.c.id)
+        ).all()
+
+    # Core UPDATE: keeps updated_at, which tracks user edits
+    db.execute(
+        update(projects)
+        .where(projects.c.id == bindparam("b_id"))
+        .values(next_run_at=bindparam("b_next_run_at"), updated_at=projects.c.updated_at),
+        advanced
+    )
+    return len(due), [jobs[test_id] for test_id in created]
@@ -0,0 +1,414 @@
+"""
+Webhook delivery
+
+Events go through an outbox: webhook_event_statement records an event in
+webhook_events, with one webhook_deliveries row per subscribed webhook, in
+the same transaction as the change it describes (a completed test or an
+ingested batch of issues). Nothing is sent on the request path, and a
+crash after the commit loses nothing.
+
+WebhookDispatcher (run by app.workers.webhooks) delivers the outbox:
+
+- due deliveries are claimed with SELECT ... FOR UPDATE SKIP LOCKED and
+  leased for WEBHOOK_LEASE_SECONDS, so several dispatchers can run side by
+  side and a crashed dispatcher's deliveries are picked up again;
+- a webhook's claimed events are sent together, up to
+  WEBHOOK_MAX_BATCH_EVENTS per request; issue_found deliveries wait
+  WEBHOOK_COALESCE_SECONDS first, so a burst of issues arrives as one batch;
+- all requests share one keep-alive httpx.AsyncClient, with at most
+  WEBHOOK_PER_HOST_CONCURRENCY requests in flight per host;
+- failures are retried with exponential backoff and jitter; deliveries are
+  dead after WEBHOOK_MAX_ATTEMPTS;
+- a webhook's host must resolve to public addresses only, checked when the
+  webhook is created and again before every request, which then connects
+  to the checked address (so a rebinding DNS answer can't redirect it) and
+  follows no redirects; webhooks can't reach internal services or cloud
+  metadata;
+- after WEBHOOK_CIRCUIT_FAILURES consecutive failed requests a webhook's
+  circuit opens and it gets nothing for a cooldown, doubling with each
+  further failure up to WEBHOOK_CIRCUIT_MAX_COOLDOWN_SECONDS.
+
+Receivers get:
+
+    POST <url>
+    X-Checkmate-Delivery: <request id>
+
+    {"webhook_id": "...", "events": [
+        {"id": "...", "event": "issue_found", "created_at": "...", "data": {...}}
+    ]}
+
+Delivery is at least once; receivers should deduplicate by event id.
+"""
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+import orjson
+from sqlalchemy import bindparam, cast, delete, exists, func, literal, or_, select, true, update
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.models import Project, Test, Webhook, WebhookDelivery, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENTS = ("test_completed", "issue_found")
+
+# Events whose deliveries wait a moment, so bursts are sent together
+COALESCED_EVENTS = ("issue_found",)
+
+
+def webhook_event_statement(event: str, test_id, data: Dict[str, Any]):
+    """
+    One INSERT recording an event about a test for every active webhook of
+    the test's owner subscribed to it (for all projects or the test's);
+    records nothing when there are no subscribers. The caller commits.
+    """
+    now = datetime.utcnow()
+    due = now + timedelta(seconds=settings.WEBHOOK_COALESCE_SECONDS if event in COALESCED_EVENTS else 0)
+
+    subscribers = (
+        select(Webhook.id)
+        .join(Project, Project.user_id == Webhook.user_id)
+        .join(Test, Test.project_id == Project.id)
+        .where(
+            Test.id == test_id,
+            Webhook.is_active.is_(True),
+            or_(Webhook.project_id.is_(None), Webhook.project_id == Project.id),
+            Webhook.events.contains([event])
+        )
+        .cte("subscribers")
+    )
+    recorded = (
+        WebhookEvent.__table__.insert()
+        .from_select(
+            ["id", "event", "payload", "created_at"],
+            select(
+                literal(uuid.uuid4(), UUID(as_uuid=True)),
+                literal(event),
+                cast(literal(data, JSONB), JSONB),
+                literal(now),
+            ).where(exists(select(subscribers.c.id)))
+        )
+        .returning(WebhookEvent.__table__.c.id)
+        .cte("recorded")
+    )
+    return WebhookDelivery.__table__.insert().from_select(
+        ["id", "event_id", "webhook_id", "status", "attempts", "next_attempt_at", "created_at"],
+        select(
+            func.gen_random_uuid(),
+            recorded.c.id,
+            subscribers.c.id,
+            literal("pending"),
+            literal(0),
+            literal(due),
+            literal(now),
+        ).select_from(recorded.join(subscribers, true()))
+    )
+
+
+@dataclass
+class ClaimedDelivery:
+    """A delivery leased to this dispatcher"""
+    id: uuid.UUID
+    webhook_id: uuid.UUID
+    url: str
+    attempts: int
+    consecutive_failures: int
+    event_id: uuid.UUID
+    event: str
+    payload: Dict[str, Any]
+    created_at: datetime
+
+
+@dataclass
+class DeliveryBatch:
+    """Deliveries sent to one webhook in one request"""
+    webhook_id: uuid.UUID
+    url: str
+    consecutive_failures: int
+    deliveries: List[ClaimedDelivery] = field(default_factory=list)
+
+    def body(self) -> bytes:
+        return orjson.dumps({
+            "webhook_id": str(self.webhook_id),
+            "events": [
+                {
+                    "id": str(delivery.event_id),
+                    "event": delivery.event,
+                    "created_at": delivery.created_at.isoformat(),
+                    "data": delivery.payload,
+                }
+                for delivery in self.deliveries
+            ],
+        })
+
+
+@dataclass
+class BatchOutcome:
+    ok: bool
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+
+def batch_deliveries(claimed: List[ClaimedDelivery]) -> List[DeliveryBatch]:
+    """Group claimed deliveries per webhook, WEBHOOK_MAX_BATCH_EVENTS per request"""
+    batches: List[DeliveryBatch] = []
+    open_batches: Dict[uuid.UUID, DeliveryBatch] = {}
+    for delivery in claimed:
+        batch = open_batches.get(delivery.webhook_id)
+        if batch is None or len(batch.deliveries) >= settings.WEBHOOK_MAX_BATCH_EVENTS:
+            batch = open_batches[delivery.webhook_id] = DeliveryBatch(
+                delivery.webhook_id, delivery.url, delivery.consecutive_failures
+            )
+            batches.append(batch)
+        batch.deliveries.append(delivery)
+    return batches
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter after a delivery's nth failed attempt"""
+    delay = min(settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.WEBHOOK_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def circuit_cooldown(failures: int) -> Optional[timedelta]:
+    """How long a webhook's circuit stays open after n consecutive failures, if it opens"""
+    if failures < settings.WEBHOOK_CIRCUIT_FAILURES:
+        return None
+    doublings = min(failures - settings.WEBHOOK_CIRCUIT_FAILURES, 16)
+    seconds = min(settings.WEBHOOK_CIRCUIT_COOLDOWN_SECONDS * 2 ** doublings, settings.WEBHOOK_CIRCUIT_MAX_COOLDOWN_SECONDS)
+    return timedelta(seconds=seconds)
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable (not private, loopback, link-local, reserved...)"""
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_webhook_url(url: str) -> Optional[str]:
+    """
+    Raise ValueError unless every address the URL's host resolves to is
+    public; returns one of them to connect to (None if the check is disabled)
+    """
+    if settings.WEBHOOK_ALLOW_PRIVATE_ADDRESSES:
+        return None
+
+    parts = urlsplit(url)
+    if not parts.hostname:
+        raise ValueError("Webhook URL has no host")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as exc:
+        raise ValueError(f"Webhook host {parts.hostname} does not resolve") from exc
+
+    if not addresses or not all(is_public_address(sockaddr[0]) for *_, sockaddr in addresses):
+        raise ValueError(f"Webhook host {parts.hostname} resolves to a non-public address")
+    return addresses[0][4][0]
+
+
+def make_webhook_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        ),
+        headers={"User-Agent": "CheckmateWebhooks/1.0", "Content-Type": "application/json"},
+        follow_redirects=False,
+    )
+
+
+class WebhookDispatcher:
+    """Delivers the webhook outbox over a shared connection pool"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or make_webhook_client()
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def send(self, batch: DeliveryBatch) -> BatchOutcome:
+        """POST a batch, waiting for a free slot on its host"""
+        host = urlsplit(batch.url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(settings.WEBHOOK_PER_HOST_CONCURRENCY)
+
+        async with slots:
+            try:
+                # The host may resolve differently than when the webhook was created
+                address = await check_webhook_url(batch.url)
+            except ValueError as exc:
+                return BatchOutcome(ok=False, error=str(exc))
+            url = httpx.URL(batch.url)
+            headers = {"X-Checkmate-Delivery": str(uuid.uuid4())}
+            extensions = {}
+            if address is not None:
+                # Connect to the address just checked, not whatever the host resolves to next;
+                # Host and TLS server name (SNI and certificate check) stay the webhook's host
+                headers["Host"] = url.netloc.decode("ascii")
+                extensions["sni_hostname"] = url.host
+                url = url.copy_with(host=address)
+            try:
+                response = await self.client.post(
+                    url, content=batch.body(), headers=headers, extensions=extensions
+                )
+            except httpx.HTTPError as exc:
+                return BatchOutcome(ok=False, error=f"{type(exc).__name__}: {exc}"[:1000])
+
+        if response.is_success:
+            return BatchOutcome(ok=True, status_code=response.status_code)
+        return BatchOutcome(ok=False, status_code=response.status_code, error=f"HTTP {response.status_code}")
+
+    async def claim(self, now: datetime) -> List[ClaimedDelivery]:
+        """Lease up to WEBHOOK_CLAIM_BATCH_SIZE due deliveries of webhooks whose circuit is closed"""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(
+                    WebhookDelivery.id, WebhookDelivery.webhook_id, Webhook.url, WebhookDelivery.attempts,
+                    Webhook.consecutive_failures, WebhookEvent.id.label("event_id"), WebhookEvent.event,
+                    WebhookEvent.payload, WebhookEvent.created_at
+                )
+                .join(Webhook, Webhook.id == WebhookDelivery.webhook_id)
+                .join(WebhookEvent, WebhookEvent.id == WebhookDelivery.event_id)
+                .where(
+                    WebhookDelivery.status == "pending",
+                    WebhookDelivery.next_attempt_at <= now,
+                    Webhook.is_active.is_(True),
+                    or_(Webhook.circuit_open_until.is_(None), Webhook.circuit_open_until <= now)
+                )
+                .order_by(WebhookDelivery.next_attempt_at)
+                .limit(settings.WEBHOOK_CLAIM_BATCH_SIZE)
+                .with_for_update(of=WebhookDelivery, skip_locked=True)
+            )).all()
+
+            if rows:
+                await db.execute(
+                    update(WebhookDelivery)
+                    .where(WebhookDelivery.id.in_([row.id for row in rows]))
+                    .values(next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS))
+                )
+            await db.commit()
+        return [ClaimedDelivery(**row._asdict()) for row in rows]
+
+    async def record(self, batch: DeliveryBatch, outcome: BatchOutcome):
+        """Store a batch's outcome on its deliveries and its webhook's circuit"""
+        now = datetime.utcnow()
+        deliveries = WebhookDelivery.__table__
+
+        async with AsyncSessionLocal() as db:
+            if outcome.ok:
+                await db.execute(
+                    update(WebhookDelivery)
+                    .where(WebhookDelivery.id.in_([delivery.id for delivery in batch.deliveries]))
+                    .values(
+                        status="delivered", attempts=WebhookDelivery.attempts + 1, delivered_at=now,
+                        last_status_code=outcome.status_code, last_error=None
+                    )
+                )
+                if batch.consecutive_failures:
+                    await db.execute(
+                        update(Webhook).where(Webhook.id == batch.webhook_id)
+                        .values(consecutive_failures=0, circuit_open_until=None)
+                    )
+            else:
+                retries = []
+                for delivery in batch.deliveries:
+                    attempts = delivery.attempts + 1
+                    dead = attempts >= settings.WEBHOOK_MAX_ATTEMPTS
+                    retries.append({
+                        "b_id": delivery.id,
+                        "b_status": "dead" if dead else "pending",
+                        "b_attempts": attempts,
+                        "b_next_attempt_at": now if dead else now + retry_delay(attempts),
+                    })
+                await db.execute(
+                    update(deliveries)
+                    .where(deliveries.c.id == bindparam("b_id"))
+                    .values(
+                        status=bindparam("b_status"), attempts=bindparam("b_attempts"),
+                        next_attempt_at=bindparam("b_next_attempt_at"),
+                        last_status_code=outcome.status_code, last_error=outcome.error
+                    ),
+                    retries
+                )
+
+                failures = batch.consecutive_failures + 1
+                cooldown = circuit_cooldown(failures)
+                await db.execute(
+                    update(Webhook).where(Webhook.id == batch.webhook_id)
+                    .values(
+                        consecutive_failures=Webhook.consecutive_failures + 1,
+                        circuit_open_until=now + cooldown if cooldown else Webhook.circuit_open_until
+                    )
+                )
+                if cooldown:
+                    logger.warning("Webhook %s failed %d times in a row; pausing it for %s", batch.webhook_id, failures, cooldown)
+            await db.commit()
+
+    async def deliver(self, batch: DeliveryBatch):
+        outcome = await self.send(batch)
+        try:
+            await self.record(batch, outcome)
+        except Exception:
+            # The lease runs out and the batch is sent again
+            logger.exception("Could not record delivery outcome for webhook %s", batch.webhook_id)
+
+    async def prune(self):
+        """Drop events (and their deliveries) older than WEBHOOK_RETENTION_DAYS"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.WEBHOOK_RETENTION_DAYS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(WebhookEvent).where(WebhookEvent.created_at < cutoff))
+            await db.commit()
+
+    async def run(self, stop: asyncio.Event):
+        """Claim and deliver until stop is set, then finish in-flight requests"""
+        last_prune = 0.0
+        while not stop.is_set():
+            if time.monotonic() - last_prune > settings.WEBHOOK_PRUNE_INTERVAL_SECONDS:
+                last_prune = time.monotonic()
+                try:
+                    await self.prune()
+                except Exception:
+                    logger.exception("Pruning the webhook outbox failed")
+
+            if len(self._in_flight) >= settings.WEBHOOK_MAX_IN_FLIGHT:
+                await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            try:
+                claimed = await self.claim(datetime.utcnow())
+            except Exception:
+                logger.exception("Claiming webhook deliveries failed")
+                claimed = []
+
+            for batch in batch_deliveries(claimed):
+                task = asyncio.create_task(self.deliver(batch))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+            if not claimed:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.WEBHOOK_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+        if self._in_flight:
+            await asyncio.wait(self._in_flight)
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,82 @@
+"""
+Celery application for background test execution
+"""
+from celery import Celery
+from kombu import Queue
+
+from app.core.config import settings
+
+# Test types with a dedicated queue, so slow suites can't starve fast ones
+TEST_TYPES = ("full", "auth", "performance", "security", "ui")
+DEFAULT_TEST_QUEUE = "tests.full"
+
+# Celery message priority of tests started one at a time (0 is highest)
+INTERACTIVE_TEST_PRIORITY = 0
+
+# Thumbnails and poster frames, on their own prefork worker
+MEDIA_QUEUE = "media"
+
+# Report rendering, served by the media worker
+REPORTS_QUEUE = "reports"
+
+# Performance regression scans, sent by celery beat and served by the media worker
+REGRESSIONS_QUEUE = "regressions"
+
+# Scheduler ticks, sent by celery beat
+SCHEDULER_QUEUE = "scheduler"
+
+
+def queue_for_test_type(test_type: str) -> str:
+    """Get the queue name a test type is routed to"""
+    if test_type in TEST_TYPES:
+        return f"tests.{test_type}"
+    return DEFAULT_TEST_QUEUE
+
+
+celery_app = Celery(
+    "checkmate",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=[
+        "app.workers.tasks", "app.workers.media", "app.workers.reports",
+        "app.workers.scheduler", "app.workers.regressions",
+    ],
+)
+
+celery_app.conf.update(
+    task_queues=[Queue(queue_for_test_type(test_type)) for test_type in TEST_TYPES] + [
+        Queue(MEDIA_QUEUE), Queue(REPORTS_QUEUE), Queue(REGRESSIONS_QUEUE), Queue(SCHEDULER_QUEUE)
+    ],
+    task_default_queue=DEFAULT_TEST_QUEUE,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # A job is only acknowledged once it finishes, so a crashed worker's
+    # job is redelivered instead of lost
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    # Redis emulates priorities with one list per step; lower numbers are
+    # consumed first, so batch tests (TEST_BATCH_PRIORITY) yield to
+    # interactive ones (INTERACTIVE_TEST_PRIORITY)
+    broker_transport_options={"priority_steps": list(range(10)), "sep": ":"},
+    task_default_priority=INTERACTIVE_TEST_PRIORITY,
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    task_time_limit=settings.TEST_JOB_TIME_LIMIT,
+    # Run tasks in-process (with a memory:// broker) for local testing
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+    # Safe to run on several hosts; ticks claim due schedules with SKIP LOCKED
+    beat_schedule={
+        "scheduler-tick": {
+            "task": "scheduler.tick",
+            "schedule": settings.SCHEDULER_TICK_SECONDS,
+            "options": {"queue": SCHEDULER_QUEUE, "expires": settings.SCHEDULER_TICK_SECONDS},
+        },
+        "regressions-scan": {
+            "task": "regressions.scan",
+            "schedule": settings.REGRESSION_SCAN_SECONDS,
+            "options": {"queue": REGRESSIONS_QUEUE, "expires": settings.REGRESSION_SCAN_SECONDS},
+        },
+    },
+)
@@ -0,0 +1,42 @@
+"""
+Celery task for media post-processing
+
+Runs on the "media" queue, served by a prefork (process pool) worker so
+image decoding and ffmpeg never compete with API requests or test jobs.
+"""
+import logging
+
+from app.db.session import SessionLocal
+from app.db.models import MediaUpload
+from app.services.media import make_thumbnail
+from app.workers.celery_app import MEDIA_QUEUE, celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="media.process", acks_late=True)
+def process_media(upload_id: str):
+    """Generate the thumbnail or poster frame of a completed upload"""
+    db = SessionLocal()
+    try:
+        upload = db.get(MediaUpload, upload_id)
+        if upload is None or upload.sha256 is None:
+            return
+
+        try:
+            make_thumbnail(upload.kind, upload.sha256)
+            upload.has_thumbnail = True
+        except Exception as exc:
+            # The media itself is still usable without a thumbnail
+            logger.warning("Thumbnail for upload %s failed: %s", upload_id, exc)
+            upload.error_message = f"Thumbnail generation failed: {exc}"
+
+        upload.status = "ready"
+        db.commit()
+    finally:
+        db.close()
+
+
+def enqueue_media_processing(upload_id: str):
+    """Queue thumbnail generation for a completed upload"""
+    process_media.apply_async(args=[upload_id], queue=MEDIA_QUEUE)
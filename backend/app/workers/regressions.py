@@ -0,0 +1,42 @@
+"""
+Celery task scanning new performance measurements for regressions
+
+celery beat sends a scan every REGRESSION_SCAN_SECONDS on the
+"regressions" queue, served by the prefork media worker. A scan works
+through pending runs a batch at a time (see app.services.regressions);
+batches are claimed with SKIP LOCKED, so overlapping scans split the work.
+"""
+import logging
+import time
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.regressions import scan_regressions
+from app.workers.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="regressions.scan", ignore_result=True)
+def regressions_scan():
+    """Scan pending runs, a batch per transaction, within one scan interval"""
+    if not settings.REGRESSIONS_ENABLED:
+        return
+
+    deadline = time.monotonic() + settings.REGRESSION_SCAN_SECONDS
+    scanned = issues = 0
+    while time.monotonic() < deadline:
+        db = SessionLocal()
+        try:
+            claimed, found = scan_regressions(db)
+            db.commit()
+        finally:
+            db.close()
+
+        scanned += claimed
+        issues += found
+        if claimed < settings.REGRESSION_BATCH_SIZE:
+            break
+
+    if scanned:
+        logger.info("Regression scan checked %d runs, reported %d regressions", scanned, issues)
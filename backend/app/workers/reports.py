@@ -0,0 +1,52 @@
+"""
+Celery task for report rendering
+
+Runs on the "reports" queue, served by the prefork media worker, so
+rendering large reports never competes with API requests or test jobs.
+"""
+import logging
+from datetime import datetime
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.models import Report
+from app.services.reports import render_report, report_file_url
+from app.workers.celery_app import REPORTS_QUEUE, celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="reports.render", acks_late=True, time_limit=settings.REPORT_RENDER_TIME_LIMIT)
+def render(report_id: str):
+    """Render a pending report and record the outcome"""
+    db = SessionLocal()
+    try:
+        report = db.get(Report, report_id)
+        if report is None or report.status != "pending":
+            return
+
+        try:
+            size = render_report(db, report)
+        except Exception as exc:
+            logger.exception("Rendering report %s failed", report_id)
+            db.rollback()
+            report.status = "failed"
+            report.error_message = f"Report rendering failed: {exc}"
+            db.commit()
+            return
+        if size is None:
+            return
+
+        report.status = "ready"
+        report.file_url = report_file_url(report)
+        report.size = size
+        report.error_message = None
+        report.generated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def enqueue_report(report_id: str):
+    """Queue rendering of a pending report"""
+    render.apply_async(args=[report_id], queue=REPORTS_QUEUE)
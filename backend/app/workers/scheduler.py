@@ -0,0 +1,69 @@
+"""
+Celery task driving recurring test schedules
+
+celery beat sends a tick every SCHEDULER_TICK_SECONDS. A tick claims due
+schedules in batches (see app.services.scheduler), commits the new tests
+and only then queues them, so a rolled-back batch never starts a run.
+Tests that cannot be queued are failed, so the project's next run is not
+skipped as still active.
+"""
+import logging
+import time
+
+from kombu.exceptions import OperationalError
+
+from app.core.config import settings
+from app.core.response_cache import mark_stale
+from app.db.session import SessionLocal
+from app.services.analytics import rollup_test_statement
+from app.services.scheduler import fire_due_schedules
+from app.workers.celery_app import celery_app
+from app.workers.tasks import enqueue_test_batch, fail_unqueued_tests_statement
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="scheduler.tick", ignore_result=True)
+def scheduler_tick():
+    """Fire every due schedule, a batch at a time, within one tick's time"""
+    if not settings.SCHEDULER_ENABLED:
+        return
+
+    deadline = time.monotonic() + settings.SCHEDULER_TICK_SECONDS
+    fired = 0
+    while time.monotonic() < deadline:
+        db = SessionLocal()
+        try:
+            claimed, jobs = fire_due_schedules(db)
+            db.commit()
+        finally:
+            db.close()
+
+        if jobs:
+            try:
+                enqueue_test_batch(jobs)
+            except OperationalError as exc:
+                logger.error("Could not queue %d scheduled tests: %s", len(jobs), exc)
+                fail_unqueued_tests([test_id for test_id, *_ in jobs])
+                break
+            fired += len(jobs)
+        # A short batch means nothing else is due (or other ticks hold the rest)
+        if claimed < settings.SCHEDULER_BATCH_SIZE:
+            break
+
+    if fired:
+        logger.info("Scheduler started %d tests", fired)
+
+
+def fail_unqueued_tests(test_ids):
+    """Fail scheduled tests that could not be queued"""
+    db = SessionLocal()
+    try:
+        failed = db.execute(fail_unqueued_tests_statement(test_ids)).all()
+        for row in failed:
+            db.execute(rollup_test_statement(row.id))
+            # Bulk UPDATE: skips the ORM hooks that invalidate cached responses
+            mark_stale(db, f"test:{row.id}", f"project:{row.project_id}")
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,458 @@
+"""
+Background test execution tasks
+
+Run a worker with:
+    celery -A app.workers.celery_app worker --pool threads \
+        -Q tests.full,tests.auth,tests.performance,tests.security,tests.ui
+
+The threads pool lets every job in the worker share one warm bot-engine pool.
+"""
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from celery import chord, group
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.models import Test, TestStatus
+from app.services.analytics import load_time_ms, rollup_test_statement
+from app.services.artifacts import ArtifactRef, get_artifact_store
+from app.services.bot_engine import BotEngineUnavailable, get_bot_engine_pool
+from app.services.ingestion import ingest_chunk_sync
+from app.services.issue_index import resolve_issues_statement
+from app.services.regressions import performance_metrics, record_metrics_statement
+from app.services.matrix import matrix_cells, merge_cells
+from app.services.fingerprints import (
+    Fingerprint, as_fingerprints, carry_forward, config_digest, fingerprint_site, incremental_requested,
+    load_fingerprints, reusable_test, save_fingerprints
+)
+from app.services.events import ISSUE_EVENT, PROGRESS_EVENT, STATUS_EVENT, publish_test_event
+from app.services.webhooks import webhook_event_statement
+from app.workers.celery_app import celery_app, queue_for_test_type
+
+logger = logging.getLogger(__name__)
+
+
+# Per-test options passed through to the bot-engine TestConfig
+BOT_CONFIG_OPTIONS = ("browsers", "credentials", "timeout")
+
+QUEUE_UNAVAILABLE_MESSAGE = "Could not queue test for execution"
+
+
+class TransientTestError(Exception):
+    """Recoverable test execution failure; the job is retried with backoff"""
+
+
+def publish_progress(test_id: str, message: dict, browser: Optional[str] = None) -> None:
+    """Relay a bot-engine module progress message as live test events"""
+    publish_test_event(test_id, PROGRESS_EVENT, {
+        "module": message.get("module"),
+        "state": message.get("state"),
+        "checks": message.get("checks"),
+        **({"browser": browser} if browser else {}),
+    })
+    for issue in message.get("issues") or []:
+        publish_test_event(test_id, ISSUE_EVENT, issue)
+
+
+def execute_test(
+    test_id: str,
+    project_url: str,
+    test_type: str,
+    config: Optional[dict] = None,
+    browser: Optional[str] = None,
+) -> dict:
+    """
+    Run a test against the target on the bot-engine worker pool, in the
+    given browser (or the config's first); returns the bot-engine
+    TestResults document. Crashes and timeouts are raised as
+    TransientTestError; a job the bot-engine reports as failed (e.g. an
+    invalid config) raises BotEngineJobError and is not retried.
+    """
+    bot_config = {
+        "targetUrl": project_url,
+        "testTypes": ["all"] if test_type == "full" else [test_type],
+    }
+    for key in BOT_CONFIG_OPTIONS:
+        if config and key in config:
+            bot_config[key] = config[key]
+    if browser:
+        bot_config["browsers"] = [browser]
+
+    try:
+        return get_bot_engine_pool().run(
+            bot_config,
+            on_progress=lambda message: publish_progress(test_id, message, browser),
+        )
+    except BotEngineUnavailable as exc:
+        raise TransientTestError(str(exc)) from exc
+
+
+def set_test_status(test_id: str, status: TestStatus, **fields) -> None:
+    """Move a test to a new lifecycle status"""
+    db = SessionLocal()
+    try:
+        test = db.query(Test).filter(Test.id == test_id).first()
+        if test:
+            test.status = status
+            for field, value in fields.items():
+                setattr(test, field, value)
+            if status == TestStatus.FAILED:
+                # The session doesn't autoflush; the rollup reads the row's status
+                db.flush()
+                db.execute(rollup_test_statement(test.id))
+            db.commit()
+            publish_status(test_id, status, error_message=fields.get("error_message"))
+    finally:
+        db.close()
+
+
+def publish_status(test_id: str, status: TestStatus, **data) -> None:
+    """Publish a status transition as a live test event"""
+    publish_test_event(test_id, STATUS_EVENT, {"status": status.value, **data})
+
+
+@celery_app.task(
+    bind=True,
+    name="tests.run",
+    autoretry_for=(TransientTestError,),
+    retry_backoff=True,
+    retry_backoff_max=settings.TEST_JOB_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=settings.TEST_JOB_MAX_RETRIES,
+)
+def run_test_job(self, test_id: str, project_url: str, test_type: str, config: Optional[dict] = None):
+    """
+    Execute a test run
+
+    Status lifecycle: PENDING -> RUNNING -> COMPLETED | FAILED.
+    A transient failure puts the test back to PENDING until retries run out.
+    A matrix test fans out into one run_matrix_cell job per cell, merged by
+    merge_matrix_results.
+    """
+    try:
+        cells = matrix_cells(test_type, config)
+    except ValueError as exc:
+        set_test_status(test_id, TestStatus.FAILED, completed_at=datetime.utcnow(), error_message=str(exc))
+        return
+
+    db = SessionLocal()
+    try:
+        test = db.query(Test).filter(Test.id == test_id).first()
+        if test is None or test.status == TestStatus.CANCELLED:
+            return
+
+        started_at = datetime.utcnow()
+        test.status = TestStatus.RUNNING
+        test.started_at = started_at
+        test.error_message = None
+        db.commit()
+    finally:
+        db.close()
+
+    publish_status(test_id, TestStatus.RUNNING)
+
+    digest = config_digest(test_type, config)
+    fingerprints = None
+    if incremental_requested(config):
+        carried, fingerprints = check_for_changes(test_id, project_url, digest)
+        if carried:
+            return
+
+    if cells:
+        # Fan out; the merge task completes the test once every cell is done
+        priority = (self.request.delivery_info or {}).get("priority")
+        chord(
+            run_matrix_cell.signature(
+                args=[test_id, project_url, browser, module, config],
+                queue=queue_for_test_type(test_type),
+                priority=priority,
+            )
+            for browser, module in cells
+        )(merge_matrix_results.signature(
+            args=[test_id, digest, fingerprints],
+            queue=queue_for_test_type(test_type),
+            priority=priority,
+        ))
+        return
+
+    try:
+        results = execute_test(test_id, project_url, test_type, config)
+    except TransientTestError as exc:
+        if self.request.retries < self.max_retries:
+            logger.warning("Test %s failed transiently, retrying: %s", test_id, exc)
+            set_test_status(test_id, TestStatus.PENDING, error_message=str(exc))
+        else:
+            set_test_status(
+                test_id,
+                TestStatus.FAILED,
+                completed_at=datetime.utcnow(),
+                error_message=str(exc),
+            )
+        raise
+    except Exception as exc:
+        logger.exception("Test %s failed", test_id)
+        set_test_status(
+            test_id,
+            TestStatus.FAILED,
+            completed_at=datetime.utcnow(),
+            error_message=str(exc),
+        )
+        raise
+
+    complete_test(test_id, started_at, results, digest=digest, fingerprints=fingerprints)
+
+
+def check_for_changes(test_id: str, project_url: str, digest: str) -> Tuple[bool, Optional[List[dict]]]:
+    """
+    Fingerprint the target for an incremental run. If nothing changed since
+    a comparable completed run, carry its results forward and complete the
+    test. Returns whether the test was completed, and otherwise the
+    fingerprints to record once the run completes.
+    """
+    db = SessionLocal()
+    try:
+        test = db.get(Test, test_id)
+        rows = load_fingerprints(db, test.project_id)
+        previous = as_fingerprints(rows)
+        try:
+            current = fingerprint_site(project_url, previous)
+        except httpx.HTTPError as exc:
+            logger.info("Could not fingerprint %s, running test %s in full: %s", project_url, test_id, exc)
+            return False, None
+
+        source = reusable_test(db, rows, digest)
+        if source is None or current != previous:
+            return False, [asdict(fingerprint) for fingerprint in current.values()]
+
+        carry_forward(db, test, source)
+        db.flush()
+        db.execute(resolve_issues_statement(test))
+        db.execute(rollup_test_statement(test.id))
+        record_test_completed(db, test)
+        db.commit()
+        stats = (test.results or {}).get("stats")
+        origin = test.results["carried_over_from"]
+    finally:
+        db.close()
+
+    logger.info("Test %s: %s unchanged, carried over results of test %s", test_id, project_url, origin)
+    publish_status(test_id, TestStatus.COMPLETED, stats=stats, carried_over=True)
+    return True, None
+
+
+def record_test_completed(db: Session, test: Test) -> None:
+    """Queue the test_completed webhook event with the completion; the caller commits"""
+    if not settings.WEBHOOKS_ENABLED:
+        return
+    results = test.results or {}
+    db.execute(webhook_event_statement("test_completed", test.id, {
+        "test_id": str(test.id),
+        "project_id": str(test.project_id),
+        "test_type": test.test_type,
+        "status": test.status.value,
+        "completed_at": test.completed_at.isoformat(),
+        "duration_seconds": test.duration_seconds,
+        "stats": results.get("stats"),
+        "carried_over_from": results.get("carried_over_from"),
+    }))
+
+
+def complete_test(
+    test_id: str,
+    started_at: datetime,
+    results: Dict[str, Any],
+    cells: Optional[List[dict]] = None,
+    digest: Optional[str] = None,
+    fingerprints: Optional[List[dict]] = None,
+):
+    """
+    Store a finished run: the full document in the artifact store, a
+    summary (and per-cell breakdown) on the row, and its issues. The
+    pre-run fingerprints of an incremental run are recorded against it.
+    """
+    completed_at = datetime.utcnow()
+    summary = results.get("summary") or {}
+    stats = {
+        "total_checks": summary.get("totalChecks", 0),
+        "passed": summary.get("passed", 0),
+        "failed": summary.get("failed", 0),
+        "warnings": summary.get("warnings", 0)
+    }
+
+    # The full document goes to the artifact store; the row keeps a summary
+    artifact = get_artifact_store().put_json(results)
+
+    db = SessionLocal()
+    try:
+        test = db.query(Test).filter(Test.id == test_id).first()
+        if test is None:
+            return
+
+        test.status = TestStatus.COMPLETED
+        test.completed_at = completed_at
+        test.duration_seconds = int((completed_at - started_at).total_seconds())
+        test.screenshots = results.get("screenshots") or []
+        # Merged, not replaced: a redelivered job skips the already ingested
+        # chunk 0, so the issue counts it recorded must survive
+        test.results = {
+            **(test.results or {}),
+            "summary": "Test completed successfully",
+            "browser": results.get("browser"),
+            "stats": stats,
+            "artifact": artifact.to_dict(),
+            "config_digest": digest,
+            "load_time_ms": load_time_ms(results),
+            **({"cells": cells} if cells else {})
+        }
+        db.flush()
+
+        metrics = performance_metrics(results)
+        if metrics:
+            db.execute(record_metrics_statement(test.id, test.project_id, results.get("browser"), completed_at, metrics))
+
+        if fingerprints:
+            save_fingerprints(db, test.project_id, test.id, (Fingerprint(**fingerprint) for fingerprint in fingerprints))
+
+        # Chunk 0 of the run: a redelivered job won't insert its issues twice
+        ingest_chunk_sync(db, test.id, 0, (
+            {"type": "issue", **issue} for issue in results.get("issues") or []
+        ))
+        db.execute(resolve_issues_statement(test))
+        db.execute(rollup_test_statement(test.id))
+        record_test_completed(db, test)
+        db.commit()
+    finally:
+        db.close()
+
+    publish_status(test_id, TestStatus.COMPLETED, stats=stats)
+
+
+def failed_cell(browser: str, module: str, error: str) -> dict:
+    return {"browser": browser, "module": module, "duration": None, "stats": None, "artifact": None, "error": error}
+
+
+@celery_app.task(
+    bind=True,
+    name="tests.run_cell",
+    autoretry_for=(TransientTestError,),
+    retry_backoff=True,
+    retry_backoff_max=settings.TEST_JOB_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=settings.TEST_JOB_MAX_RETRIES,
+)
+def run_matrix_cell(self, test_id: str, project_url: str, browser: str, module: str, config: Optional[dict] = None):
+    """
+    Run one (browser, module) cell of a matrix test
+
+    Returns the cell's outcome with its document in the artifact store. A
+    cell that fails for good returns an error instead of raising, so the
+    other cells still get merged.
+    """
+    db = SessionLocal()
+    try:
+        status = db.scalar(select(Test.status).where(Test.id == test_id))
+    finally:
+        db.close()
+    if status in (None, TestStatus.CANCELLED):
+        return failed_cell(browser, module, "Test cancelled")
+
+    try:
+        results = execute_test(test_id, project_url, module, config, browser=browser)
+    except TransientTestError as exc:
+        if self.request.retries < self.max_retries:
+            logger.warning("Cell %s/%s of test %s failed transiently, retrying: %s", browser, module, test_id, exc)
+            raise
+        return failed_cell(browser, module, str(exc))
+    except Exception as exc:
+        logger.exception("Cell %s/%s of test %s failed", browser, module, test_id)
+        return failed_cell(browser, module, str(exc))
+
+    summary = results.get("summary") or {}
+    return {
+        "browser": browser,
+        "module": module,
+        "duration": results.get("duration"),
+        "stats": {
+            "total_checks": summary.get("totalChecks", 0),
+            "passed": summary.get("passed", 0),
+            "failed": summary.get("failed", 0),
+            "warnings": summary.get("warnings", 0)
+        },
+        "artifact": get_artifact_store().put_json(results).to_dict(),
+        "error": None,
+    }
+
+
+@celery_app.task(name="tests.merge_cells")
+def merge_matrix_results(
+    cells: List[dict], test_id: str, digest: Optional[str] = None, fingerprints: Optional[List[dict]] = None
+):
+    """Merge the cells of a matrix test into one result and complete the test"""
+    db = SessionLocal()
+    try:
+        test = db.query(Test).filter(Test.id == test_id).first()
+        if test is None or test.status == TestStatus.CANCELLED:
+            return
+        started_at = test.started_at or datetime.utcnow()
+    finally:
+        db.close()
+
+    failures = [cell for cell in cells if cell["error"]]
+    if len(failures) == len(cells):
+        set_test_status(
+            test_id,
+            TestStatus.FAILED,
+            completed_at=datetime.utcnow(),
+            error_message="; ".join(f"{cell['browser']}/{cell['module']}: {cell['error']}" for cell in failures),
+        )
+        return
+
+    store = get_artifact_store()
+    documents = [store.read_json(ArtifactRef.from_dict(cell["artifact"])) if cell["artifact"] else None for cell in cells]
+    complete_test(
+        test_id, started_at, merge_cells(cells, documents), cells=cells, digest=digest, fingerprints=fingerprints
+    )
+
+
+def enqueue_test_job(test_id: str, project_url: str, test_type: str, config: Optional[dict] = None):
+    """Queue a test run on the queue for its test type"""
+    return run_test_job.apply_async(
+        args=[test_id, project_url, test_type, config],
+        queue=queue_for_test_type(test_type),
+    )
+
+
+def enqueue_test_batch(jobs: Iterable[Tuple[str, str, str, Optional[dict]]]):
+    """
+    Queue many (test id, project url, test type, config) runs as one group,
+    at TEST_BATCH_PRIORITY so they yield to interactive tests
+    """
+    return group(
+        run_test_job.signature(
+            args=[test_id, project_url, test_type, config],
+            queue=queue_for_test_type(test_type),
+            priority=settings.TEST_BATCH_PRIORITY,
+        )
+        for test_id, project_url, test_type, config in jobs
+    ).apply_async()
+
+
+def fail_unqueued_tests_statement(test_ids):
+    """
+    Fail pending tests whose jobs could not be queued, finished now so
+    their rollups count them; returns their ids and projects. The caller
+    rolls each up and commits.
+    """
+    return (
+        update(Test)
+        .where(Test.id.in_(test_ids), Test.status == TestStatus.PENDING)
+        .values(status=TestStatus.FAILED, completed_at=datetime.utcnow(), error_message=QUEUE_UNAVAILABLE_MESSAGE)
+        .returning(Test.id, Test.project_id)
+    )
@@ -0,0 +1,39 @@
+"""
+Webhook dispatcher process
+
+Run with:
+    python -m app.workers.webhooks
+
+Delivers the webhook outbox (see app.services.webhooks) from one asyncio
+loop and one shared connection pool. Dispatchers claim deliveries with
+SKIP LOCKED, so several can run side by side.
+"""
+import asyncio
+import logging
+import signal
+
+from app.db.session import async_engine
+from app.services.webhooks import WebhookDispatcher
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    dispatcher = WebhookDispatcher()
+    logger.info("Webhook dispatcher started")
+    try:
+        await dispatcher.run(stop)
+    finally:
+        await dispatcher.aclose()
+        await async_engine.dispose()
+    logger.info("Webhook dispatcher stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
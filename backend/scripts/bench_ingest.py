@@ -0,0 +1,69 @@
+"""
+Result ingestion benchmark
+
+Streams N synthetic issues to the internal ingestion endpoint as NDJSON
+chunks and reports issues ingested per second. Re-sends the first chunk at
+the end to check that duplicates are skipped.
+
+Usage:
+    python scripts/bench_ingest.py --test-id <uuid> --token $INTERNAL_API_TOKEN --issues 100000 --chunk-size 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+SEVERITIES = ["critical", "high", "medium", "low", "info"]
+CATEGORIES = ["security", "performance", "accessibility", "seo", "functionality"]
+
+
+def chunk_body(start: int, count: int):
+    """Yield an NDJSON chunk line by line so the upload is streamed"""
+    for index in range(start, start + count):
+        yield (json.dumps({
+            "type": "issue",
+            "severity": random.choice(SEVERITIES),
+            "category": random.choice(CATEGORIES),
+            "title": f"Synthetic issue {index}",
+            "description": "Generated by bench_ingest.py",
+            "url": f"https://example.com/page/{index % 500}",
+        }) + "\n").encode()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--test-id", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--issues", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--first-seq", type=int, default=1, help="Sequence number of the first chunk")
+    args = parser.parse_args()
+
+    url = f"{args.prefix}/internal/tests/{args.test_id}/results"
+    headers = {"X-Internal-Token": args.token, "Content-Type": "application/x-ndjson"}
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=300) as client:
+        ingested = 0
+        started = time.perf_counter()
+        for number, start in enumerate(range(0, args.issues, args.chunk_size)):
+            count = min(args.chunk_size, args.issues - start)
+            response = await client.put(f"{url}/{args.first_seq + number}", content=chunk_body(start, count))
+            response.raise_for_status()
+            ingested += response.json()["issues"]
+        elapsed = time.perf_counter() - started
+
+        retry = await client.put(f"{url}/{args.first_seq}", content=chunk_body(0, min(args.chunk_size, args.issues)))
+        retry.raise_for_status()
+
+    print(f"issues:        {ingested} in {elapsed:.2f}s")
+    print(f"throughput:    {ingested / elapsed:.0f} issues/s")
+    print(f"retry skipped: {retry.json()['duplicate']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
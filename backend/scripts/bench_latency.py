@@ -0,0 +1,105 @@
+"""
+Load benchmark for authenticated API routes
+
+Drives N concurrent clients against a running API and reports latency
+percentiles. Run it once against the sync-session build and once against
+the async-session build to compare p99 under concurrency.
+
+Usage:
+    python scripts/bench_latency.py --base-url http://localhost:8000 \\
+        --clients 50 --requests 2000 --path /api/v1/projects
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+async def get_token(client: httpx.AsyncClient, prefix: str) -> str:
+    """Register a throwaway user and return its access token"""
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post(
+        f"{prefix}/auth/register",
+        json={"email": email, "password": "bench-password", "full_name": "Bench"},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def seed_projects(client: httpx.AsyncClient, prefix: str, headers: dict, count: int):
+    """Create projects so list endpoints have rows to return"""
+    for i in range(count):
+        response = await client.post(
+            f"{prefix}/projects",
+            headers=headers,
+            json={"name": f"bench-{i}", "target_url": "https://example.com"},
+        )
+        response.raise_for_status()
+
+
+async def worker(client: httpx.AsyncClient, url: str, headers: dict, jobs: asyncio.Queue, latencies: list, errors: list):
+    while True:
+        try:
+            jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, headers=headers)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--path", default="/api/v1/projects")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed-projects", type=int, default=20)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await get_token(client, args.prefix)
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_projects(client, args.prefix, headers, args.seed_projects)
+
+        jobs: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            jobs.put_nowait(None)
+
+        latencies: list = []
+        errors: list = []
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, args.path, headers, jobs, latencies, errors)
+            for _ in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(f"clients={args.clients} requests={len(latencies)} errors={len(errors)}")
+    print(f"throughput={len(latencies) / elapsed:.1f} req/s")
+    print(
+        f"p50={statistics.median(latencies):.1f}ms "
+        f"p95={percentile(latencies, 95):.1f}ms "
+        f"p99={percentile(latencies, 99):.1f}ms "
+        f"max={max(latencies):.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Concurrent login benchmark
+
+Registers one user, then fires logins from N concurrent clients and
+reports successful logins per second, latency percentiles and how many
+requests were shed with 503 by the hashing pool.
+
+Usage:
+    python scripts/bench_logins.py --base-url http://localhost:8000 --clients 32 --logins 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, url: str, credentials: dict, jobs: asyncio.Queue, latencies: list, statuses: Counter):
+    while True:
+        try:
+            jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        response = await client.post(url, json=credentials)
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=500)
+    args = parser.parse_args()
+
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "password": "bench-password"}
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        response = await client.post(f"{args.prefix}/auth/register", json=credentials)
+        response.raise_for_status()
+
+        jobs: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.logins):
+            jobs.put_nowait(None)
+
+        latencies: list = []
+        statuses: Counter = Counter()
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, f"{args.prefix}/auth/login", credentials, jobs, latencies, statuses)
+            for _ in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(f"clients={args.clients} attempts={args.logins} statuses={dict(statuses)}")
+    print(f"successful logins/s={len(latencies) / elapsed:.1f}")
+    if latencies:
+        ordered = sorted(latencies)
+        print(
+            f"p50={statistics.median(ordered):.1f}ms "
+            f"p99={ordered[max(0, int(len(ordered) * 0.99) - 1)]:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Metrics middleware overhead benchmark
+
+Calls a trivial ASGI app directly (no network, no server) with and
+without MetricsMiddleware in front of it, and reports the added latency
+per request, with ProfilingMiddleware (enabled, but not triggered) on top.
+
+Usage:
+    python scripts/bench_metrics.py --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+from app.core.config import settings  # noqa: E402
+from app.core.metrics import MetricsMiddleware  # noqa: E402
+from app.core.profiling import ProfilingMiddleware  # noqa: E402
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def make_scope() -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": f"{settings.API_V1_PREFIX}/projects",
+        "headers": [(b"authorization", b"Bearer token"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "endpoint": endpoint,
+        "route": type("Route", (), {"path": f"{settings.API_V1_PREFIX}/projects"})(),
+    }
+
+
+async def measure(app, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        scope = make_scope()
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies
+
+
+def report(name: str, latencies: list, baseline: float):
+    latencies.sort()
+    median = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:10} median {median:7.1f} us  p99 {p99:7.1f} us  overhead {median - baseline:7.1f} us")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    settings.METRICS_ENABLED = True
+    settings.PROFILING_ENABLED = True
+
+    baseline = await measure(endpoint, args.requests)
+    base_median = statistics.median(baseline)
+    report("none", baseline, base_median)
+    report("metrics", await measure(MetricsMiddleware(endpoint), args.requests), base_median)
+    report("+profiler", await measure(ProfilingMiddleware(MetricsMiddleware(endpoint)), args.requests), base_median)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
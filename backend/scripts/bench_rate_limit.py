@@ -0,0 +1,103 @@
+"""
+Rate limiter overhead benchmark
+
+Calls a trivial ASGI app directly (no network, no server) with and
+without RateLimitMiddleware in front of it, and reports the added latency
+per request. Requests carry a bearer token, so the JWT decode is included.
+
+    memory  in-process buckets only
+    redis   buckets in Redis at REDIS_URL (skipped if Redis is unreachable)
+
+Usage:
+    python scripts/bench_rate_limit.py --requests 20000 --users 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+from app.core.config import settings  # noqa: E402
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware  # noqa: E402
+from app.core.redis import get_redis  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def make_scopes(users: int) -> list:
+    scopes = []
+    for _ in range(users):
+        token = create_access_token({"sub": str(uuid.uuid4())})
+        scopes.append({
+            "type": "http",
+            "method": "GET",
+            "path": f"{settings.API_V1_PREFIX}/projects",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 50000),
+        })
+    return scopes
+
+
+async def measure(app, scopes: list, requests: int) -> list:
+    latencies = []
+    for index in range(requests):
+        started = time.perf_counter()
+        await app(scopes[index % len(scopes)], receive, send)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies
+
+
+def report(name: str, latencies: list, baseline: float):
+    latencies.sort()
+    median = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:9} median {median:7.1f} us  p99 {p99:7.1f} us  overhead {median - baseline:7.1f} us")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    # A high limit, so every request is allowed and takes the full path
+    settings.PLAN_RATE_LIMITS = {"free": 10**9}
+    settings.RATE_LIMIT_PER_MINUTE = 10**9
+    scopes = make_scopes(args.users)
+
+    baseline = await measure(endpoint, scopes, args.requests)
+    base_median = statistics.median(baseline)
+    report("none", baseline, base_median)
+
+    memory = RateLimitMiddleware(endpoint, RateLimiter(use_redis=False))
+    report("memory", await measure(memory, scopes, args.requests), base_median)
+
+    try:
+        await get_redis().ping()
+    except Exception as exc:
+        print(f"redis     skipped ({exc})")
+        return
+    redis = RateLimitMiddleware(endpoint, RateLimiter(use_redis=True))
+    report("redis", await measure(redis, scopes, args.requests), base_median)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+Regression detection benchmark
+
+Builds synthetic metric histories (noisy series, a fraction of them with a
+step regression in one metric over the newest runs, some with a single
+slow run) and tests them two ways:
+
+    loop        the same rule per series and metric in plain Python
+    vectorized  detect_regressions over one (series, runs, metrics) array
+
+and reports the time taken and how many injected regressions and spikes
+were reported. Only detection is measured; reading the windows needs a
+database.
+
+Usage:
+    python scripts/bench_regressions.py --series 5000 --regressed 0.05 --spikes 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+import numpy as np  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.regressions import MAD_SCALE, METRICS, detect_regressions  # noqa: E402
+
+# Typical value and run-to-run noise (fraction) of each metric
+PROFILES = {
+    "load_time": (1800, 0.08), "dom_content_loaded": (900, 0.08), "first_paint": (600, 0.1),
+    "resource_count": (60, 0.02), "total_size": (1_500_000, 0.03), "lcp": (1500, 0.1),
+    "fid": (40, 0.2), "cls": (0.05, 0.3),
+}
+
+
+def make_windows(series: int, runs: int, regressed: float, spikes: float, recent: int, seed: int):
+    rng = np.random.default_rng(seed)
+    level = np.array([PROFILES[metric.name][0] for metric in METRICS]) * rng.uniform(0.5, 2.0, (series, 1, len(METRICS)))
+    noise = np.array([PROFILES[metric.name][1] for metric in METRICS])
+    windows = level * (1 + noise * rng.standard_normal((series, runs, len(METRICS))))
+    windows = np.abs(windows)
+    # Some runs don't measure everything
+    windows[rng.random(windows.shape) < 0.02] = np.nan
+
+    truth = np.zeros((series, len(METRICS)), dtype=bool)
+    chosen = rng.random(series) < regressed
+    metric = rng.integers(0, len(METRICS), series)
+    for position in np.flatnonzero(chosen):
+        windows[position, -recent:, metric[position]] *= rng.uniform(1.5, 3.0)
+        truth[position, metric[position]] = True
+
+    spiked = (rng.random(series) < spikes) & ~chosen
+    windows[spiked, -1, metric[spiked]] *= 4
+    return windows, truth, spiked
+
+
+def detect_loop(windows, recent_runs, min_baseline_runs, z_threshold, min_increase, min_delta):
+    """The rule of detect_regressions, one series and metric at a time"""
+    series, runs, metrics = windows.shape
+    regressed = np.zeros((series, metrics), dtype=bool)
+    for position in range(series):
+        for index in range(metrics):
+            values = windows[position, :, index].tolist()
+            baseline_runs = [value for value in values[:-recent_runs] if value == value]
+            recent = [value for value in values[-recent_runs:] if value == value]
+            if len(baseline_runs) < min_baseline_runs or len(recent) <= recent_runs // 2:
+                continue
+            baseline = statistics.median(baseline_runs)
+            spread = MAD_SCALE * statistics.median(abs(value - baseline) for value in baseline_runs)
+            threshold = baseline + max(z_threshold * spread, min_increase * baseline, min_delta[index])
+            regressed[position, index] = statistics.median_low(recent) > threshold and values[-1] > threshold
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=5000, help="project/browser series")
+    parser.add_argument("--regressed", type=float, default=0.05, help="fraction of series with a regression")
+    parser.add_argument("--spikes", type=float, default=0.05, help="fraction of series with one slow run")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    recent = settings.REGRESSION_RECENT_RUNS
+    runs = settings.REGRESSION_BASELINE_RUNS + recent
+    windows, truth, spiked = make_windows(args.series, runs, args.regressed, args.spikes, recent, args.seed)
+    parameters = (
+        recent, settings.REGRESSION_MIN_BASELINE_RUNS, settings.REGRESSION_Z_THRESHOLD,
+        settings.REGRESSION_MIN_INCREASE, np.array([metric.min_delta for metric in METRICS]),
+    )
+    print(
+        f"{args.series} series x {runs} runs x {len(METRICS)} metrics, "
+        f"{truth.sum()} regressions injected, {spiked.sum()} single slow runs"
+    )
+
+    for name, detect in (
+        ("loop", lambda: detect_loop(windows, *parameters)),
+        ("vectorized", lambda: detect_regressions(windows, *parameters).regressed),
+    ):
+        started = time.perf_counter()
+        regressed = detect()
+        elapsed = time.perf_counter() - started
+        found = (regressed & truth).sum()
+        print(
+            f"{name:>10}: {elapsed * 1000:9.1f} ms  {args.series / elapsed:12,.0f} series/s  "
+            f"{found}/{truth.sum()} regressions found, {(regressed & ~truth).sum()} false alarms "
+            f"({regressed[spiked].any(axis=1).sum()} on spikes)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Serialization micro-benchmark for large issue pages
+
+Builds in-memory Issue rows (no database) and compares three ways of
+turning a page of them into response bytes:
+
+    fastapi   from_orm per row, then what FastAPI does with a returned
+              model: dump to dict, validate against response_model
+              again, jsonable_encoder, json.dumps
+    pydantic  validate each row once, dump with pydantic-core
+              (serialize_page with FAST_JSON_RESPONSES off)
+    orjson    read fields off the rows, encode with orjson
+              (serialize_page with FAST_JSON_RESPONSES on)
+
+Usage:
+    python scripts/bench_serialization.py --issues 10000 --rounds 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.serialization import serialize_page  # noqa: E402
+from app.db.models import Issue, IssueSeverity  # noqa: E402
+from app.schemas.test import IssuePage, IssueResponse  # noqa: E402
+
+
+def make_issues(count: int) -> list:
+    test_id = uuid.uuid4()
+    severities = list(IssueSeverity)
+    started = datetime(2026, 1, 1)
+    return [
+        Issue(
+            id=uuid.uuid4(),
+            test_id=test_id,
+            severity=severities[index % len(severities)],
+            category="accessibility",
+            title=f"Image without alt text #{index}",
+            description="Images must have alternate text so screen readers can describe them.",
+            url=f"https://example.com/products/{index % 200}",
+            screenshot_url=None,
+            status="open",
+            created_at=started + timedelta(seconds=index),
+        )
+        for index in range(count)
+    ]
+
+
+def fastapi_default(issues: list) -> bytes:
+    page = IssuePage(items=[IssueResponse.from_orm(issue) for issue in issues], next_cursor=None)
+    revalidated = IssuePage.model_validate(page.model_dump())
+    return json.dumps(jsonable_encoder(revalidated)).encode()
+
+
+def serialize_with(fast: bool):
+    def serialize(issues: list) -> bytes:
+        settings.FAST_JSON_RESPONSES = fast
+        return serialize_page(IssueResponse, issues, None)
+    return serialize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    issues = make_issues(args.issues)
+    modes = {
+        "fastapi": fastapi_default,
+        "pydantic": serialize_with(False),
+        "orjson": serialize_with(True),
+    }
+
+    # All modes must produce the same document
+    documents = {name: json.loads(serialize(issues)) for name, serialize in modes.items()}
+    assert all(document == documents["fastapi"] for document in documents.values()), "Outputs differ"
+
+    baseline = None
+    print(f"{args.issues} issues per payload, {args.rounds} rounds")
+    for name, serialize in modes.items():
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            body = serialize(issues)
+        elapsed = (time.perf_counter() - started) / args.rounds
+        baseline = baseline or elapsed
+        print(
+            f"{name:9} {elapsed * 1000:8.1f} ms/payload  "
+            f"{args.issues / elapsed:10.0f} issues/s  "
+            f"{len(body) / elapsed / 1e6:7.1f} MB/s  "
+            f"{baseline / elapsed:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
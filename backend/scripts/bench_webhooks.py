@@ -0,0 +1,152 @@
+"""
+Webhook delivery benchmark
+
+Starts stand-in receivers on local ports (one "host" each, optionally
+slow or flaky) and delivers N events to S subscribers spread over them,
+three ways:
+
+    naive       one POST per event and subscriber, new client each time
+    unbatched   one POST per event and subscriber over the dispatcher's pool
+    dispatcher  WebhookDispatcher.send: batched per webhook, shared
+                keep-alive pool, per-host concurrency limits
+
+and reports events delivered per second. Only the delivery path is
+measured; claiming and recording outcomes need a database.
+
+Usage:
+    python scripts/bench_webhooks.py --events 20 --subscribers 100 --hosts 4 --latency-ms 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+import httpx  # noqa: E402
+import orjson  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.webhooks import ClaimedDelivery, DeliveryBatch, WebhookDispatcher, batch_deliveries  # noqa: E402
+
+
+class Receiver:
+    """Counts received events; answers 503 to a fraction of requests"""
+
+    def __init__(self, latency: float, fail_rate: float):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.events = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            return web.Response(status=503)
+        self.events += len(orjson.loads(body)["events"])
+        return web.Response(status=204)
+
+
+async def start_receivers(receiver: Receiver, hosts: int, base_port: int):
+    app = web.Application()
+    app.router.add_post("/hook/{webhook_id}", receiver.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    for port in range(base_port, base_port + hosts):
+        await web.TCPSite(runner, "127.0.0.1", port, backlog=4096).start()
+    return runner
+
+
+def make_deliveries(events: int, subscribers: int, hosts: int, base_port: int):
+    webhooks = [
+        (uuid.uuid4(), f"http://127.0.0.1:{base_port + index % hosts}/hook/{index}")
+        for index in range(subscribers)
+    ]
+    now = datetime.utcnow()
+    payload = {"test_id": str(uuid.uuid4()), "issues": [{"severity": "high", "title": "Synthetic issue"}]}
+    return [
+        ClaimedDelivery(
+            id=uuid.uuid4(), webhook_id=webhook_id, url=url, attempts=0, consecutive_failures=0,
+            event_id=uuid.uuid4(), event="issue_found", payload=payload, created_at=now,
+        )
+        for _ in range(events)
+        for webhook_id, url in webhooks
+    ]
+
+
+async def run_naive(deliveries, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def post(batch):
+        async with slots:
+            async with httpx.AsyncClient(timeout=settings.WEBHOOK_TIMEOUT_SECONDS) as client:
+                try:
+                    await client.post(batch.url, content=batch.body())
+                except httpx.HTTPError:
+                    pass
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(batch) for batch in unbatched(deliveries)))
+    return time.perf_counter() - started
+
+
+def unbatched(deliveries):
+    return [DeliveryBatch(delivery.webhook_id, delivery.url, 0, [delivery]) for delivery in deliveries]
+
+
+async def run_dispatcher(batches) -> float:
+    dispatcher = WebhookDispatcher()
+    started = time.perf_counter()
+    await asyncio.gather(*(dispatcher.send(batch) for batch in batches))
+    elapsed = time.perf_counter() - started
+    await dispatcher.aclose()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20, help="events per subscriber")
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--base-port", type=int, default=18080)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="receiver processing time per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--naive-concurrency", type=int, default=settings.WEBHOOK_MAX_CONNECTIONS)
+    args = parser.parse_args()
+
+    receiver = Receiver(args.latency_ms / 1000, args.fail_rate)
+    runner = await start_receivers(receiver, args.hosts, args.base_port)
+    deliveries = make_deliveries(args.events, args.subscribers, args.hosts, args.base_port)
+    print(
+        f"{len(deliveries)} deliveries ({args.events} events x {args.subscribers} subscribers) "
+        f"to {args.hosts} hosts, {args.latency_ms:g} ms receiver latency, {args.fail_rate:.0%} failures"
+    )
+
+    try:
+        for name, run in (
+            ("naive", lambda: run_naive(deliveries, args.naive_concurrency)),
+            ("unbatched", lambda: run_dispatcher(unbatched(deliveries))),
+            ("dispatcher", lambda: run_dispatcher(batch_deliveries(deliveries))),
+        ):
+            receiver.requests = receiver.events = 0
+            elapsed = await run()
+            print(
+                f"{name:>10}: {elapsed:7.2f} s  {receiver.events / elapsed:9.0f} events/s  "
+                f"{receiver.requests:7d} requests  {receiver.events:7d} events received"
+            )
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+"""
+EXPLAIN the route queries against a seeded database
+
+Builds the same statements the API routes issue, runs EXPLAIN on each and
+exits non-zero if any plan contains a sequential scan on a large table.
+Point DATABASE_URL at a scratch database with migrations applied.
+
+Usage:
+    python scripts/explain_queries.py --seed --users 200 --projects 10 --tests 20 --issues 10
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select, text  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.sql.expression import ClauseElement, Executable  # noqa: E402
+
+from app.api.routes.projects import projects_with_stats_query  # noqa: E402
+from app.core.pagination import DEFAULT_PAGE_SIZE, paginate  # noqa: E402
+from app.db.models import Issue, IssueSeverity, Project, Test, User  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.services.analytics import analytics_query  # noqa: E402
+from app.services.issue_index import new_issues_query, previous_run_query, resolved_issues_query  # noqa: E402
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, hashed_password, is_active, is_superuser, plan, created_at, updated_at)
+    SELECT gen_random_uuid(), 'explain-' || g || '@example.com', 'x', true, false, 'free', now(), now()
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO projects (id, user_id, name, target_url, status, created_at, updated_at)
+    SELECT gen_random_uuid(), u.id, 'project-' || g, 'https://example.com',
+           CASE WHEN g % 10 = 0 THEN 'deleted' ELSE 'active' END,
+           now() - g * interval '1 minute', now()
+    FROM users u CROSS JOIN generate_series(1, :projects) g
+    WHERE u.email LIKE 'explain-%'
+    """,
+    """
+    INSERT INTO tests (id, project_id, test_type, status, created_at)
+    SELECT gen_random_uuid(), p.id,
+           (ARRAY['full', 'auth', 'performance', 'security', 'ui'])[1 + g % 5],
+           (ARRAY['PENDING', 'RUNNING', 'COMPLETED', 'FAILED'])[1 + g % 4]::teststatus,
+           now() - g * interval '1 hour'
+    FROM projects p
+    JOIN users u ON u.id = p.user_id AND u.email LIKE 'explain-%'
+    CROSS JOIN generate_series(1, :tests) g
+    """,
+    """
+    INSERT INTO issues (id, test_id, severity, category, title, status, created_at, updated_at)
+    SELECT gen_random_uuid(), t.id,
+           (ARRAY['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO'])[1 + g % 5]::issueseverity,
+           (ARRAY['auth', 'performance', 'security', 'ui'])[1 + g % 4],
+           'Issue ' || g,
+           CASE WHEN g % 3 = 0 THEN 'fixed' ELSE 'open' END,
+           t.created_at + g * interval '1 second', now()
+    FROM tests t
+    JOIN projects p ON p.id = t.project_id
+    JOIN users u ON u.id = p.user_id AND u.email LIKE 'explain-%'
+    CROSS JOIN generate_series(1, :issues) g
+    """,
+    """
+    INSERT INTO project_daily_stats (project_id, day, tests_completed, tests_failed, checks_total,
+                                     checks_passed, checks_failed, checks_warnings, issues_critical,
+                                     issues_high, issues_medium, issues_low, issues_info,
+                                     duration_seconds_sum, load_time_ms_sum, load_time_ms_count,
+                                     load_time_ms_max, updated_at)
+    SELECT p.id, current_date - g, 3, 1, 120, 100, 15, 5, 1, 2, 4, 8, 10, 600, 4500, 3, 2100, now()
+    FROM projects p
+    JOIN users u ON u.id = p.user_id AND u.email LIKE 'explain-%'
+    CROSS JOIN generate_series(0, 364) g
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO issue_fingerprints (project_id, fingerprint, severity, category, title, url, element_selector,
+                                    status, test_type, first_seen_test_id, first_seen_at, last_seen_test_id,
+                                    last_seen_at, occurrences, resolved_at)
+    SELECT t.project_id, md5(i.id::text), i.severity, i.category, i.title, i.url, i.element_selector,
+           i.status, t.test_type, t.id, i.created_at, t.id, i.created_at, 1,
+           CASE WHEN i.status = 'fixed' THEN now() END
+    FROM issues i
+    JOIN tests t ON t.id = i.test_id
+    JOIN projects p ON p.id = t.project_id
+    JOIN users u ON u.id = p.user_id AND u.email LIKE 'explain-%'
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's bind processing"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def seq_scans(plan: dict):
+    """Yield relation names scanned sequentially anywhere in a plan tree"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+def route_queries(conn):
+    """The statements issued by the API routes, bound to sample ids"""
+    user_id, email, project_id = conn.execute(text("""
+        SELECT u.id, u.email, p.id
+        FROM users u JOIN projects p ON p.user_id = u.id
+        WHERE p.status != 'deleted'
+        ORDER BY u.email LIMIT 1
+    """)).one()
+    test_id = conn.execute(
+        text("SELECT id FROM tests WHERE project_id = :project_id LIMIT 1"),
+        {"project_id": project_id},
+    ).scalar_one()
+    test = conn.execute(select(Test.__table__).where(Test.id == test_id)).one()
+
+    return {
+        "auth.login": select(User).where(User.email == email),
+        "security.get_current_user": select(User).where(User.id == user_id),
+        "projects.list_projects": projects_with_stats_query(user_id),
+        "projects.get_project": select(Project).where(Project.id == project_id, Project.user_id == user_id),
+        "projects.get_project_analytics": analytics_query(
+            project_id, date.today() - timedelta(days=365), date.today(), "week"
+        ),
+        "projects.list_project_tests": paginate(
+            select(Test).where(Test.project_id == project_id), Test, None, DEFAULT_PAGE_SIZE
+        ),
+        "tests.get_test": select(Test).join(Project).where(Test.id == test_id, Project.user_id == user_id),
+        "tests.get_test_issues": paginate(
+            select(Issue).where(Issue.test_id == test_id), Issue, None, DEFAULT_PAGE_SIZE
+        ),
+        "tests.get_test_issue_diff[previous]": previous_run_query(test),
+        "tests.get_test_issue_diff[new]": new_issues_query(test),
+        "tests.get_test_issue_diff[resolved]": resolved_issues_query(test, test_id),
+        "tests.get_test_issues[severity]": paginate(
+            select(Issue).where(Issue.test_id == test_id, Issue.severity == IssueSeverity.HIGH),
+            Issue, None, DEFAULT_PAGE_SIZE
+        ),
+        "tests.get_test_issues[status]": paginate(
+            select(Issue).where(Issue.test_id == test_id, Issue.status == "open"),
+            Issue, None, DEFAULT_PAGE_SIZE
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="insert synthetic rows before explaining")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=10, help="projects per user")
+    parser.add_argument("--tests", type=int, default=20, help="tests per project")
+    parser.add_argument("--issues", type=int, default=10, help="issues per test")
+    parser.add_argument("--min-rows", type=int, default=10000, help="tables at least this large must not be seq scanned")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.seed:
+            params = {"users": args.users, "projects": args.projects, "tests": args.tests, "issues": args.issues}
+            for statement in SEED_SQL:
+                conn.execute(text(statement), params)
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+
+        large_tables = set(conn.execute(text(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= :min_rows"
+        ), {"min_rows": args.min_rows}).scalars())
+
+        failures = []
+        for name, query in route_queries(conn).items():
+            plan = conn.execute(Explain(query)).scalar_one()[0]["Plan"]
+            scanned = sorted({relation for relation in seq_scans(plan) if relation in large_tables})
+            status = "SEQ SCAN on " + ", ".join(scanned) if scanned else "ok"
+            print(f"{name:<36} cost={plan['Total Cost']:>10.2f}  {status}")
+            if scanned:
+                failures.append(name)
+
+    if failures:
+        print(f"\n{len(failures)} route queries sequentially scan large tables", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
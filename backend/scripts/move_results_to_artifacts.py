@@ -0,0 +1,91 @@
+"""
+Move existing inline result documents into the artifact store
+
+Tests completed before the artifact store kept their full bot-engine
+output in tests.results (under "modules"), and manual results kept
+test_data inline. This rewrites those rows to hold artifact references.
+Safe to re-run: rows that already hold references are skipped.
+
+Usage:
+    python scripts/move_results_to_artifacts.py --batch-size 200
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select  # noqa: E402
+
+from app.db.models import ManualTestResult, Test  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.artifacts import get_artifact_store  # noqa: E402
+
+
+def move_test_results(db, store, batch_size: int) -> int:
+    moved = 0
+    last_id = None
+    while True:
+        query = select(Test).where(Test.results["modules"].isnot(None)).order_by(Test.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Test.id > last_id)
+        tests = db.scalars(query).all()
+        if not tests:
+            return moved
+
+        for test in tests:
+            results = dict(test.results)
+            modules = results.pop("modules")
+            # Module refs written by ingestion are already small
+            if any(isinstance(value, dict) and "digest" in value for value in modules.values()):
+                continue
+            full = {"browser": results.get("browser"), "results": modules}
+            results["artifact"] = store.put_json(full).to_dict()
+            test.results = results
+            moved += 1
+        db.commit()
+        last_id = tests[-1].id
+
+
+def move_manual_results(db, store, batch_size: int) -> int:
+    moved = 0
+    last_id = None
+    while True:
+        query = (
+            select(ManualTestResult)
+            .where(ManualTestResult.test_data.isnot(None), ~ManualTestResult.test_data.has_key("artifact"))
+            .order_by(ManualTestResult.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(ManualTestResult.id > last_id)
+        results = db.scalars(query).all()
+        if not results:
+            return moved
+
+        for result in results:
+            result.test_data = {"artifact": store.put_json(result.test_data).to_dict()}
+            moved += 1
+        db.commit()
+        last_id = results[-1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    store = get_artifact_store()
+    db = SessionLocal()
+    try:
+        tests = move_test_results(db, store, args.batch_size)
+        manual = move_manual_results(db, store, args.batch_size)
+    finally:
+        db.close()
+
+    print(f"tests moved:          {tests}")
+    print(f"manual results moved: {manual}")
+
+
+if __name__ == "__main__":
+    main()
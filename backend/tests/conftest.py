@@ -0,0 +1,80 @@
+"""
+Test fixtures
+
+Tests run against a disposable PostgreSQL database named by
+TEST_DATABASE_URL, e.g.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/checkmate_test pytest
+
+Its tables are created for the session and dropped afterwards; tests that
+need it are skipped when it is not set. Redis is not needed: the response
+cache stays in process and Celery runs tasks eagerly on a memory:// broker.
+"""
+import os
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Settings are read on import, so the environment is set up first
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/checkmate_test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ["RESPONSE_CACHE_REDIS_ENABLED"] = "False"
+os.environ["CELERY_BROKER_URL"] = "memory://"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "True"
+
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.db import models  # noqa: E402,F401  (registers the tables)
+from app.db.session import Base, SessionLocal, async_engine, engine  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Create the schema once per session and drop it afterwards"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(database):
+    """A sync session; every table is emptied after the test"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+        with engine.begin() as connection:
+            connection.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+
+@pytest_asyncio.fixture
+async def async_db_engine(database):
+    """The API's async engine, disposed after the test so no connection outlives its event loop"""
+    yield async_engine
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create users on the sync session"""
+    def make(**fields):
+        user = models.User(
+            email=fields.pop("email", f"user-{os.urandom(4).hex()}@example.com"),
+            hashed_password="not-a-hash",
+            **fields,
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make
@@ -0,0 +1,90 @@
+"""
+The bot-engine worker protocol, against stand-in worker scripts
+"""
+import shlex
+import subprocess
+import sys
+
+import pytest
+
+from app.services import bot_engine
+from app.services.bot_engine import BotEngineUnavailable, BotWorker
+
+
+def worker_command(script: str):
+    return [sys.executable, "-u", "-c", script]
+
+
+@pytest.fixture
+def processes(monkeypatch):
+    """The worker processes started during the test"""
+    started = []
+
+    class Popen(subprocess.Popen):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            started.append(self)
+
+    monkeypatch.setattr(bot_engine.subprocess, "Popen", Popen)
+    return started
+
+
+def test_handshake_timeout_stops_the_worker(processes, tmp_path):
+    with pytest.raises(BotEngineUnavailable, match="timed out"):
+        BotWorker(worker_command("import time; time.sleep(60)"), str(tmp_path), startup_timeout=0.5)
+
+    [process] = processes
+    assert process.returncode is not None
+
+
+def test_unexpected_handshake_stops_the_worker(processes, tmp_path):
+    script = "import json, time; print(json.dumps({'type': 'hello'})); time.sleep(60)"
+    with pytest.raises(BotEngineUnavailable, match="handshake"):
+        BotWorker(worker_command(script), str(tmp_path), startup_timeout=5)
+
+    [process] = processes
+    assert process.returncode is not None
+
+
+def test_job_timeout_covers_progress_messages(processes, tmp_path):
+    script = """
+import json, sys, time
+print(json.dumps({"type": "ready"}))
+job = json.loads(sys.stdin.readline())
+while True:
+    print(json.dumps({"id": job["id"], "type": "progress"}))
+    time.sleep(0.1)
+"""
+    worker = BotWorker(worker_command(script), str(tmp_path), startup_timeout=5)
+    progress = []
+    try:
+        with pytest.raises(BotEngineUnavailable, match="timed out"):
+            worker.run({}, timeout=1, on_progress=progress.append)
+    finally:
+        worker.close()
+
+    assert progress
+    assert worker.broken
+
+
+def test_exited_idle_workers_are_reaped(processes, tmp_path):
+    script = """
+import json, sys
+print(json.dumps({"type": "ready"}))
+for line in sys.stdin:
+    job = json.loads(line)
+    print(json.dumps({"id": job["id"], "type": "result", "results": {"ok": True}}))
+    if job["config"].get("exit"):
+        break
+"""
+    pool = bot_engine.BotEnginePool(size=1, command=shlex.join(worker_command(script)), cwd=str(tmp_path))
+    try:
+        # The worker answers, then exits while idle in the pool
+        assert pool.run({"exit": True}, timeout=5) == {"ok": True}
+        processes[0].wait(timeout=5)
+        assert pool.run({}, timeout=5) == {"ok": True}
+    finally:
+        pool.close()
+
+    assert len(processes) == 2
+    assert processes[0].stdin.closed
@@ -0,0 +1,82 @@
+"""
+Chunked result ingestion: the chunk ledger and batching
+"""
+import pytest
+
+from app.db import models
+from app.services import ingestion
+from app.services.artifacts import LocalArtifactStore
+from app.services.ingestion import ingest_chunk_sync
+
+
+def issue(title, severity="high", url="https://example.com/"):
+    return {"type": "issue", "severity": severity, "category": "security", "title": title, "url": url}
+
+
+@pytest.fixture
+def running_test(db, make_user, monkeypatch, tmp_path):
+    store = LocalArtifactStore(root=str(tmp_path))
+    monkeypatch.setattr(ingestion, "get_artifact_store", lambda: store)
+    project = models.Project(user_id=make_user().id, name="Site", target_url="https://example.com")
+    db.add(project)
+    db.flush()
+    test = models.Test(project_id=project.id, test_type="full", status=models.TestStatus.RUNNING)
+    db.add(test)
+    db.commit()
+    return test
+
+
+def ingest(db, test, seq, records, batch_size=1000):
+    result = ingest_chunk_sync(db, test.id, seq, records, batch_size=batch_size)
+    db.commit()
+    return result
+
+
+def stored(db, test):
+    db.expire_all()
+    issues = db.query(models.Issue).filter(models.Issue.test_id == test.id).count()
+    return issues, db.get(models.Test, test.id).results
+
+
+def test_same_chunk_twice_is_applied_once(db, running_test):
+    records = [issue("Missing CSP header", "critical"), issue("Open redirect")]
+    first = ingest(db, running_test, 1, records)
+    again = ingest(db, running_test, 1, records)
+
+    assert (first.duplicate, first.records, first.issues) == (False, 2, 2)
+    assert (again.duplicate, again.records, again.issues) == (True, 0, 0)
+    issues, results = stored(db, running_test)
+    assert issues == 2
+    assert results["issue_counts"]["total"] == 2
+    assert results["issue_counts"]["critical"] == 1
+    assert db.query(models.IngestChunk).filter(models.IngestChunk.test_id == running_test.id).one().records == 2
+
+
+def test_chunk_split_across_batches(db, running_test):
+    records = [
+        issue("Missing CSP header", "critical"),
+        # Repeated within its batch: stored once
+        issue("Missing CSP header", "critical"),
+        issue("Open redirect"),
+        issue("Low contrast text", "low", "https://example.com/about"),
+        {"type": "results", "module": "performance", "results": {"loadTime": 1200}},
+        {"type": "summary", "summary": {"totalChecks": 10, "passed": 7, "failed": 2, "warnings": 1}},
+    ]
+    result = ingest(db, running_test, 1, records, batch_size=2)
+
+    assert (result.records, result.issues) == (6, 3)
+    issues, results = stored(db, running_test)
+    assert issues == 3
+    assert results["issue_counts"] == {"critical": 1, "high": 1, "medium": 0, "low": 1, "info": 0, "total": 3}
+    assert results["stats"] == {"total_checks": 10, "passed": 7, "failed": 2, "warnings": 1}
+    assert "performance" in results["modules"]
+
+
+def test_chunks_accumulate_counts(db, running_test):
+    ingest(db, running_test, 1, [issue("Missing CSP header", "critical")])
+    ingest(db, running_test, 2, [issue("Open redirect"), issue("Weak TLS", "critical")])
+
+    issues, results = stored(db, running_test)
+    assert issues == 3
+    assert results["issue_counts"]["total"] == 3
+    assert results["issue_counts"]["critical"] == 2
@@ -0,0 +1,85 @@
+"""
+GET /projects aggregates project statistics in a constant number of statements
+"""
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app.api.routes import projects
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db import models
+from app.db.models import IssueFingerprint, IssueSeverity, Project
+
+
+def add_projects(db, user, count: int):
+    """Projects with a few tests and open critical issues each"""
+    now = datetime.utcnow()
+    for index in range(count):
+        project = Project(user_id=user.id, name=f"Project {index}", target_url="https://example.com")
+        db.add(project)
+        db.flush()
+        tests = [
+            models.Test(project_id=project.id, test_type="full", status=models.TestStatus.COMPLETED, created_at=now)
+            for _ in range(3)
+        ]
+        db.add_all(tests)
+        db.flush()
+        db.add_all(
+            IssueFingerprint(
+                project_id=project.id, fingerprint=f"{index:016x}{issue:016x}", severity=IssueSeverity.CRITICAL,
+                category="security", title=f"Issue {issue}", test_type="full",
+                first_seen_test_id=tests[0].id, first_seen_at=now,
+                last_seen_test_id=tests[-1].id, last_seen_at=now, occurrences=3,
+            )
+            for issue in range(2)
+        )
+        # Triaged in the run that last found it: not counted
+        db.add(IssueFingerprint(
+            project_id=project.id, fingerprint=f"{index:016x}{99:016x}", severity=IssueSeverity.CRITICAL,
+            category="security", title="Accepted risk", status="wont_fix", test_type="full",
+            first_seen_test_id=tests[0].id, first_seen_at=now,
+            last_seen_test_id=tests[-1].id, last_seen_at=now, occurrences=3,
+        ))
+    db.commit()
+
+
+async def list_projects_statements(async_engine, user) -> tuple:
+    """List a user's projects; returns the response and the statements it executed"""
+    app = FastAPI()
+    app.include_router(projects.router)
+    app.dependency_overrides[get_current_user] = lambda: Principal.from_user(user)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/projects")
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+    return response, statements
+
+
+@pytest.mark.asyncio
+async def test_project_list_statement_count_does_not_grow_with_projects(db, make_user, async_db_engine):
+    one, many = make_user(), make_user()
+    add_projects(db, one, 1)
+    add_projects(db, many, 20)
+
+    response_one, statements_one = await list_projects_statements(async_db_engine, one)
+    response_many, statements_many = await list_projects_statements(async_db_engine, many)
+
+    assert response_one.status_code == 200
+    assert response_many.status_code == 200
+    assert len(response_one.json()) == 1
+    assert len(response_many.json()) == 20
+    assert all(project["total_tests"] == 3 and project["critical_issues"] == 2 for project in response_many.json())
+    assert len(statements_many) == len(statements_one) == 1
@@ -0,0 +1,137 @@
+"""
+The response cache: invalidation on commit, fills racing invalidations and conditional requests
+"""
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.core import response_cache as cache_module
+from app.core.response_cache import (
+    ResponseCache, cached_response, etag_matches, make_entry, mark_stale, response_cache,
+)
+from app.db import models
+
+
+def request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+
+def fill(cache: ResponseCache, key: str, *tags: str) -> bool:
+    """Look up a key and store a fresh response for it; returns whether it was stored"""
+    async def run():
+        _, lookup = await cache.get(key)
+        return await cache.set(key, make_entry(b"{}", tags), lookup)
+    return asyncio.run(run())
+
+
+def cached(cache: ResponseCache, key: str) -> bool:
+    return asyncio.run(cache.get(key))[0] is not None
+
+
+@pytest.fixture
+def project(db, make_user):
+    project = models.Project(user_id=make_user().id, name="Site", target_url="https://example.com")
+    db.add(project)
+    db.commit()
+    return project
+
+
+def test_commit_invalidates_changed_rows(db, project):
+    fill(response_cache, "project", f"project:{project.id}")
+    fill(response_cache, "projects", f"projects:{project.user_id}")
+
+    project.name = "Renamed"
+    db.flush()
+    assert cached(response_cache, "project")
+
+    db.commit()
+    assert not cached(response_cache, "project")
+    assert not cached(response_cache, "projects")
+
+
+def test_rollback_keeps_responses(db, project):
+    fill(response_cache, "project", f"project:{project.id}")
+
+    project.name = "Renamed"
+    db.flush()
+    db.rollback()
+    assert cached(response_cache, "project")
+
+
+def test_mark_stale_invalidates_on_commit(db, project):
+    fill(response_cache, "test", "test:1")
+
+    mark_stale(db, "test:1")
+    assert cached(response_cache, "test")
+    db.commit()
+    assert not cached(response_cache, "test")
+
+
+def test_fill_is_not_stored_after_a_concurrent_invalidation():
+    cache = ResponseCache(use_redis=False)
+
+    async def run():
+        _, lookup = await cache.get("key")
+        # A write lands while the response is being built
+        cache.invalidate_local(["project:1"])
+        stored = await cache.set("key", make_entry(b"old", ["project:1"]), lookup)
+        return stored, (await cache.get("key"))[0]
+
+    assert asyncio.run(run()) == (False, None)
+    # The next fill started after the invalidation
+    assert fill(cache, "key", "project:1")
+    assert cached(cache, "key")
+
+
+def test_fill_is_not_stored_after_an_invalidation_elsewhere(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache_module, "get_redis", lambda: fakeredis.aioredis.FakeRedis(server=server))
+    monkeypatch.setattr(cache_module, "get_sync_redis", lambda: fakeredis.FakeRedis(server=server))
+    filling, writer = ResponseCache(use_redis=True), ResponseCache(use_redis=True)
+
+    async def run():
+        _, lookup = await filling.get("key")
+        # Another API replica or worker commits a change meanwhile
+        writer.invalidate_sync(["project:1"])
+        return await filling.set("key", make_entry(b"old", ["project:1"]), lookup)
+
+    assert asyncio.run(run()) is False
+    assert not cached(writer, "key")
+    assert filling.redis_errors == writer.redis_errors == 0
+
+    assert fill(filling, "key", "project:1")
+    assert cached(writer, "key")
+    writer.invalidate_sync(["project:1"])
+    assert not cached(ResponseCache(use_redis=True), "key")
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('"abcd"', False),
+    ('"ab"', False),
+    ('W/"abc"', True),
+    ('"x", W/"abc"', True),
+    ('"x","y"', False),
+    ("*", True),
+    ("abc", False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(request(header), '"abc"') is matches
+
+
+def test_cached_response_is_conditional():
+    async def build():
+        return b'{"ok": true}', None
+
+    async def respond(if_none_match=None):
+        return await cached_response(request(if_none_match), "conditional", [], build)
+
+    etag = asyncio.run(respond()).headers["etag"]
+    assert asyncio.run(respond(etag)).status_code == 304
+    assert asyncio.run(respond(f"W/{etag}")).status_code == 304
+    assert asyncio.run(respond(etag[:-2] + '"')).status_code == 200
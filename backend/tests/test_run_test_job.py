@@ -0,0 +1,184 @@
+"""
+The test job pipeline, run eagerly (memory:// broker) with a stubbed bot-engine pool
+"""
+import pytest
+from celery.exceptions import Retry
+
+from app.core.config import settings
+from app.db import models
+from app.services.artifacts import LocalArtifactStore
+from app.services.bot_engine import BotEngineJobError, BotEngineUnavailable
+from app.services.events import STATUS_EVENT
+from app.services.fingerprints import Fingerprint
+from app.workers import tasks
+
+RESULTS = {
+    "browser": "chromium",
+    "summary": {"totalChecks": 10, "passed": 8, "failed": 1, "warnings": 1},
+    "issues": [
+        {"severity": "critical", "category": "security", "title": "Missing CSP header", "url": "https://example.com/"},
+        {"severity": "low", "category": "ui", "title": "Low contrast text", "url": "https://example.com/about"},
+    ],
+}
+
+
+class StubPool:
+    """Stands in for the bot-engine pool: records the test's status at each run, then returns or raises outcome"""
+
+    def __init__(self, db, test_id):
+        self.db = db
+        self.test_id = test_id
+        self.outcome = None
+        self.statuses = []
+
+    def run(self, config, timeout=None, on_progress=None):
+        self.db.expire_all()
+        self.statuses.append(self.db.get(models.Test, self.test_id).status)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+@pytest.fixture
+def pending_test(db, make_user):
+    project = models.Project(user_id=make_user().id, name="Site", target_url="https://example.com")
+    db.add(project)
+    db.flush()
+    test = models.Test(project_id=project.id, test_type="full", status=models.TestStatus.PENDING)
+    db.add(test)
+    db.commit()
+    return test
+
+
+@pytest.fixture
+def bot_engine(db, pending_test, monkeypatch, tmp_path):
+    pool = StubPool(db, pending_test.id)
+    monkeypatch.setattr(tasks, "get_bot_engine_pool", lambda: pool)
+    store = LocalArtifactStore(root=str(tmp_path))
+    monkeypatch.setattr(tasks, "get_artifact_store", lambda: store)
+    return pool
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """The statuses published as live test events"""
+    statuses = []
+
+    def publish(test_id, event, data):
+        if event == STATUS_EVENT:
+            statuses.append(data["status"])
+
+    monkeypatch.setattr(tasks, "publish_test_event", publish)
+    return statuses
+
+
+def queue(test, config=None):
+    tasks.enqueue_test_job(str(test.id), "https://example.com", test.test_type, config)
+
+
+def reload(db, test):
+    db.expire_all()
+    return db.get(models.Test, test.id)
+
+
+def daily_stats(db, test):
+    return db.get(models.ProjectDailyStats, (test.project_id, test.completed_at.date()))
+
+
+def test_completed_run(db, pending_test, bot_engine, published):
+    bot_engine.outcome = RESULTS
+    queue(pending_test)
+
+    test = reload(db, pending_test)
+    assert bot_engine.statuses == [models.TestStatus.RUNNING]
+    assert published == ["running", "completed"]
+    assert test.status == models.TestStatus.COMPLETED
+    assert test.started_at is not None and test.completed_at is not None
+    assert test.results["stats"] == {"total_checks": 10, "passed": 8, "failed": 1, "warnings": 1}
+    assert db.query(models.Issue).filter(models.Issue.test_id == test.id).count() == 2
+
+
+def test_redelivered_job_keeps_issue_counts(db, pending_test, bot_engine, published):
+    bot_engine.outcome = RESULTS
+    queue(pending_test)
+    # acks_late: a worker lost after the commit gets the job delivered again
+    queue(pending_test)
+
+    test = reload(db, pending_test)
+    assert test.status == models.TestStatus.COMPLETED
+    assert db.query(models.Issue).filter(models.Issue.test_id == test.id).count() == 2
+    assert test.results["issue_counts"]["total"] == 2
+    assert test.results["issue_counts"]["critical"] == 1
+
+
+def test_job_error_fails_without_retrying(db, pending_test, bot_engine, published):
+    bot_engine.outcome = BotEngineJobError("Invalid config: unknown test type")
+    with pytest.raises(BotEngineJobError):
+        queue(pending_test)
+
+    test = reload(db, pending_test)
+    assert bot_engine.statuses == [models.TestStatus.RUNNING]
+    assert published == ["running", "failed"]
+    assert test.status == models.TestStatus.FAILED
+    assert test.completed_at is not None
+    assert test.error_message == "Invalid config: unknown test type"
+
+
+def test_unavailable_engine_is_retried(db, pending_test, bot_engine, published):
+    bot_engine.outcome = BotEngineUnavailable("Bot-engine worker 42 timed out after 600s")
+    # Eager tasks raise the retry instead of scheduling it
+    with pytest.raises(Retry):
+        queue(pending_test)
+
+    test = reload(db, pending_test)
+    assert published == ["running", "pending"]
+    assert test.status == models.TestStatus.PENDING
+    assert test.completed_at is None
+    assert "timed out" in test.error_message
+
+
+def test_unavailable_engine_fails_once_retries_run_out(db, pending_test, bot_engine, published):
+    bot_engine.outcome = BotEngineUnavailable("Bot-engine worker 42 timed out after 600s")
+    with pytest.raises(tasks.TransientTestError):
+        tasks.run_test_job.apply(
+            args=[str(pending_test.id), "https://example.com", "full"], retries=settings.TEST_JOB_MAX_RETRIES
+        )
+
+    test = reload(db, pending_test)
+    assert published == ["running", "failed"]
+    assert test.status == models.TestStatus.FAILED
+    assert test.completed_at is not None
+    assert "timed out" in test.error_message
+
+
+def test_failed_run_is_rolled_up(db, pending_test, bot_engine, published):
+    bot_engine.outcome = BotEngineJobError("Invalid config: unknown test type")
+    with pytest.raises(BotEngineJobError):
+        queue(pending_test)
+
+    test = reload(db, pending_test)
+    assert test.rolled_up_at is not None
+    stats = daily_stats(db, test)
+    assert (stats.tests_completed, stats.tests_failed) == (0, 1)
+
+
+def test_carried_forward_run_is_rolled_up(db, pending_test, bot_engine, published, monkeypatch):
+    page = Fingerprint(url="https://example.com", etag='"v1"', last_modified=None, content_hash="0" * 64)
+    monkeypatch.setattr(tasks, "fingerprint_site", lambda url, previous: {page.url: page})
+    bot_engine.outcome = RESULTS
+    queue(pending_test, {"incremental": True})
+
+    unchanged = models.Test(project_id=pending_test.project_id, test_type="full", status=models.TestStatus.PENDING)
+    db.add(unchanged)
+    db.commit()
+    queue(unchanged, {"incremental": True})
+
+    unchanged = reload(db, unchanged)
+    assert bot_engine.statuses == [models.TestStatus.RUNNING]
+    assert unchanged.status == models.TestStatus.COMPLETED
+    assert unchanged.results["carried_over_from"] == str(pending_test.id)
+    assert unchanged.rolled_up_at is not None
+    stats = daily_stats(db, unchanged)
+    assert stats.tests_completed == 2
+    assert stats.checks_total == 20
+    assert stats.issues_critical == 2
@@ -0,0 +1,109 @@
+"""
+Webhook target checks: only public addresses, and delivery connects to the checked one
+"""
+import asyncio
+import ipaddress
+import socket
+import uuid
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.services.webhooks import DeliveryBatch, WebhookDispatcher, check_webhook_url, is_public_address
+
+
+@pytest.mark.parametrize("address, public", [
+    ("93.184.216.34", True),
+    ("2606:2800:220:1:248:1893:25c8:1946", True),
+    ("127.0.0.1", False),
+    ("::1", False),
+    ("10.0.0.5", False),
+    ("172.16.4.1", False),
+    ("192.168.1.1", False),
+    ("fd00::1", False),
+    # Link-local, including the cloud metadata endpoint
+    ("169.254.169.254", False),
+    ("fe80::1", False),
+    ("::ffff:127.0.0.1", False),
+    ("::ffff:169.254.169.254", False),
+    ("::ffff:93.184.216.34", True),
+    ("100.64.0.1", False),
+    ("0.0.0.0", False),
+    ("224.0.0.1", False),
+])
+def test_is_public_address(address, public):
+    assert is_public_address(address) is public
+
+
+@pytest_asyncio.fixture
+async def resolve(monkeypatch):
+    """Answer the event loop's DNS lookups from a {host: [addresses]} dict; IP literals resolve to themselves"""
+    answers = {}
+
+    async def getaddrinfo(host, port, *args, **kwargs):
+        try:
+            addresses = [str(ipaddress.ip_address(host))]
+        except ValueError:
+            if host not in answers:
+                raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+            addresses = answers[host]
+        return [
+            (socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+            for address in addresses
+        ]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    return answers
+
+
+@pytest.mark.asyncio
+async def test_check_webhook_url(resolve):
+    resolve["hooks.example.com"] = ["93.184.216.34"]
+    resolve["metadata.example.com"] = ["169.254.169.254"]
+    resolve["mixed.example.com"] = ["93.184.216.34", "10.0.0.5"]
+    resolve["mapped.example.com"] = ["::ffff:127.0.0.1"]
+
+    assert await check_webhook_url("https://hooks.example.com/checkmate") == "93.184.216.34"
+    for url in [
+        "http://metadata.example.com/latest/meta-data/",
+        "https://mixed.example.com/",
+        "https://mapped.example.com/",
+        "http://127.0.0.1:8000/",
+        "http://[::1]/",
+    ]:
+        with pytest.raises(ValueError, match="non-public"):
+            await check_webhook_url(url)
+    with pytest.raises(ValueError, match="does not resolve"):
+        await check_webhook_url("https://unknown.example.com/")
+
+
+@pytest.mark.asyncio
+async def test_delivery_connects_to_the_checked_address(resolve):
+    resolve["hooks.example.com"] = ["93.184.216.34"]
+    sent = []
+
+    def handler(request: httpx.Request):
+        sent.append(request)
+        return httpx.Response(204)
+
+    dispatcher = WebhookDispatcher(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    outcome = await dispatcher.send(DeliveryBatch(uuid.uuid4(), "https://hooks.example.com:8443/checkmate", 0))
+
+    assert outcome.ok
+    [request] = sent
+    assert request.url == "https://93.184.216.34:8443/checkmate"
+    assert request.headers["host"] == "hooks.example.com:8443"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+
+
+@pytest.mark.asyncio
+async def test_delivery_to_a_rebound_host_is_refused(resolve):
+    resolve["hooks.example.com"] = ["10.0.0.5"]
+    sent = []
+    dispatcher = WebhookDispatcher(httpx.AsyncClient(transport=httpx.MockTransport(sent.append)))
+    outcome = await dispatcher.send(DeliveryBatch(uuid.uuid4(), "https://hooks.example.com/checkmate", 0))
+
+    assert not outcome.ok
+    assert "non-public" in outcome.error
+    assert sent == []
@@ -3,7 +3,7 @@
  * Main orchestrator for automated testing
  */
 
-import { chromium, firefox, webkit, Browser, Page } from 'playwright';
+import { chromium, firefox, webkit, Browser, BrowserContext } from 'playwright';
 import { testAuthentication } from './tests/auth';
 import { testPerformance } from './tests/performance';
 import { testSecurity } from './tests/security';
@@ -42,6 +42,15 @@ export interface TestResults {
   };
 }
 
+export interface ProgressEvent {
+  module: 'auth' | 'performance' | 'security' | 'ui';
+  state: 'started' | 'completed';
+  checks?: { total: number; passed: number; failed: number };
+  issues?: Issue[];
+}
+
+export type ProgressCallback = (event: ProgressEvent) => void;
+
 export interface Issue {
   severity: 'critical' | 'high' | 'medium' | 'low';
   category: string;
@@ -52,30 +61,26 @@ export interface Issue {
   recommendation?: string;
 }
 
+/**
+ * Launch a headless browser of the given type
+ */
+export async function launchBrowser(browserType: string): Promise<Browser> {
+  switch (browserType) {
+    case 'firefox':
+      return firefox.launch({ headless: true });
+    case 'webkit':
+      return webkit.launch({ headless: true });
+    default:
+      return chromium.launch({ headless: true });
+  }
+}
+
 /**
  * Run all tests for a given configuration
  */
 export async function runTests(config: TestConfig): Promise<TestResults> {
   const startTime = Date.now();
   const browsers = config.browsers || ['chromium'];
-  const testTypes = config.testTypes || ['all'];
-
-  const results: TestResults = {
-    testId: `test_${Date.now()}`,
-    targetUrl: config.targetUrl,
-    timestamp: new Date(),
-    duration: 0,
-    browser: browsers[0],
-    results: {},
-    screenshots: [],
-    issues: [],
-    summary: {
-      totalChecks: 0,
-      passed: 0,
-      failed: 0,
-      warnings: 0
-    }
-  };
 
   // Use first browser for testing (multi-browser support can be added later)
   const browserType = browsers[0];
@@ -83,61 +88,77 @@ export async function runTests(config: TestConfig): Promise<TestResults> {
 
   try {
     // Launch browser
-    switch (browserType) {
-      case 'firefox':
-        browser = await firefox.launch({ headless: true });
-        break;
-      case 'webkit':
-        browser = await webkit.launch({ headless: true });
-        break;
-      default:
-        browser = await chromium.launch({ headless: true });
-    }
+    browser = await launchBrowser(browserType);
+  } catch (error: any) {
+    const results = createResults(config, browserType);
+    recordExecutionError(results, error);
+    results.duration = Math.round((Date.now() - startTime) / 1000);
+    return results;
+  }
+
+  try {
+    return await runTestsInBrowser(browser, config);
+  } finally {
+    // Close browser
+    await browser.close();
+  }
+}
+
+/**
+ * Run all tests for a given configuration in an already launched browser.
+ * Each run gets its own isolated browser context, so a long-lived browser
+ * can be reused across runs.
+ */
+export async function runTestsInBrowser(
+  browser: Browser,
+  config: TestConfig,
+  onProgress?: ProgressCallback
+): Promise<TestResults> {
+  const startTime = Date.now();
+  const browsers = config.browsers || ['chromium'];
+  const testTypes = config.testTypes || ['all'];
 
-    const context = await browser.newContext({
+  const results = createResults(config, browsers[0]);
+  let context: BrowserContext | undefined;
+
+  try {
+    context = await browser.newContext({
       viewport: { width: 1920, height: 1080 },
       userAgent: 'CheckmateBot/1.0'
     });
 
     const page = await context.newPage();
 
-    // Run tests based on configuration
-    if (testTypes.includes('all') || testTypes.includes('auth')) {
-      console.log('Running authentication tests...');
-      results.results.auth = await testAuthentication(page, config.targetUrl, config.credentials);
-      updateSummary(results, results.results.auth);
-    }
-
-    if (testTypes.includes('all') || testTypes.includes('performance')) {
-      console.log('Running performance tests...');
-      results.results.performance = await testPerformance(page, config.targetUrl);
-      updateSummary(results, results.results.performance);
-    }
-
-    if (testTypes.includes('all') || testTypes.includes('security')) {
-      console.log('Running security tests...');
-      results.results.security = await testSecurity(page, config.targetUrl);
-      updateSummary(results, results.results.security);
-    }
+    const runModule = async (module: ProgressEvent['module'], label: string, run: () => Promise<any>) => {
+      if (!testTypes.includes('all') && !testTypes.includes(module)) {
+        return;
+      }
+      console.log(`Running ${label} tests...`);
+      onProgress?.({ module, state: 'started' });
+      const moduleResults = await run();
+      results.results[module] = moduleResults;
+      updateSummary(results, moduleResults);
+      onProgress?.({
+        module,
+        state: 'completed',
+        checks: moduleResults?.checks,
+        issues: moduleResults?.issues || []
+      });
+    };
 
-    if (testTypes.includes('all') || testTypes.includes('ui')) {
-      console.log('Running UI tests...');
-      results.results.ui = await testUI(page, config.targetUrl);
-      updateSummary(results, results.results.ui);
-    }
-
-    // Close browser
-    await browser.close();
+    // Run tests based on configuration
+    await runModule('auth', 'authentication', () => testAuthentication(page, config.targetUrl, config.credentials));
+    await runModule('performance', 'performance', () => testPerformance(page, config.targetUrl));
+    await runModule('security', 'security', () => testSecurity(page, config.targetUrl));
+    await runModule('ui', 'UI', () => testUI(page, config.targetUrl));
 
   } catch (error: any) {
     console.error('Test execution error:', error);
-    results.issues.push({
-      severity: 'critical',
-      category: 'execution',
-      title: 'Test execution failed',
-      description: error.message,
-      recommendation: 'Check target URL and test configuration'
-    });
+    recordExecutionError(results, error);
+  } finally {
+    if (context) {
+      await context.close();
+    }
   }
 
   // Calculate duration
@@ -146,6 +167,35 @@ export async function runTests(config: TestConfig): Promise<TestResults> {
   return results;
 }
 
+function createResults(config: TestConfig, browser: string): TestResults {
+  return {
+    testId: `test_${Date.now()}`,
+    targetUrl: config.targetUrl,
+    timestamp: new Date(),
+    duration: 0,
+    browser,
+    results: {},
+    screenshots: [],
+    issues: [],
+    summary: {
+      totalChecks: 0,
+      passed: 0,
+      failed: 0,
+      warnings: 0
+    }
+  };
+}
+
+function recordExecutionError(results: TestResults, error: any) {
+  results.issues.push({
+    severity: 'critical',
+    category: 'execution',
+    title: 'Test execution failed',
+    description: error.message,
+    recommendation: 'Check target URL and test configuration'
+  });
+}
+
 /**
  * Update test summary with results from individual tests
  */
@@ -192,4 +242,4 @@ if (require.main === module) {
     });
 }
 
-export default { runTests };
+export default { runTests, runTestsInBrowser, launchBrowser };
@@ -0,0 +1,97 @@
+/**
+ * Checkmate Bot Worker
+ * Long-lived worker process driven by the backend over stdin/stdout.
+ *
+ * Protocol (one JSON document per line):
+ *   -> {"id": "<job id>", "config": TestConfig}
+ *   <- {"type": "ready", "pid": 123}                      once, at startup
+ *   <- {"type": "progress", "id": "<job id>", ...ProgressEvent}
+ *   <- {"type": "result", "id": "<job id>", "results": TestResults}
+ *   <- {"type": "error", "id": "<job id>", "error": "<message>"}
+ *
+ * Browsers are launched once per browser type and reused across jobs;
+ * each job runs in a fresh browser context. stdout is reserved for the
+ * protocol, so all logging is redirected to stderr.
+ */
+
+import * as readline from 'readline';
+import { Browser } from 'playwright';
+import { TestConfig, launchBrowser, runTestsInBrowser } from './index';
+
+interface Job {
+  id: string;
+  config: TestConfig;
+}
+
+// Test modules log progress with console.log; keep stdout clean for the protocol
+console.log = (...args: any[]) => console.error(...args);
+
+const browsers = new Map<string, Browser>();
+
+function send(message: object) {
+  process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function getBrowser(browserType: string): Promise<Browser> {
+  const existing = browsers.get(browserType);
+  if (existing && existing.isConnected()) {
+    return existing;
+  }
+
+  const browser = await launchBrowser(browserType);
+  browsers.set(browserType, browser);
+  return browser;
+}
+
+async function handleJob(job: Job) {
+  try {
+    const browserType = (job.config.browsers || ['chromium'])[0];
+    const browser = await getBrowser(browserType);
+    const results = await runTestsInBrowser(browser, job.config, event => {
+      send({ type: 'progress', id: job.id, ...event });
+    });
+    send({ type: 'result', id: job.id, results });
+  } catch (error: any) {
+    send({ type: 'error', id: job.id, error: error.message || String(error) });
+  }
+}
+
+async function shutdown() {
+  for (const browser of browsers.values()) {
+    await browser.close().catch(() => undefined);
+  }
+  process.exit(0);
+}
+
+async function main() {
+  const input = readline.createInterface({ input: process.stdin, terminal: false });
+
+  // Jobs are handled one at a time; the backend pool provides the parallelism
+  let queue = Promise.resolve();
+
+  input.on('line', line => {
+    if (!line.trim()) {
+      return;
+    }
+
+    let job: Job;
+    try {
+      job = JSON.parse(line);
+    } catch (error: any) {
+      send({ type: 'error', id: null, error: `Invalid job: ${error.message}` });
+      return;
+    }
+
+    queue = queue.then(() => handleJob(job));
+  });
+
+  input.on('close', () => {
+    queue.then(shutdown);
+  });
+
+  process.on('SIGTERM', shutdown);
+
+  send({ type: 'ready', pid: process.pid });
+}
+
+main();
@@ -52,13 +52,76 @@ export const projectsApi = {
     apiClient.post('/projects', data),
   update: (id: string, data: any) => apiClient.put(`/projects/${id}`, data),
   delete: (id: string) => apiClient.delete(`/projects/${id}`),
+  listTests: (
+    id: string,
+    params?: { status?: string; test_type?: string; cursor?: string; limit?: number }
+  ) => apiClient.get(`/projects/${id}/tests`, { params }),
+  // Dates are YYYY-MM-DD (UTC); defaults to the last 90 days
+  getAnalytics: (id: string, params?: { start?: string; end?: string; interval?: 'day' | 'week' | 'month' }) =>
+    apiClient.get(`/projects/${id}/analytics`, { params }),
 }
 
 export const testsApi = {
-  create: (data: { project_id: string; test_type: string }) =>
+  // config.matrix: { browsers?: string[]; modules?: string[] } runs every cell in parallel
+  create: (data: { project_id: string; test_type: string; config?: Record<string, any> }) =>
     apiClient.post('/tests', data),
   get: (id: string) => apiClient.get(`/tests/${id}`),
-  getIssues: (id: string) => apiClient.get(`/tests/${id}/issues`),
+  getFullResults: (id: string) => apiClient.get(`/tests/${id}/results/full`),
+  getIssues: (
+    id: string,
+    params?: { severity?: string; category?: string; status?: string; cursor?: string; limit?: number }
+  ) => apiClient.get(`/tests/${id}/issues`, { params }),
+  // Issues new in this run, and the previous run's issues it no longer found
+  getIssueDiff: (id: string, params?: { limit?: number }) =>
+    apiClient.get(`/tests/${id}/issues/diff`, { params }),
   submitManual: (testId: string, data: any) =>
     apiClient.post(`/tests/${testId}/manual`, data),
+  createBatch: (data: { project_ids: string[]; test_type: string; config?: Record<string, any> }) =>
+    apiClient.post('/tests/batches', data),
+  getBatch: (id: string) => apiClient.get(`/tests/batches/${id}`),
+  getBatchTests: (id: string, params?: { status?: string; cursor?: string; limit?: number }) =>
+    apiClient.get(`/tests/batches/${id}/tests`, { params }),
+}
+
+// Reports render in the background: poll get() until status is "ready"
+export const reportsApi = {
+  request: (testId: string, reportType: 'json' | 'html' | 'pdf' = 'html') =>
+    apiClient.post('/reports', { test_id: testId, report_type: reportType }),
+  get: (id: string) => apiClient.get(`/reports/${id}`),
+  download: (id: string) => apiClient.get(`/reports/${id}/download`, { responseType: 'blob' }),
+}
+
+export const webhooksApi = {
+  list: () => apiClient.get('/webhooks'),
+  create: (data: { url: string; events: ('test_completed' | 'issue_found')[]; project_id?: string }) =>
+    apiClient.post('/webhooks', data),
+  delete: (id: string) => apiClient.delete(`/webhooks/${id}`),
+}
+
+// Chunked, resumable media uploads
+const UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+
+export const uploadsApi = {
+  create: (data: { filename: string; content_type: string; size: number; checksum?: string }) =>
+    apiClient.post('/uploads', data),
+  get: (id: string) => apiClient.get(`/uploads/${id}`),
+  getOffset: async (id: string) => {
+    const response = await apiClient.head(`/uploads/${id}`)
+    return Number(response.headers['upload-offset'])
+  },
+  appendChunk: (id: string, offset: number, chunk: Blob) =>
+    apiClient.patch(`/uploads/${id}`, chunk, {
+      headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+    }),
+  // Uploads a file from wherever the server says it left off
+  uploadFile: async (id: string, file: File, onProgress?: (sent: number) => void) => {
+    let offset = await uploadsApi.getOffset(id)
+    let response
+    while (offset < file.size) {
+      response = await uploadsApi.appendChunk(id, offset, file.slice(offset, offset + UPLOAD_CHUNK_SIZE))
+      offset = Number(response.headers['upload-offset'])
+      onProgress?.(offset)
+    }
+    return response
+  },
 }